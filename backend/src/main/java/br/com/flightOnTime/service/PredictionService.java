@@ -9,14 +9,23 @@ import org.springframework.stereotype.Service;
 import org.springframework.web.reactive.function.client.WebClient;
 import reactor.core.publisher.Mono;
 
+import java.time.Duration;
+import java.util.concurrent.TimeoutException;
+
 @Service
 public class PredictionService {
 
+    // Mesmo orçamento enviado à API (X-Request-Timeout-Ms): ela descarta o trabalho que já abandonamos
+    private static final String TIMEOUT_HEADER = "X-Request-Timeout-Ms";
+
     private final WebClient webClient;
 
     @Value("${ml.api.base-url}")
     private String baseUrl;
 
+    @Value("${ml.api.timeout:3s}")
+    private Duration timeout;
+
 
     public PredictionService(WebClient.Builder builder) {
         this.webClient = builder.build();
@@ -27,6 +36,7 @@ public class PredictionService {
 
         return webClient.post()
                 .uri(baseUrl)
+                .header(TIMEOUT_HEADER, String.valueOf(timeout.toMillis()))
                 .bodyValue(request)
                 .retrieve()
                 .onStatus(
@@ -39,6 +49,13 @@ public class PredictionService {
                         )
                 )
                 .bodyToMono(PredictionResponseDTO.class)
+                .timeout(timeout)   // cancela a chamada (fecha a conexão) ao estourar o orçamento
+                .onErrorMap(
+                        TimeoutException.class,
+                        e -> new PredictionNotFound(
+                                "Serviço de previsão Python não respondeu em " + timeout.toMillis() + "ms"
+                        )
+                )
                 .block(); // OK para MVP
     }
 }
@@ -1,5 +1,9 @@
 # main.py - VERSÃO FUNCIONAL SIMPLES
 import os
+import atexit
+import logging
+import logging.handlers
+import queue
 import joblib
 import json
 import numpy as np
@@ -11,6 +15,30 @@ print("=" * 60)
 print("🚀 INICIANDO FLIGHT ON TIME API")
 print("=" * 60)
 
+# Logs por requisição vão para uma fila; a escrita no stdout fica numa thread
+# (fila cheia descarta em vez de travar a predição). LOG_LEVEL=DEBUG mostra o detalhe das features.
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DroppingQueueHandler.dropped += 1
+
+    def prepare(self, record):
+        return record
+
+_log_queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+logger = logging.getLogger("flight_on_time")
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+logger.addHandler(_DroppingQueueHandler(_log_queue))
+logger.propagate = False
+
 # 1. Configurar app FastAPI
 app = FastAPI()
 
@@ -72,6 +100,24 @@ except Exception as e:
 # 5. Mapeamentos
 hora_map = {"manha": 0, "tarde": 1, "noite": 2}
 
+# Consultas compiladas: companhia → id e origem → destino → rota_id
+# (evita montar a string "ORIG-DEST" e chamar .upper() em toda predição)
+companhia_lookup = {nome.upper(): cid for nome, cid in companhia_map.items()}
+rota_lookup = {}
+for rota, rid in airport_map.items():
+    if "-" in rota:
+        origem, destino = rota.upper().split("-", 1)
+        rota_lookup.setdefault(origem, {})[destino] = rid
+
+def lookup_companhia(nome: str) -> int:
+    cid = companhia_lookup.get(nome)
+    return cid if cid is not None else companhia_lookup.get(nome.upper(), -1)
+
+def lookup_rota(origem: str, destino: str) -> int:
+    destinos = rota_lookup.get(origem) or rota_lookup.get(origem.upper(), {})
+    rid = destinos.get(destino)
+    return rid if rid is not None else destinos.get(destino.upper(), -1)
+
 # 6. Modelo de dados para requisição
 class FlightData(BaseModel):
     companhia: str
@@ -137,23 +183,19 @@ def model_info():
 def predict_flight(data: FlightData):
     """Prever se um voo terá atraso"""
     
-    print(f"\n" + "=" * 50)
-    print(f"📥 NOVA PREDIÇÃO:")
-    print(f"   Companhia: {data.companhia}")
-    print(f"   Rota: {data.aeroporto_origem} → {data.aeroporto_destino}")
-    print(f"   Distância: {data.distancia} km")
-    print(f"   Período: {data.hora_partida}")
-    print(f"   Dia da semana: {data.dia_semana}")
+    logger.debug("📥 NOVA PREDIÇÃO: %s %s → %s, %s km, %s, dia %s", data.companhia, data.aeroporto_origem,
+                 data.aeroporto_destino, data.distancia, data.hora_partida, data.dia_semana)
     
     try:
         # Converter dados
-        comp_id = companhia_map.get(data.companhia.upper(), -1)
-        rota_key = f"{data.aeroporto_origem.upper()}-{data.aeroporto_destino.upper()}"
-        rota_id = airport_map.get(rota_key, -1)
+        comp_id = lookup_companhia(data.companhia)
+        rota_id = lookup_rota(data.aeroporto_origem, data.aeroporto_destino)
         hora_val = hora_map.get(data.hora_partida.lower(), 1)
         
         # Construir features na ORDEM CORRETA
         # Baseado nos seus testes: [distancia, hora, companhia, origem, destino, rota, dia]
+        # Layout próprio deste modelo (entradas já agregadas: período e dia da semana); os modelos
+        # da ml-api e o treino usam ml-api/feature_layouts.py (via code/transform_simple.py)
         features = [
             float(data.distancia) / 1000.0,  # Feature 0: Distância normalizada
             float(hora_val),                  # Feature 1: Hora do dia
@@ -164,19 +206,7 @@ def predict_flight(data: FlightData):
             float(data.dia_semana)            # Feature 6: Dia da semana
         ]
         
-        print(f"\n🔢 Features enviadas ao modelo:")
-        feature_names = [
-            "distancia_normalizada",
-            "hora_partida",
-            "companhia_id",
-            "origem_id",
-            "destino_id",
-            "rota_id",
-            "dia_semana"
-        ]
-        
-        for i, (name, value) in enumerate(zip(feature_names, features)):
-            print(f"   [{i}] {name}: {value}")
+        logger.debug("🔢 Features enviadas ao modelo: %s", features)
         
         # Fazer predição
         probs = model.predict_proba([features])[0]
@@ -185,10 +215,6 @@ def predict_flight(data: FlightData):
         prob_atraso = float(probs[0])   # Classe 0
         prob_pontual = float(probs[1])  # Classe 1
         
-        print(f"\n📊 RESULTADO DA PREDIÇÃO:")
-        print(f"   Probabilidade de ATRASO: {prob_atraso:.4f} ({prob_atraso*100:.1f}%)")
-        print(f"   Probabilidade de PONTUAL: {prob_pontual:.4f} ({prob_pontual*100:.1f}%)")
-        
         # Decisão (threshold 0.5)
         atraso = prob_atraso > 0.5
         
@@ -248,15 +274,13 @@ def predict_flight(data: FlightData):
             }
         }
         
-        print(f"   Decisão: {'⚠️  ATRASO' if atraso else '✅ PONTUAL'}")
-        print(f"   Confiança: {max(prob_atraso, prob_pontual)*100:.1f}%")
+        logger.info("📊 %s %s→%s: %s (atraso %.4f, pontual %.4f)", data.companhia, data.aeroporto_origem,
+                    data.aeroporto_destino, "ATRASO" if atraso else "PONTUAL", prob_atraso, prob_pontual)
         
         return result
         
     except Exception as e:
-        print(f"❌ ERRO na predição: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.error("❌ ERRO na predição: %s", e, exc_info=True)
         
         return {
             "error": str(e),
@@ -1,9 +1,68 @@
+"""
+Features de treino: 5 entradas do voo -> features do modelo.
+
+Usa o mesmo pipeline do serviço (ml-api/feature_layouts.py): o que o
+modelo vê no treino é, por construção, o que ele vê no /predict, no
+/predict/batch e no batch_score.py. O código fica na ml-api porque o
+build Docker só enxerga aquela pasta; este módulo só o chama.
+
+Entradas (DataFrame, lista de dicts ou um dict): companhia_aerea,
+aeroporto_origem, aeroporto_destino, data_hora_partida, distancia_km.
+Saída: DataFrame com as colunas do layout, na ordem do modelo
+(hour7: turno, companhia, rota, distancia_norm, dia_semana, mes, hora_do_dia).
+
+Tudo é feito por coluna: datas com aritmética de datetime64, companhias e
+rotas codificadas uma vez por valor distinto.
+
+O rascunho anterior citava is_holiday; nenhum modelo servido usa essa
+feature, e criá-la só no treino seria justamente o skew a evitar.
+"""
 
-import pandas as pd
 import json
+import os
+import sys
+
+import pandas as pd
+
+ML_API_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "ml-api"))
+if ML_API_DIR not in sys.path:
+    sys.path.insert(0, ML_API_DIR)
+
+from encoders import CompiledEncoders  # noqa: E402
+from feature_layouts import LAYOUTS, FeatureAdapter, frame_columns  # noqa: E402
+
+ENCODERS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models", "encoders")
+INPUT_COLUMNS = ["companhia_aerea", "aeroporto_origem", "aeroporto_destino", "data_hora_partida", "distancia_km"]
+
+
+def load_encoders(encoders_dir: str = ENCODERS_DIR) -> CompiledEncoders:
+    """Encoders JSON de companhia e rota (os mesmos copiados para a ml-api)"""
+    with open(os.path.join(encoders_dir, "companhia_encoder.json"), "r") as f:
+        airline_encoder = json.load(f)
+    with open(os.path.join(encoders_dir, "airport_pair_encoder.json"), "r") as f:
+        airport_pair_encoder = json.load(f)
+    return CompiledEncoders(airline_encoder, airport_pair_encoder)
+
+
+def to_frame(flight_data) -> pd.DataFrame:
+    """DataFrame com as 5 entradas e data_hora_partida em datetime64"""
+    if isinstance(flight_data, dict):
+        flight_data = [flight_data]
+    frame = pd.DataFrame(flight_data)
+
+    missing = [column for column in INPUT_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Colunas faltando: {missing}")
+
+    departures = pd.to_datetime(frame["data_hora_partida"], format="ISO8601")
+    if not pd.api.types.is_datetime64_any_dtype(departures):
+        raise ValueError("data_hora_partida: datas com fusos diferentes; use hora local sem fuso")
+    return frame.assign(data_hora_partida=departures)
+
 
-def transform_simple(flight_data):
-    # Lógica de extração de 5 inputs -> 7 features
-    # 1. hora_do_dia | 2. dia_da_semana | 3. cia_encoded | 4. rota_encoded 
-    # 5. distancia_km | 6. mes | 7. is_holiday
-    pass
+def transform_simple(flight_data, layout: str = "hour7", encoders: CompiledEncoders = None) -> pd.DataFrame:
+    """Matriz de features (uma linha por voo) no layout pedido, pronta para o fit"""
+    frame = to_frame(flight_data)
+    adapter = FeatureAdapter(layout, len(LAYOUTS[layout]), encoders or load_encoders())
+    features_matrix = adapter.matrix_from_columns(frame_columns(frame), len(frame))
+    return pd.DataFrame(features_matrix, columns=adapter.feature_names, index=frame.index)
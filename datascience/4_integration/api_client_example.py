@@ -291,28 +291,110 @@ class FlightDelayAPIClient:
         """
         Faz previsões para múltiplos voos
         
+        Envia todos os voos válidos numa única chamada a /predict/batch.
+        Se a API não tiver o endpoint em lote (versões antigas), volta
+        para uma requisição por voo.
+        
+        Para pontuar uma grade inteira em arquivo (CSV/Parquet), use
+        ml-api/batch_score.py, que roda o modelo direto, sem HTTP. Para
+        um DataFrame já em memória, use predict_arrow().
+        
         Args:
             flights: Lista de dicionários com dados de voo
             
         Returns:
             Lista de resultados
         """
-        results = []
-        
-        for i, flight in enumerate(flights, 1):
-            logger.info(f"📦 Processando voo {i}/{len(flights)}...")
-            result = self.predict_delay(flight)
-            results.append({
-                "flight_data": flight,
-                "prediction": result
-            })
+        results = [None] * len(flights)
+        valid_indexes = []
+        
+        for i, flight in enumerate(flights):
+            validation_error = self._validate_flight_data(flight)
+            if validation_error:
+                results[i] = {"flight_data": flight, "prediction": validation_error}
+            else:
+                valid_indexes.append(i)
+        
+        if not valid_indexes:
+            return results
+        
+        start_time = time.time()
+        
+        try:
+            logger.info(f"📦 Enviando lote com {len(valid_indexes)} voos...")
+            
+            response = self.session.post(
+                f"{self.base_url}/predict/batch",
+                json=[flights[i] for i in valid_indexes],
+                timeout=self.timeout * max(1, len(valid_indexes) // 1000 + 1)
+            )
+            
+            processing_time = (time.time() - start_time) * 1000
+            logger.info(f"📦 Lote respondido em {processing_time:.1f}ms - Status: {response.status_code}")
+            
+            if response.status_code == 200:
+                for i, prediction in zip(valid_indexes, response.json()["resultados"]):
+                    results[i] = {"flight_data": flights[i], "prediction": prediction}
+                return results
+            
+            if response.status_code not in (404, 405):
+                error = {
+                    "status": "api_error",
+                    "status_code": response.status_code,
+                    "error": f"Erro da API: {response.status_code}",
+                    "processing_time_ms": round(processing_time, 2)
+                }
+                for i in valid_indexes:
+                    results[i] = {"flight_data": flights[i], "prediction": error}
+                return results
+            
+            logger.warning("⚠️ API sem /predict/batch, enviando voo a voo")
+            
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"⚠️ Falha no lote ({e}), enviando voo a voo")
+        
+        for n, i in enumerate(valid_indexes, 1):
+            logger.info(f"📦 Processando voo {n}/{len(valid_indexes)}...")
+            results[i] = {
+                "flight_data": flights[i],
+                "prediction": self.predict_delay(flights[i])
+            }
             
             # Pequena pausa para não sobrecarregar a API
-            if i < len(flights):
+            if n < len(valid_indexes):
                 time.sleep(0.1)
         
         return results
 
+    
+    def predict_arrow(self, frame):
+        """
+        Pontua um DataFrame (colunas do /predict) via /predict/arrow
+        
+        Envia e recebe Arrow IPC stream, sem JSON por voo. Precisa do
+        pyarrow instalado dos dois lados.
+        
+        Args:
+            frame: DataFrame pandas (ou pyarrow.Table) com os voos
+            
+        Returns:
+            pyarrow.Table com as colunas atraso e probabilidade, na mesma ordem
+        """
+        import pyarrow as pa
+        
+        table = frame if isinstance(frame, pa.Table) else pa.Table.from_pandas(frame, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        
+        response = self.session.post(
+            f"{self.base_url}/predict/arrow",
+            data=sink.getvalue().to_pybytes(),
+            headers={"Content-Type": "application/vnd.apache.arrow.stream"},
+            timeout=self.timeout * max(1, table.num_rows // 100000 + 1)
+        )
+        response.raise_for_status()
+        return pa.ipc.open_stream(response.content).read_all()
 
 # ============================================================================
 # EXEMPLOS PRÁTICOS DE USO
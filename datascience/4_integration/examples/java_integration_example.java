@@ -32,13 +32,16 @@ class PredictionResponse {
 
 public class FlightPredictionClient {
 
+    // Same budget sent to the API (X-Request-Timeout-Ms) so it drops work we gave up on
+    private static final int TIMEOUT_MS = 3000;
+
     private final RestTemplate restTemplate;
     private final String apiUrl;
 
     public FlightPredictionClient(String apiUrl) {
         SimpleClientHttpRequestFactory factory = new SimpleClientHttpRequestFactory();
-        factory.setConnectTimeout(3000);
-        factory.setReadTimeout(3000);
+        factory.setConnectTimeout(TIMEOUT_MS);
+        factory.setReadTimeout(TIMEOUT_MS);
         this.restTemplate = new RestTemplate(factory);
         this.apiUrl = apiUrl;
     }
@@ -49,6 +52,7 @@ public class FlightPredictionClient {
         HttpHeaders headers = new HttpHeaders();
         headers.setContentType(MediaType.APPLICATION_JSON);
         headers.setAccept(Collections.singletonList(MediaType.APPLICATION_JSON));
+        headers.set("X-Request-Timeout-Ms", String.valueOf(TIMEOUT_MS));
 
         HttpEntity<FlightData> request = new HttpEntity<>(flight, headers);
 
@@ -71,7 +75,7 @@ public class FlightPredictionClient {
             throw new RuntimeException("Client error calling API: " + e.getStatusCode(), e);
 
         } catch (HttpServerErrorException e) {
-            // 5xx — server error (retry or fallback allowed)
+            // 5xx — server error (retry or fallback allowed; 504 = deadline passed inside the API)
             throw new RuntimeException("Server error from API: " + e.getStatusCode(), e);
 
         } catch (ResourceAccessException e) {
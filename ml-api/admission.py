@@ -0,0 +1,140 @@
+"""
+Controle de admissão contra o SLO de 2.5 s (timeout_settings.json).
+
+Para cada classe de rota (predição unitária, lote) mantemos uma média
+móvel do tempo de serviço por requisição: latência observada dividida
+pelo número de requisições em andamento quando ela entrou (lei de Little).
+A latência prevista para uma nova requisição é o trabalho já em andamento
+mais o dela; se passar do orçamento (REQUEST_BUDGET_MS x
+ADMISSION_SAFETY) ou se houver ADMISSION_MAX_IN_FLIGHT requisições em
+andamento, ela é recusada na hora com Overloaded (503 + Retry-After),
+em vez de terminar depois que o cliente já desistiu.
+
+Uma classe sem nada em andamento sempre admite uma requisição (sonda), e
+a média decai pela metade a cada ADMISSION_DECAY_SECONDS sem observações:
+uma requisição lenta (lote frio, por exemplo) não fecha a classe para
+sempre, porque a próxima sonda traz a média de volta.
+"""
+
+import math
+import os
+import time
+from collections import defaultdict
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+REQUEST_BUDGET_MS = float(os.getenv("REQUEST_BUDGET_MS", "2500"))
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "512"))
+ADMISSION_SAFETY = float(os.getenv("ADMISSION_SAFETY", "0.8"))
+ADMISSION_DECAY_SECONDS = float(os.getenv("ADMISSION_DECAY_SECONDS", "10"))
+
+
+class Overloaded(Exception):
+    """Requisição recusada pelo controle de admissão"""
+
+    def __init__(self, reason: str, retry_after: float, estimated_seconds: float = None):
+        super().__init__(f"Servidor sobrecarregado ({reason}); tente novamente em {math.ceil(retry_after)}s")
+        self.reason = reason
+        self.retry_after = retry_after
+        self.estimated_seconds = estimated_seconds
+
+
+class Ticket:
+    __slots__ = ("route_class", "start", "in_flight")
+
+    def __init__(self, route_class: str, start: float, in_flight: int):
+        self.route_class = route_class
+        self.start = start
+        self.in_flight = in_flight
+
+
+class AdmissionController:
+    """Limite de requisições em andamento + previsão de espera por classe de rota"""
+
+    def __init__(self, budget_seconds: float = REQUEST_BUDGET_MS / 1000, max_in_flight: int = ADMISSION_MAX_IN_FLIGHT,
+                 safety: float = ADMISSION_SAFETY, alpha: float = 0.1, enabled: bool = ADMISSION_ENABLED,
+                 decay_seconds: float = ADMISSION_DECAY_SECONDS, clock=time.perf_counter):
+        """
+        Args:
+            budget_seconds: orçamento padrão por requisição
+            max_in_flight: limite duro de requisições em andamento
+            safety: fração do orçamento usada para decidir (margem para rede/serialização)
+            alpha: peso da observação nova na média móvel do tempo de serviço
+            decay_seconds: meia-vida da média sem observações novas (0 desliga)
+        """
+        self.budget_seconds = budget_seconds
+        self.max_in_flight = max_in_flight
+        self.safety = safety
+        self.alpha = alpha
+        self.enabled = enabled
+        self.decay_seconds = decay_seconds
+        self.clock = clock
+
+        self.in_flight = 0
+        self.in_flight_by_class = defaultdict(int)
+        self.service_seconds = {}                 # classe -> média móvel
+        self.updated = {}                         # classe -> instante da última observação
+        self.accepted = defaultdict(int)          # classe -> n
+        self.shed = defaultdict(int)              # (classe, motivo) -> n
+
+    def service(self, route_class: str) -> float:
+        """Média do tempo de serviço da classe, com o decaimento desde a última observação"""
+        seconds = self.service_seconds.get(route_class, 0.0)
+        if seconds and self.decay_seconds > 0:
+            idle = self.clock() - self.updated.get(route_class, self.clock())
+            seconds *= 0.5 ** (max(0.0, idle) / self.decay_seconds)
+        return seconds
+
+    def estimated_seconds(self, route_class: str) -> float:
+        """Latência prevista para uma nova requisição desta classe"""
+        queued = sum(n * self.service(c) for c, n in self.in_flight_by_class.items())
+        return queued + self.service(route_class)
+
+    def admit(self, route_class: str, budget_seconds: float = None) -> Ticket:
+        """Aceitar (devolve o ticket a liberar no fim) ou levantar Overloaded"""
+        if self.enabled:
+            budget = (self.budget_seconds if budget_seconds is None else budget_seconds) * self.safety
+
+            if self.in_flight >= self.max_in_flight:
+                self.shed[(route_class, "in_flight")] += 1
+                raise Overloaded("limite de requisições em andamento", self._retry_after())
+
+            # Classe ociosa: a sonda passa, senão a média nunca mais seria atualizada
+            estimated = self.estimated_seconds(route_class)
+            if estimated > budget and self.in_flight_by_class[route_class] > 0:
+                self.shed[(route_class, "estimated_wait")] += 1
+                raise Overloaded(f"espera estimada {estimated * 1000:.0f}ms > orçamento {budget * 1000:.0f}ms",
+                                 self._retry_after(), estimated)
+
+        self.in_flight += 1
+        self.in_flight_by_class[route_class] += 1
+        self.accepted[route_class] += 1
+        return Ticket(route_class, self.clock(), self.in_flight)
+
+    def release(self, ticket: Ticket):
+        self.in_flight -= 1
+        self.in_flight_by_class[ticket.route_class] -= 1
+
+        # Tempo de serviço ~ latência / concorrência na entrada (lei de Little)
+        sample = (self.clock() - ticket.start) / max(1, ticket.in_flight)
+        previous = self.service(ticket.route_class) if ticket.route_class in self.service_seconds else None
+        self.service_seconds[ticket.route_class] = (
+            sample if previous is None else (1 - self.alpha) * previous + self.alpha * sample
+        )
+        self.updated[ticket.route_class] = self.clock()
+
+    def _retry_after(self) -> float:
+        """Tempo estimado para esvaziar o que já está em andamento (mínimo 1s)"""
+        drain = sum(n * self.service(c) for c, n in self.in_flight_by_class.items())
+        return max(1.0, drain)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "budget_ms": self.budget_seconds * 1000,
+            "safety": self.safety,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "service_ms": {c: round(self.service(c) * 1000, 4) for c in sorted(self.service_seconds)},
+            "accepted": dict(sorted(self.accepted.items())),
+            "shed": {f"{c}:{reason}": n for (c, reason), n in sorted(self.shed.items())},
+        }
@@ -1,31 +1,116 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from starlette.requests import ClientDisconnect
 from pydantic import BaseModel
 from datetime import datetime
-import joblib
 import json
 import numpy as np
-from typing import Optional
+from typing import List, Optional
+import asyncio
 import logging
+import math
 import os
 from contextlib import asynccontextmanager
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+from admission import AdmissionController, Overloaded
+import arrow_io
+from arrow_io import ARROW_AVAILABLE, ARROW_MAX_ROWS, ARROW_STREAM_MEDIA_TYPE, ArrowInputError
+from async_logging import AccessLog, setup_logging
+from batcher import MICROBATCH_ENABLED, MicroBatcher
+import deadline
+from deadline import DeadlineExceeded, cancel_on_disconnect
+from debug_trace import build_trace, wants_trace
+from encoders import CompiledEncoders
+from fast_json import FlightDecoder, encode_batch, encode_error_line, encode_lines, encode_prediction
+from executor import ExecutorSaturated, InferenceExecutor
+from feature_layouts import FeatureAdapter
+from inference import THRESHOLD_PATH, build_scorer, load_threshold, predict_with_threshold
+from logit_table import build_logit_table
+from memory_report import mapped_files, process_memory
+from ndjson_stream import STREAM_CHUNK_SIZE, STREAM_MAX_CONCURRENT, LineTooLong, NDJSONStreamingResponse, chunked, ndjson_lines
+from model_artifact import ArtifactError, artifact_path, read_artifact, verify_in_background
+from metrics import Metrics, MetricsMiddleware, current_timer, handler_finished, handler_started, stage as timed_stage
+from prediction_cache import ENABLE_CACHING, PredictionCache
+from shadow import SHADOW_MODEL, SHADOW_SAMPLE_RATE, ShadowScorer
+from warmup import WARMUP_FLIGHTS, Warmup, load_flights, synthetic_flights
+from registry import ModelRegistry, ModelSet, ModelVersion, artifacts_digest
+
+# Configurar logging (fila + thread; ASYNC_LOGGING=false volta ao basicConfig síncrono)
+log_pipeline = setup_logging()
 logger = logging.getLogger(__name__)
 
+MODEL_PATH = "model.joblib"
+AIRLINE_ENCODER_PATH = "companhia_encoder.json"
+AIRPORT_PAIR_ENCODER_PATH = "airport_pair_encoder.json"
+
+# Catálogo de modelos servidos (nome → arquivo + layout de features)
+MODEL_CATALOG_PATH = os.getenv("MODEL_CATALOG", "models.json")
+DEFAULT_MODEL = os.getenv("DEFAULT_MODEL")
+
+# joblib: unpickle com sklearn; compact: só os artefatos de model_artifact.py, com NumPy
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", "joblib").lower()
+
+ARTIFACT_PATHS = [MODEL_CATALOG_PATH, MODEL_PATH, AIRLINE_ENCODER_PATH, AIRPORT_PAIR_ENCODER_PATH, THRESHOLD_PATH]
+
+# Token opcional para os endpoints administrativos
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
 # Variáveis globais
-model = None
-airline_encoder = {}
-airport_pair_encoder = {}
-n_features_expected = 6
+batcher = None
+shadow = None
+
+# True quando serve.py já carregou os modelos no master antes do fork
+preloaded = False
+
+# Onde a inferência dos lotes roda (INFERENCE_BACKEND=inline|thread|process)
+inference_executor = InferenceExecutor()
+
+# Admissão: recusa rápida (503) quando a requisição não termina dentro de REQUEST_BUDGET_MS
+admission = AdmissionController()
+
+# Aquecimento do pipeline no startup; /health/ready só fica 200 depois dele
+warmup = Warmup()
+
+# Streams NDJSON em andamento (/predict/stream)
+active_streams = 0
+
+# Limite de voos por requisição no endpoint em lote
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10000"))
 
 # Lifespan manager (substitui @app.on_event)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    await load_model_and_encoders()
+    global batcher, shadow
+    
+    # Startup (com serve.py o master já carregou e aqueceu; o worker herda copy-on-write)
+    if not preloaded:
+        registry.load_initial()
+    registry.start_watching()
+    inference_executor.start()
+    
+    if MICROBATCH_ENABLED:
+        batcher = MicroBatcher(score_micro_batch)
+        await batcher.start()
+    
+    if SHADOW_MODEL:
+        shadow = ShadowScorer(SHADOW_MODEL, score_flight_sync, sample_rate=SHADOW_SAMPLE_RATE)
+        shadow.start()
+    
+    # Repassar voos pelo /predict completo até o p99 estabilizar, antes de aceitar tráfego
+    await warmup.run(app, *warmup_flights())
+    
     yield
+    
     # Shutdown (opcional)
+    await registry.stop()
+    if shadow is not None:
+        shadow.stop()
+        shadow = None
+    if batcher is not None:
+        await batcher.stop()
+        batcher = None
+    inference_executor.shutdown()
     logger.info("Shutting down...")
 
 app = FastAPI(
@@ -35,6 +120,25 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Métricas Prometheus (GET /metrics); o template da rota vira o label "endpoint"
+metrics = Metrics()
+_route_paths = {}
+
+def route_paths() -> dict:
+    if not _route_paths:
+        _route_paths.update({route.endpoint: route.path for route in app.routes if hasattr(route, "endpoint")})
+    return _route_paths
+
+# Access log JSON amostrado por endpoint (ACCESS_LOG_SAMPLING), escrito pela thread de logging
+access_log = AccessLog()
+
+app.add_middleware(MetricsMiddleware, metrics=metrics, route_paths=route_paths, on_complete=access_log)
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded(request: Request, error: DeadlineExceeded):
+    """504: o chamador já desistiu; o trabalho restante foi descartado"""
+    return JSONResponse(status_code=504, content={"detail": str(error), "stage": error.stage})
+
 # Modelo Pydantic para validação
 class FlightRequest(BaseModel):
     companhia_aerea: str
@@ -48,84 +152,322 @@ class PredictionResponse(BaseModel):
     probabilidade: float
     status: str = "success"
     mensagem: Optional[str] = None
+    debug: Optional[dict] = None        # só com X-Debug-Trace (omitido da resposta quando None)
+
+class BatchPredictionResponse(BaseModel):
+    resultados: List[PredictionResponse]
+    total: int
+    status: str = "success"
 
-async def load_model_and_encoders():
-    global model, airline_encoder, airport_pair_encoder, n_features_expected
+# Corpo de /predict e /predict/batch lido por este decoder (FAST_JSON=false: só Pydantic)
+flight_decoder = FlightDecoder(FlightRequest)
+
+def load_catalog() -> dict:
+    """Catálogo de modelos; sem models.json, serve só o model.joblib no layout do app.py"""
+    if os.path.exists(MODEL_CATALOG_PATH):
+        with open(MODEL_CATALOG_PATH, 'r') as f:
+            catalog = json.load(f)
+    else:
+        logger.warning(f"⚠️ {MODEL_CATALOG_PATH} não encontrado, servindo apenas {MODEL_PATH}")
+        catalog = {"default": "padrao", "models": {"padrao": {"path": MODEL_PATH, "layout": "padded6"}}}
     
-    try:
-        # 1. Carregar o modelo
-        model_path = "model.joblib"
-        if not os.path.exists(model_path):
-            raise FileNotFoundError(f"Modelo não encontrado: {model_path}")
+    if DEFAULT_MODEL:
+        catalog["default"] = DEFAULT_MODEL
+    if catalog["default"] not in catalog["models"]:
+        raise ValueError(f"Modelo padrão '{catalog['default']}' não está no catálogo")
+    
+    return catalog
+
+def load_encoders():
+    """Carregar os encoders JSON (dicionário vazio se o arquivo não existir)"""
+    loaded_encoders = {}
+    for filename in (AIRLINE_ENCODER_PATH, AIRPORT_PAIR_ENCODER_PATH):
+        if os.path.exists(filename):
+            with open(filename, 'r') as f:
+                loaded_encoders[filename] = json.load(f)
+            logger.info(f"✅ {filename}: {len(loaded_encoders[filename])} entradas")
+        else:
+            loaded_encoders[filename] = {}
+            logger.warning(f"⚠️ {filename} não encontrado")
+    
+    return loaded_encoders[AIRLINE_ENCODER_PATH], loaded_encoders[AIRPORT_PAIR_ENCODER_PATH]
+
+def model_artifact_paths(name: str, entry: dict, model_format: str) -> list:
+    """Arquivos de que um modelo do catálogo depende (versão, cache e recarga)"""
+    if model_format == "compact":
+        return [artifact_path(name, entry)]
+    return [entry["path"], AIRLINE_ENCODER_PATH, AIRPORT_PAIR_ENCODER_PATH, entry.get("threshold_path", THRESHOLD_PATH)]
+
+def artifact_verify_mode() -> Optional[str]:
+    """Checksums em background só no startup; na recarga (já em thread) antes de trocar a versão"""
+    return None if registry.active is None else "eager"
+
+def read_shared_artifact(path: str, shared_models: dict):
+    """Artefato compacto mapeado uma vez por arquivo a cada carga"""
+    if path not in shared_models:
+        shared_models[path] = read_artifact(path, verify=artifact_verify_mode())
+    return shared_models[path]
+
+def load_compact(name: str, entry: dict, compiled_encoders: CompiledEncoders, airline_encoder: dict,
+                 airport_pair_encoder: dict, shared_models: dict):
+    """(artefato, scorer, n_features, threshold) de um artefato compacto mapeado, sem sklearn"""
+    artifact = read_shared_artifact(artifact_path(name, entry), shared_models)
+    layout = entry.get("layout", "padded6")
+    if artifact.layout != layout or artifact.airline_encoder != airline_encoder \
+            or artifact.airport_pair_encoder != airport_pair_encoder:
+        raise ArtifactError(f"[{name}] artefato desatualizado em relação ao catálogo (exporte de novo)")
+    
+    scorer = artifact.scorer()
+    if FeatureAdapter(layout, artifact.n_features, compiled_encoders).feature_names != artifact.feature_names:
+        raise ArtifactError(f"[{name}] ordem de features do artefato não confere com o layout {layout}")
+    
+    env_threshold = os.getenv("DECISION_THRESHOLD")
+    threshold = float(env_threshold) if env_threshold else artifact.threshold
+    logger.info(f"✅ Artefato compacto mapeado ({artifact.path}, {artifact.mapped_bytes} bytes, "
+                f"exportado em {artifact.exported_at}, checksum {artifact.checksum_status})")
+    return artifact, scorer, artifact.n_features, threshold
+
+def load_model_version(name: str, entry: dict, airline_encoder: dict, airport_pair_encoder: dict,
+                       compiled_encoders: CompiledEncoders, shared_models: dict,
+                       model_format: str = "joblib") -> ModelVersion:
+    """Carregar um modelo do catálogo com o seu layout de features compilado"""
+    model_path = entry["path"]
+    layout = entry.get("layout", "padded6")
+    threshold_path = entry.get("threshold_path", THRESHOLD_PATH)
+    
+    artifact = None
+    if model_format == "compact":
+        artifact, scorer, n_features_expected, decision_threshold = load_compact(
+            name, entry, compiled_encoders, airline_encoder, airport_pair_encoder, shared_models
+        )
+        model = scorer
+    else:
+        # 1. Carregar o modelo (uma vez por arquivo, compartilhado entre entradas do catálogo)
+        if model_path not in shared_models:
+            if not os.path.exists(model_path):
+                raise FileNotFoundError(f"Modelo não encontrado: {model_path}")
+            
+            import joblib     # só aqui: o modo compact não paga o import do joblib/sklearn
+            model = joblib.load(model_path)
+            logger.info(f"✅ Modelo carregado com sucesso! ({model_path})")
+            
+            # Pontuação em NumPy puro (None se o modelo não for logístico binário)
+            shared_models[model_path] = (model, build_scorer(model))
         
-        model = joblib.load(model_path)
-        logger.info(f"✅ Modelo carregado com sucesso!")
+        model, scorer = shared_models[model_path]
         
         # Determinar número de features
+        n_features_expected = 6
         if hasattr(model, 'n_features_in_'):
             n_features_expected = model.n_features_in_
         elif hasattr(model, 'feature_names_in_'):
             n_features_expected = len(model.feature_names_in_)
-            
-        logger.info(f"📐 Features esperadas: {n_features_expected}")
-        
-        # 2. Carregar encoders
-        encoders = [
-            ("companhia_encoder.json", "airline_encoder"),
-            ("airport_pair_encoder.json", "airport_pair_encoder")
-        ]
-        
-        for filename, var_name in encoders:
-            if os.path.exists(filename):
-                with open(filename, 'r') as f:
-                    if var_name == "airline_encoder":
-                        airline_encoder = json.load(f)
-                    else:
-                        airport_pair_encoder = json.load(f)
-                logger.info(f"✅ {filename}: {len(locals()[var_name])} entradas")
-            else:
-                logger.warning(f"⚠️ {filename} não encontrado")
-        
-        logger.info("🚀 API pronta para receber requisições!")
+        
+        # Threshold de decisão ajustado no treinamento
+        decision_threshold = load_threshold(threshold_path)
+    
+    adapter = FeatureAdapter(layout, n_features_expected, compiled_encoders)
+    logger.info(f"📐 [{name}] {n_features_expected} features, layout {layout}: {adapter.feature_names}")
+    
+    # Logits pré-calculados das combinações categóricas (depende dos encoders e do layout)
+    logit_table = build_logit_table(scorer, adapter.categorical_domains(airline_encoder, airport_pair_encoder))
+    
+    # Cache de predições (novo a cada versão do modelo)
+    artifacts = model_artifact_paths(name, entry, model_format)
+    prediction_cache = None
+    if ENABLE_CACHING:
+        prediction_cache = PredictionCache(distance_index=adapter.distance_index, watched_paths=artifacts)
+        logger.info(f"🗃️ [{name}] Cache de predições ativo (até {prediction_cache.max_entries} entradas)")
+    
+    return ModelVersion(
+        version=artifacts_digest(artifacts),
+        name=name,
+        model=model,
+        scorer=scorer,
+        decision_threshold=decision_threshold,
+        n_features_expected=n_features_expected,
+        airline_encoder=airline_encoder,
+        airport_pair_encoder=airport_pair_encoder,
+        encoders=compiled_encoders,
+        adapter=adapter,
+        logit_table=logit_table,
+        cache=prediction_cache,
+        artifact=artifact,
+    )
+
+def load_model_and_encoders(model_format: Optional[str] = None) -> ModelSet:
+    """Carregar todos os modelos do catálogo num novo conjunto (não altera o conjunto ativo)"""
+    model_format = model_format or MODEL_FORMAT
+    try:
+        catalog = load_catalog()
+        
+        # Encoders compartilhados por todos os modelos (no modo compact, os gravados no artefato do padrão)
+        shared_models = {}
+        if model_format == "compact":
+            default_name = catalog["default"]
+            artifact = read_shared_artifact(artifact_path(default_name, catalog["models"][default_name]), shared_models)
+            airline_encoder, airport_pair_encoder = artifact.airline_encoder, artifact.airport_pair_encoder
+            # Tabela de rotas já compilada, usada direto do mmap (compartilhada entre workers)
+            compiled_encoders = CompiledEncoders(airline_encoder, airport_pair_encoder,
+                                                 airports=artifact.airports, route_table=artifact.route_table)
+        else:
+            airline_encoder, airport_pair_encoder = load_encoders()
+            # Tabelas de consulta compiladas (sem montar strings por requisição)
+            compiled_encoders = CompiledEncoders(airline_encoder, airport_pair_encoder)
+        logger.info(f"🗂️ Encoders compilados: {compiled_encoders.stats()}")
+        
+        models = {
+            name: load_model_version(
+                name, entry, airline_encoder, airport_pair_encoder, compiled_encoders, shared_models, model_format
+            )
+            for name, entry in catalog["models"].items()
+        }
+        
+        artifact_paths = [MODEL_CATALOG_PATH]
+        for name, entry in catalog["models"].items():
+            for path in model_artifact_paths(name, entry, model_format):
+                if path not in artifact_paths:
+                    artifact_paths.append(path)
+        
+        model_set = ModelSet(
+            version=artifacts_digest(artifact_paths),
+            models=models,
+            default=catalog["default"],
+            artifact_paths=artifact_paths,
+        )
+        if model_format == "compact":
+            verify_in_background({id(current.artifact): current.artifact for current in models.values()}.values())
+        logger.info(f"🚀 API pronta: {len(models)} modelo(s), padrão '{model_set.default}' (versão {model_set.version}, formato {model_format})")
+        return model_set
         
     except Exception as e:
         logger.error(f"❌ Erro ao carregar recursos: {e}", exc_info=True)
         raise
 
+def warm_up_version(model_set: ModelSet):
+    """Passar um voo sintético por cada modelo do conjunto novo antes de ele receber tráfego"""
+    flight = FlightRequest(
+        companhia_aerea="LATAM",
+        aeroporto_origem="GRU",
+        aeroporto_destino="SCL",
+        data_hora_partida=datetime(2024, 1, 15, 14, 30),
+        distancia_km=2600.0
+    )
+    for current in model_set.models.values():
+        features = prepare_features(flight, current)
+        score_matrix(np.array([features], dtype=np.float64), current)
+        score_matrix(prepare_features_batch([flight, flight], current), current)
+
+registry = ModelRegistry(load_model_and_encoders, ARTIFACT_PATHS, warmup=warm_up_version)
+
+def warmup_flights():
+    """(voos, origem) do aquecimento do startup: arquivo WARMUP_FLIGHTS ou sintéticos dos encoders"""
+    if WARMUP_FLIGHTS:
+        return load_flights(WARMUP_FLIGHTS), WARMUP_FLIGHTS
+    current = registry.active.get()
+    return synthetic_flights(current.airline_encoder, current.airport_pair_encoder), "sintético"
+
 @app.get("/")
 async def root():
+    model_set = registry.active
     return {
         "message": "Flight Delay Prediction API",
-        "status": "operational" if model else "loading",
-        "model_loaded": model is not None,
-        "features_expected": n_features_expected,
+        "status": "operational" if model_set else "loading",
+        "model_loaded": model_set is not None,
+        "model_version": model_set.version if model_set else None,
+        "default_model": model_set.default if model_set else None,
+        "models": sorted(model_set.models) if model_set else [],
+        "features_expected": model_set.get().n_features_expected if model_set else None,
         "endpoints": {
             "health": "GET /health",
-            "predict": "POST /predict",
+            "liveness": "GET /health/live",
+            "readiness": "GET /health/ready",
+            "predict": "POST /predict (headers X-Model e X-Debug-Trace opcionais)",
+            "predict_batch": "POST /predict/batch (header X-Model opcional)",
+            "predict_model": "POST /models/{nome}/predict",
+            "predict_model_batch": "POST /models/{nome}/predict/batch",
+            "predict_stream": "POST /predict/stream (NDJSON, header X-Model opcional)",
+            "predict_arrow": "POST /predict/arrow (Arrow IPC stream, header X-Model opcional)",
+            "models": "GET /models",
+            "shadow": "GET /shadow",
+            "metrics": "GET /metrics",
             "model_info": "GET /model-info",
             "encoders": "GET /encoders",
+            "reload": "POST /admin/reload",
             "docs": "GET /docs"
         }
     }
 
 @app.get("/health")
 async def health_check():
+    model_set = registry.active
+    corrupted = model_set.corrupted() if model_set else []
     return {
-        "status": "healthy" if model else "unhealthy",
-        "model_loaded": model is not None,
-        "features_expected": n_features_expected,
+        "status": "healthy" if model_set and not corrupted else "unhealthy",
+        "model_loaded": model_set is not None,
+        "ready": model_set is not None and warmup.ready and not corrupted,
+        "model_version": model_set.version if model_set else None,
+        "features_expected": model_set.get().n_features_expected if model_set else None,
         "timestamp": datetime.now().isoformat()
     }
 
-@app.get("/model-info")
-async def model_info():
-    if not model:
+@app.get("/health/live")
+async def liveness():
+    """Liveness: o processo responde (não olha modelo nem aquecimento)"""
+    return {"status": "alive", "pid": os.getpid()}
+
+@app.get("/health/ready")
+async def readiness():
+    """Readiness: modelo carregado, checksums conferidos e aquecimento concluído com p99 estável; 503 até lá"""
+    model_set = registry.active
+    corrupted = model_set.corrupted() if model_set else []
+    ready = model_set is not None and warmup.ready and not corrupted
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "model_loaded": model_set is not None,
+            "model_version": model_set.version if model_set else None,
+            "corrupted_artifacts": corrupted,
+            "warmup": warmup.stats(),
+        }
+    )
+
+def resolve_model(model_name: Optional[str] = None) -> ModelVersion:
+    """Modelo pedido (ou o padrão) do conjunto ativo; 503 sem modelo, 404 se o nome não existir"""
+    model_set = registry.active
+    if not model_set:
         raise HTTPException(503, "Modelo não carregado")
     
+    try:
+        return model_set.get(model_name)
+    except KeyError:
+        raise HTTPException(404, f"Modelo '{model_name}' não encontrado (disponíveis: {sorted(model_set.models)})")
+
+def serving_model(model_name: Optional[str] = None) -> ModelVersion:
+    """resolve_model para pontuar: 503 se a verificação em background achou um artefato corrompido"""
+    # Volta a servir quando o arquivo é corrigido: o watcher recarrega e a recarga confere antes de trocar
+    current = resolve_model(model_name)
+    corrupted = registry.active.corrupted()
+    if corrupted:
+        raise HTTPException(503, f"Artefato do modelo corrompido (checksum não confere): {corrupted}")
+    return current
+
+def describe_model(current: ModelVersion) -> dict:
+    model = current.model
     info = {
+        "name": current.name,
         "type": str(type(model)),
-        "n_features_expected": n_features_expected,
+        "version": current.version,
+        "layout": current.adapter.layout,
+        "feature_layout": current.adapter.feature_names,
+        "n_features_expected": current.n_features_expected,
         "has_predict_proba": hasattr(model, 'predict_proba'),
+        "decision_threshold": current.decision_threshold,
+        "native_scorer": current.scorer is not None,
+        "logit_table": current.logit_table.stats() if current.logit_table is not None else {"enabled": False},
+        "cache": current.cache.stats() if current.cache is not None else {"enabled": False},
+        "artifact": current.artifact.stats() if current.artifact is not None else {"mapped": False},
     }
     
     if hasattr(model, 'feature_names_in_'):
@@ -133,102 +475,497 @@ async def model_info():
     
     return info
 
+@app.get("/model-info")
+async def model_info(x_model: Optional[str] = Header(None)):
+    current = resolve_model(x_model)
+    model_set = registry.active
+    
+    return {
+        **describe_model(current),
+        "version": model_set.version,
+        "model_version": current.version,
+        "loaded_at": model_set.loaded_at,
+        "load_seconds": round(model_set.load_seconds, 4),
+        "models": sorted(model_set.models),
+        "default_model": model_set.default,
+        "micro_batching": batcher.stats() if batcher is not None else {"enabled": False},
+        "registry": registry.stats(),
+        "json_codec": flight_decoder.stats(),
+        "executor": inference_executor.stats(),
+        "admission": admission.stats(),
+        "process": {"pid": os.getpid(), "preloaded": preloaded, **process_memory(),
+                    "mapped_artifacts_kb": mapped_files(mapped_artifact_paths())},
+    }
+
+def mapped_artifact_paths() -> list:
+    """Artefatos compactos mapeados pelo conjunto ativo (vazio no formato joblib)"""
+    model_set = registry.active
+    if not model_set:
+        return []
+    return sorted({current.artifact.path for current in model_set.models.values() if current.artifact is not None})
+
+@app.get("/models")
+async def list_models():
+    model_set = registry.active
+    if not model_set:
+        raise HTTPException(503, "Modelo não carregado")
+    
+    return {
+        "default": model_set.default,
+        "version": model_set.version,
+        "models": {name: describe_model(current) for name, current in model_set.models.items()}
+    }
+
+@app.get("/models/{model_name}")
+async def get_model(model_name: str):
+    return describe_model(resolve_model(model_name))
+
+@app.get("/shadow")
+async def shadow_stats():
+    """Comparação do modelo desafiante com o principal (shadow scoring)"""
+    return shadow.stats() if shadow is not None else {"enabled": False}
+
+@app.get("/metrics")
+async def get_metrics(request: Request):
+    """Formato texto do Prometheus; JSON resumido se o cliente pedir application/json"""
+    if "application/json" in request.headers.get("accept", ""):
+        return metrics.summary()
+    
+    gauges = {
+        "api_inference_in_flight": ("Trabalhos de inferência no pool", inference_executor.in_flight),
+        "api_inference_queue_depth": ("Trabalhos de inferência esperando um worker", inference_executor.queue_depth),
+        "api_inference_rejected": ("Trabalhos recusados com o pool saturado (503)", inference_executor.rejected),
+    }
+    if batcher is not None:
+        gauges["api_microbatch_queue_depth"] = ("Itens esperando no micro-batcher", batcher.stats()["queue_depth"])
+        gauges["api_microbatch_rejected"] = ("Predições recusadas com a fila do micro-batcher cheia (503)",
+                                             batcher.rejected)
+    if log_pipeline is not None:
+        gauges["api_log_queue_depth"] = ("Registros de log esperando a thread de escrita", log_pipeline.queue.qsize())
+        gauges["api_log_dropped_records"] = ("Registros de log descartados com a fila cheia", log_pipeline.dropped)
+    if shadow is not None:
+        gauges["api_shadow_queue_depth"] = ("Itens esperando o modelo desafiante", shadow.stats()["queue_depth"])
+    
+    gauges["api_admission_in_flight"] = ("Requisições de predição admitidas em andamento", admission.in_flight)
+    gauges["api_stream_active"] = ("Streams NDJSON (/predict/stream) em andamento", active_streams)
+    counters = {
+        "api_admission_accepted_total": ("Requisições de predição aceitas pelo controle de admissão",
+                                         [({"class": c}, n) for c, n in sorted(admission.accepted.items())]),
+        "api_admission_shed_total": ("Requisições recusadas com 503 (carga acima do orçamento)",
+                                     [({"class": c, "reason": r}, n) for (c, r), n in sorted(admission.shed.items())]),
+        "api_deadline_dropped_total": ("Trabalho descartado porque o deadline do chamador já tinha passado",
+                                       [({"stage": s}, n) for s, n in sorted(deadline.dropped.items())]),
+        "api_client_disconnects_total": ("Lotes cancelados porque o cliente desconectou",
+                                         [({}, deadline.disconnects)]),
+    }
+    
+    return PlainTextResponse(
+        metrics.render(registry.active, gauges, counters),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
 @app.get("/encoders")
 async def get_encoders():
+    current = resolve_model()
     return {
-        "airline_encoder": airline_encoder,
-        "airport_pair_encoder": airport_pair_encoder
+        "airline_encoder": current.airline_encoder,
+        "airport_pair_encoder": current.airport_pair_encoder
     }
 
-@app.post("/predict", response_model=PredictionResponse)
-async def predict(flight: FlightRequest):
+@app.post("/admin/reload")
+async def admin_reload(x_admin_token: Optional[str] = Header(None)):
+    """Recarregar modelos e encoders sem derrubar o servidor"""
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(403, "Token administrativo inválido")
+    
     try:
-        logger.info(f"📥 Recebida requisição: {flight.companhia_aerea} de {flight.aeroporto_origem}")
-        
-        if not model:
-            raise HTTPException(503, "Modelo não carregado")
+        model_set = await registry.reload(reason="chamada administrativa")
+    except Exception as e:
+        raise HTTPException(500, f"Falha ao recarregar (versão anterior mantida): {e}")
+    
+    return {"status": "reloaded", **model_set.summary(), "registry": registry.stats()}
+
+def json_body(schema: dict) -> dict:
+    """Documenta no OpenAPI o corpo lido direto pelo codec rápido"""
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
+
+FLIGHT_SCHEMA = FlightRequest.model_json_schema()
+FLIGHT_BODY = json_body(FLIGHT_SCHEMA)
+FLIGHT_LIST_BODY = json_body({"type": "array", "items": FLIGHT_SCHEMA})
+
+def encode_single(response: PredictionResponse):
+    """Bytes prontos pelo codec rápido; com trace de debug, serialização normal do FastAPI"""
+    if flight_decoder.enabled and response.debug is None:
+        return Response(encode_prediction(response), media_type="application/json")
+    return response
+
+def encode_many(atrasos: list, probabilities: list):
+    mensagens = [build_message(atraso, probability) for atraso, probability in zip(atrasos, probabilities)]
+    if flight_decoder.enabled:
+        return Response(encode_batch(atrasos, probabilities, mensagens), media_type="application/json")
+    return BatchPredictionResponse(
+        resultados=[
+            PredictionResponse(atraso=atraso, probabilidade=probability, status="success", mensagem=mensagem)
+            for atraso, probability, mensagem in zip(atrasos, probabilities, mensagens)
+        ],
+        total=len(mensagens)
+    )
+
+def admission_for(route_class: str):
+    """
+    Dependência que registra o deadline do chamador, admite (ou recusa com 503)
+    e libera o ticket ao fim da requisição
+    """
+    async def admit(request: Request):
+        token = deadline.set_deadline(deadline.parse_deadline(request.headers))
+        try:
+            if request.scope.get("warmup"):
+                # Aquecimento: fora das contagens e da média de tempo de serviço
+                yield None
+                return
+            deadline.check("admission")
+            try:
+                ticket = admission.admit(route_class, budget_seconds=deadline.remaining())
+            except Overloaded as e:
+                raise saturated(e)
+            try:
+                yield ticket
+            finally:
+                admission.release(ticket)
+        finally:
+            deadline.reset_deadline(token)
+    return admit
+
+SINGLE_ADMISSION = [Depends(admission_for("predict"))]
+BATCH_ADMISSION = [Depends(admission_for("batch"))]
+
+async def stream_slot(request: Request):
+    """Vaga de stream (503 acima de STREAM_MAX_CONCURRENT) e deadline do chamador, até o fim da resposta"""
+    global active_streams
+    if active_streams >= STREAM_MAX_CONCURRENT:
+        raise HTTPException(503, f"Limite de {STREAM_MAX_CONCURRENT} streams simultâneos", headers={"Retry-After": "5"})
+    token = deadline.set_deadline(deadline.parse_deadline(request.headers))
+    active_streams += 1
+    try:
+        yield
+    finally:
+        active_streams -= 1
+        deadline.reset_deadline(token)
+
+@app.post("/predict", response_model=PredictionResponse, response_model_exclude_none=True, openapi_extra=FLIGHT_BODY,
+          dependencies=SINGLE_ADMISSION)
+async def predict(request: Request, x_model: Optional[str] = Header(None),
+                  x_debug_trace: Optional[str] = Header(None)):
+    flight = flight_decoder.decode(await request.body())
+    return encode_single(await predict_flight(flight, x_model, trace=wants_trace(x_debug_trace),
+                                              shadowed=not request.scope.get("warmup")))
+
+@app.post("/models/{model_name}/predict", response_model=PredictionResponse, response_model_exclude_none=True,
+          openapi_extra=FLIGHT_BODY, dependencies=SINGLE_ADMISSION)
+async def predict_with_model(model_name: str, request: Request, x_debug_trace: Optional[str] = Header(None)):
+    flight = flight_decoder.decode(await request.body())
+    return encode_single(await predict_flight(flight, model_name, trace=wants_trace(x_debug_trace),
+                                              shadowed=not request.scope.get("warmup")))
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse, response_model_exclude_none=True,
+          openapi_extra=FLIGHT_LIST_BODY, dependencies=BATCH_ADMISSION)
+async def predict_batch(request: Request, x_model: Optional[str] = Header(None)):
+    """Prever vários voos com uma única chamada ao modelo"""
+    flights = flight_decoder.decode_list(await request.body())
+    return encode_many(*await cancel_on_disconnect(request, score_flights(flights, x_model)))
+
+@app.post("/models/{model_name}/predict/batch", response_model=BatchPredictionResponse, response_model_exclude_none=True,
+          openapi_extra=FLIGHT_LIST_BODY, dependencies=BATCH_ADMISSION)
+async def predict_batch_with_model(model_name: str, request: Request):
+    flights = flight_decoder.decode_list(await request.body())
+    return encode_many(*await cancel_on_disconnect(request, score_flights(flights, model_name)))
+
+@app.post("/predict/arrow", response_class=Response, dependencies=BATCH_ADMISSION,
+          openapi_extra={"requestBody": {"required": True, "content": {ARROW_STREAM_MEDIA_TYPE: {}}}})
+async def predict_arrow(request: Request, x_model: Optional[str] = Header(None)):
+    """Arrow IPC stream com as colunas do FlightRequest → Arrow IPC stream (atraso, probabilidade)"""
+    body = await cancel_on_disconnect(request, score_arrow(await request.body(), x_model))
+    return Response(body, media_type=ARROW_STREAM_MEDIA_TYPE)
+
+@app.post("/predict/stream", response_class=NDJSONStreamingResponse, dependencies=[Depends(stream_slot)],
+          openapi_extra={"requestBody": {"required": True, "content": {"application/x-ndjson": {"schema": FLIGHT_SCHEMA}}}})
+async def predict_stream(request: Request, x_model: Optional[str] = Header(None)):
+    """NDJSON em streaming: um voo por linha na entrada, uma predição por linha (mesma ordem) na saída"""
+    current = serving_model(x_model)      # a mesma versão do começo ao fim do stream
+    handler_started(current.name, current.version)
+    return NDJSONStreamingResponse(stream_predictions(request, current))
+
+async def stream_predictions(request: Request, current: ModelVersion):
+    """Pontuar o corpo conforme chega, um bloco de STREAM_CHUNK_SIZE linhas por vez"""
+    try:
+        async for chunk in chunked(ndjson_lines(request.stream()), STREAM_CHUNK_SIZE):
+            yield await score_stream_chunk(chunk, current)
+    except (LineTooLong, DeadlineExceeded) as e:
+        yield encode_error_line(str(e))
+    except ClientDisconnect:
+        deadline.disconnects += 1
+        logger.info("🔌 Cliente desconectou no meio do stream")
+    finally:
+        handler_finished()
+
+async def score_stream_chunk(chunk: list, current: ModelVersion) -> bytes:
+    """NDJSON de um bloco de linhas: predições vetorizadas e erros de validação no lugar de cada linha"""
+    flights, errors = [], []
+    for line_number, line in chunk:
+        try:
+            flights.append(flight_decoder.decode(line))
+            errors.append(None)
+        except RequestValidationError as e:
+            error = e.errors()[0]
+            errors.append(encode_error_line(f"{'.'.join(map(str, error['loc'][1:])) or 'json'}: {error['msg']}", line_number))
+    
+    if not flights:
+        return b"".join(errors)
+    
+    deadline.check("prepare_features")
+    features_matrix = prepare_features_batch(flights, current)
+    deadline.check("inference")
+    while True:
+        try:
+            predictions, probabilities = await inference_executor.run(
+                predict_with_threshold, current.scorer or current.model, features_matrix,
+                current.decision_threshold, rows=len(flights), deadline=deadline.current_deadline(),
+                heavy=current.scorer is None
+            )
+            break
+        except ExecutorSaturated as e:
+            # Pool cheio com tráfego ao vivo: o stream espera a vez em vez de falhar
+            await asyncio.sleep(min(e.retry_after, 1.0))
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Erro no modelo (stream): {e}")
+            metrics.record_model_error(current.name)
+            failed = encode_error_line(f"Erro no modelo: {e}")
+            return b"".join(error or failed for error in errors)
+    
+    atrasos = np.asarray(predictions, dtype=bool).tolist()
+    probabilities = np.asarray(probabilities, dtype=np.float64).tolist()
+    mensagens = [build_message(atraso, probability) for atraso, probability in zip(atrasos, probabilities)]
+    if not any(errors):
+        return encode_lines(atrasos, probabilities, mensagens)
+    
+    # Linhas inválidas no meio: intercalar na ordem de entrada
+    lines = iter(encode_lines(atrasos, probabilities, mensagens).splitlines(keepends=True))
+    return b"".join(error or next(lines) for error in errors)
+
+async def predict_flight(flight: FlightRequest, model_name: Optional[str] = None, trace: bool = False,
+                         shadowed: bool = True) -> PredictionResponse:
+    try:
+        logger.debug("📥 Recebida requisição: %s de %s", flight.companhia_aerea, flight.aeroporto_origem)
         
-        # Preparar features
-        features = prepare_features(flight)
+        # Uma única leitura: a requisição inteira usa a mesma versão
+        model_set = registry.active
+        current = serving_model(model_name)
+        handler_started(current.name, current.version)
         
-        # Ajustar número de features se necessário
-        if len(features) != n_features_expected:
-            logger.warning(f"⚠️ Features: {len(features)}, Esperado: {n_features_expected}")
-            if len(features) < n_features_expected:
-                features.extend([0] * (n_features_expected - len(features)))
-            else:
-                features = features[:n_features_expected]
+        # Preparar features (já no layout e tamanho do modelo)
+        deadline.check("prepare_features")
+        with timed_stage("prepare_features"):
+            features = prepare_features(flight, current)
         
         # Fazer predição
-        features_array = np.array([features], dtype=np.float32)
-        
+        deadline.check("inference")
         try:
-            prediction = model.predict(features_array)[0]
-            
-            if hasattr(model, 'predict_proba'):
-                proba = model.predict_proba(features_array)[0]
-                if len(proba) == 2:
-                    probability = float(proba[1])
-                else:
-                    probability = 0.8 if prediction == 1 else 0.2
-            else:
-                probability = 0.8 if prediction == 1 else 0.2
+            with timed_stage("inference"):
+                prediction, probability = await score_features(features, current)
             
+        except ExecutorSaturated as e:
+            raise saturated(e)
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"❌ Erro no modelo: {e}")
-            # Fallback
+            metrics.record_model_error(current.name)
+            # Fallback (não vai para o shadow: compararia o desafiante com o valor fixo)
             prediction = 0
             probability = 0.3
+            shadowed = False
+        
+        # Desafiante pontua depois, numa thread, se esta requisição for amostrada (aquecimento não entra)
+        if shadowed and shadow is not None and current.name != shadow.challenger:
+            try:
+                shadow.offer(flight, (prediction, probability), model_set)
+            except Exception as e:
+                logger.warning(f"⚠️ Shadow ignorado: {e}")
         
         atraso = bool(prediction)
-        logger.info(f"📤 Resultado: Atraso={atraso}, Prob={probability:.1%}")
+        logger.debug("📤 Resultado: Atraso=%s, Prob=%.1f%%", atraso, probability * 100)
         
-        return PredictionResponse(
+        response = PredictionResponse(
             atraso=atraso,
             probabilidade=probability,
             status="success",
-            mensagem=f"Predição: {'Atraso' if atraso else 'Pontual'} ({probability:.1%})"
+            mensagem=build_message(atraso, probability)
         )
+        if trace:
+            response.debug = build_trace(flight, current, features, atraso, probability, current_timer())
+        handler_finished()
+        return response
+        
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as e:
+        logger.error(f"❌ Erro: {e}", exc_info=True)
+        raise HTTPException(500, f"Erro interno: {str(e)}")
+
+async def score_flights(flights: List[FlightRequest], model_name: Optional[str] = None):
+    """(atrasos, probabilidades) de um lote, como listas Python, com uma única chamada ao modelo"""
+    try:
+        logger.debug("📦 Recebido lote com %d voos", len(flights))
+        
+        current = serving_model(model_name)
+        handler_started(current.name, current.version)
+        
+        if len(flights) > MAX_BATCH_SIZE:
+            raise HTTPException(413, f"Lote muito grande: {len(flights)} > {MAX_BATCH_SIZE}")
+        
+        if not flights:
+            handler_finished()
+            return [], []
+        
+        # Montar a matriz de features (uma linha por voo)
+        deadline.check("prepare_features")
+        with timed_stage("prepare_features"):
+            features_matrix = prepare_features_batch(flights, current)
         
-    except HTTPException:
+        predictions, probabilities = await infer_batch(features_matrix, current)
+        atrasos = predictions.tolist()
+        probabilities = probabilities.tolist()
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📤 Lote processado: %d voos, %d com atraso", len(atrasos), sum(atrasos))
+        
+        handler_finished()
+        return atrasos, probabilities
+        
+    except (HTTPException, DeadlineExceeded):
         raise
     except Exception as e:
         logger.error(f"❌ Erro: {e}", exc_info=True)
         raise HTTPException(500, f"Erro interno: {str(e)}")
 
-def prepare_features(flight: FlightRequest) -> list:
-    """Preparar features baseado nos encoders"""
-    features = []
+async def infer_batch(features_matrix: np.ndarray, current: ModelVersion):
+    """(atrasos, probabilidades) de uma matriz de features, como arrays NumPy, pelo executor de inferência"""
+    deadline.check("inference")
+    try:
+        with timed_stage("inference"):
+            predictions, probabilities = await inference_executor.run(
+                predict_with_threshold, current.scorer or current.model, features_matrix,
+                current.decision_threshold, rows=len(features_matrix), deadline=deadline.current_deadline(),
+                heavy=current.scorer is None
+            )
     
-    # 1. TURNO (0=Manhã, 1=Tarde/Noite)
-    hora = flight.data_hora_partida.hour
-    turno = 0 if hora < 12 else 1
-    features.append(turno)
+    except ExecutorSaturated as e:
+        raise saturated(e)
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Erro no modelo: {e}")
+        metrics.record_model_error(current.name)
+        # Fallback (mesmo comportamento do /predict)
+        predictions = np.zeros(len(features_matrix), dtype=bool)
+        probabilities = np.full(len(features_matrix), 0.3)
     
-    # 2. COMPANHIA AÉREA
-    companhia = flight.companhia_aerea.upper()
-    codigo_companhia = airline_encoder.get(companhia, airline_encoder.get("UNKNOWN", 0))
-    features.append(codigo_companhia)
+    return np.asarray(predictions, dtype=bool), np.asarray(probabilities, dtype=np.float64)
+
+async def score_arrow(body: bytes, model_name: Optional[str] = None) -> bytes:
+    """Arrow IPC de entrada → Arrow IPC (atraso, probabilidade), sem objetos Python por linha"""
+    if not ARROW_AVAILABLE:
+        raise HTTPException(501, "Entrada Arrow indisponível: pyarrow não instalado")
     
-    # 3. PAR DE AEROPORTOS
-    rota = f"{flight.aeroporto_origem.upper()}-{flight.aeroporto_destino.upper()}"
-    codigo_rota = airport_pair_encoder.get(rota, airport_pair_encoder.get("UNKNOWN", 0))
-    features.append(codigo_rota)
+    current = serving_model(model_name)
+    handler_started(current.name, current.version)
+    try:
+        table = arrow_io.read_table(body)
+        if table.num_rows > ARROW_MAX_ROWS:
+            raise HTTPException(413, f"Lote muito grande: {table.num_rows} > {ARROW_MAX_ROWS}")
+        if not table.num_rows:
+            handler_finished()
+            return arrow_io.write_predictions(np.zeros(0, dtype=bool), np.zeros(0))
+        
+        deadline.check("prepare_features")
+        with timed_stage("prepare_features"):
+            dtype = current.scorer.dtype if current.scorer is not None else np.float32
+            features_matrix = current.adapter.matrix_from_columns(
+                arrow_io.arrow_columns(table), table.num_rows, dtype=dtype
+            )
+    except ArrowInputError as e:
+        raise HTTPException(422, str(e))
     
-    # 4. DISTÂNCIA (normalizada 0-1)
-    distancia = float(flight.distancia_km)
-    distancia_norm = min(distancia / 10000.0, 1.0)
-    features.append(distancia_norm)
+    predictions, probabilities = await infer_batch(features_matrix, current)
+    handler_finished()
+    return arrow_io.write_predictions(predictions, probabilities)
+
+async def score_features(features: list, current: ModelVersion):
+    """(atraso, probabilidade) de um voo: cache → tabela de logits → micro-batch → scorer NumPy → sklearn"""
+    cache = current.cache
+    if cache is not None:
+        features = cache.quantize(features)
+        cached = cache.get(features)
+        if cached is not None:
+            return cached
     
-    # 5. DIA DA SEMANA (0-6)
-    dia_semana = flight.data_hora_partida.weekday()
-    features.append(dia_semana)
+    # Tabela de logits primeiro; valores fora da tabela caem no scorer/sklearn
+    result = None
+    if current.logit_table is not None:
+        result = current.logit_table.predict_one(features, current.decision_threshold)
     
-    # 6. MÊS (1-12)
-    mes = flight.data_hora_partida.month
-    features.append(mes)
+    if result is None:
+        if batcher is not None:
+            result = await batcher.submit(features, current, deadline=deadline.current_deadline())
+        elif current.scorer is not None:
+            result = current.scorer.predict_one(features, current.decision_threshold)
+        else:
+            features_array = np.array([features], dtype=np.float32)
+            predictions, probabilities = await inference_executor.run(
+                predict_with_threshold, current.model, features_array, current.decision_threshold,
+                deadline=deadline.current_deadline(), heavy=True
+            )
+            result = (bool(predictions[0]), float(probabilities[0]))
     
-    return features
+    if cache is not None:
+        cache.put(features, result)
+    
+    return result
+
+def saturated(error) -> HTTPException:
+    """503 com Retry-After (pool de inferência saturado ou requisição recusada na admissão)"""
+    return HTTPException(503, str(error), headers={"Retry-After": str(math.ceil(error.retry_after))})
+
+async def score_micro_batch(features_matrix: np.ndarray, current: ModelVersion):
+    """Lote do micro-batcher pelo executor de inferência (mesma regra de offload dos lotes)"""
+    return await inference_executor.run(
+        predict_with_threshold, current.scorer or current.model, features_matrix,
+        current.decision_threshold, rows=len(features_matrix), heavy=current.scorer is None
+    )
+
+def score_matrix(features_matrix: np.ndarray, current: ModelVersion):
+    """(rótulos, probabilidades) de uma matriz de features com a versão informada"""
+    return predict_with_threshold(current.scorer or current.model, features_matrix, current.decision_threshold)
+
+def score_flight_sync(flight: FlightRequest, current: ModelVersion):
+    """(atraso, probabilidade) de um voo sem passar por cache/micro-batch (usado pelo shadow)"""
+    predictions, probabilities = score_matrix(np.array([prepare_features(flight, current)], dtype=np.float64), current)
+    return bool(predictions[0]), float(probabilities[0])
+
+def build_message(atraso: bool, probability: float) -> str:
+    """Mensagem amigável da predição"""
+    return f"Predição: {'Atraso' if atraso else 'Pontual'} ({probability:.1%})"
+
+def prepare_features(flight: FlightRequest, current: ModelVersion) -> list:
+    """Preparar features no layout do modelo (cortadas/completadas até n_features_expected)"""
+    return current.adapter.row(flight)
+
+def prepare_features_batch(flights: List[FlightRequest], current: ModelVersion) -> np.ndarray:
+    """Versão vetorizada de prepare_features (uma linha por voo)"""
+    dtype = current.scorer.dtype if current.scorer is not None else np.float32
+    return current.adapter.matrix(flights, dtype=dtype)
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,5 +1,7 @@
+# Variante legada: o app.py serve este mesmo layout como o modelo "hora" de models.json
+# (POST /models/hora/predict ou header X-Model: hora), no mesmo processo dos demais.
 from datetime import datetime
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
 from pydantic import BaseModel
 from datetime import datetime
 import joblib
@@ -10,6 +12,11 @@ import logging
 import os
 from contextlib import asynccontextmanager
 
+from debug_trace import wants_trace
+from encoders import CompiledEncoders
+from feature_layouts import LAYOUTS, FeatureAdapter
+from inference import load_threshold, predict_with_threshold
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,6 +25,8 @@ logger = logging.getLogger(__name__)
 model = None
 airline_encoder = {}
 airport_pair_encoder = {}
+decision_threshold = 0.5
+adapter = None
 
 # Lifespan manager
 @asynccontextmanager
@@ -49,7 +58,7 @@ class PredictionResponse(BaseModel):
     features_explicadas: Optional[dict] = None
 
 async def load_model_and_encoders():
-    global model, airline_encoder, airport_pair_encoder
+    global model, airline_encoder, airport_pair_encoder, decision_threshold, adapter
     
     try:
         # 1. Carregar o modelo
@@ -57,6 +66,9 @@ async def load_model_and_encoders():
         logger.info(f"✅ Modelo carregado: {type(model)}")
         logger.info(f"📐 Features esperadas: {model.n_features_in_}")
         
+        # Threshold de decisão ajustado no treinamento
+        decision_threshold = load_threshold()
+        
         # 2. Carregar encoders
         with open('companhia_encoder.json', 'r') as f:
             airline_encoder = json.load(f)
@@ -65,6 +77,9 @@ async def load_model_and_encoders():
             airport_pair_encoder = json.load(f)
         
         logger.info(f"📊 Encoders: {len(airline_encoder)} companhias, {len(airport_pair_encoder)} rotas")
+        
+        # Mesmo pipeline de features do app.py e do treino (layout hour7, sempre as 7)
+        adapter = FeatureAdapter("hour7", len(LAYOUTS["hour7"]), CompiledEncoders(airline_encoder, airport_pair_encoder))
         logger.info("🚀 API pronta para receber requisições!")
         
     except Exception as e:
@@ -106,6 +121,7 @@ async def model_info():
         "type": str(type(model)),
         "n_features_in": model.n_features_in_,
         "has_predict_proba": hasattr(model, 'predict_proba'),
+        "decision_threshold": decision_threshold,
         "classes": model.classes_.tolist(),
         "coeficientes": model.coef_[0].tolist() if hasattr(model, 'coef_') else None,
         "intercept": model.intercept_[0].tolist() if hasattr(model, 'intercept_') else None
@@ -113,29 +129,8 @@ async def model_info():
     
     return info
 
-@app.post("/debug-features")
-async def debug_features(flight: FlightRequest):
-    """Endpoint para debug - mostra as features calculadas"""
-    features = prepare_features(flight)
-    
-    return {
-        "features": features,
-        "features_named": {
-            "turno_operacional": features[0],
-            "companhia_aerea_encoded": features[1],
-            "airport_pair_encoded": features[2],
-            "distancia_normalizada": features[3],
-            "dia_da_semana": features[4],
-            "mes": features[5],
-            "hora_do_dia": features[6]
-        },
-        "input_data": flight.dict(),
-        "airline_encoded": airline_encoder.get(flight.companhia_aerea.upper(), "UNKNOWN"),
-        "airport_pair": f"{flight.aeroporto_origem.upper()}-{flight.aeroporto_destino.upper()}"
-    }
-
-@app.post("/predict", response_model=PredictionResponse)
-async def predict(flight: FlightRequest):
+@app.post("/predict", response_model=PredictionResponse, response_model_exclude_none=True)
+async def predict(flight: FlightRequest, x_debug_trace: Optional[str] = Header(None)):
     try:
         logger.info(f"📥 Recebida requisição: {flight.companhia_aerea} {flight.aeroporto_origem}->{flight.aeroporto_destino}")
         
@@ -150,19 +145,15 @@ async def predict(flight: FlightRequest):
             logger.error(f"❌ Features: {len(features)}, Esperado: {model.n_features_in_}")
             raise HTTPException(500, f"Número de features incorreto: {len(features)} != {model.n_features_in_}")
         
-        logger.info(f"🔧 Features: {features}")
+        logger.debug("🔧 Features: %s", features)
         
         # Fazer predição
         features_array = np.array([features], dtype=np.float32)
         
         try:
-            prediction = model.predict(features_array)[0]
-            
-            if hasattr(model, 'predict_proba'):
-                proba = model.predict_proba(features_array)[0]
-                probability = float(proba[1])  # Probabilidade de atraso
-            else:
-                probability = 0.8 if prediction == 1 else 0.2
+            predictions, probabilities = predict_with_threshold(model, features_array, decision_threshold)
+            prediction = predictions[0]
+            probability = float(probabilities[0])  # Probabilidade de atraso
             
         except Exception as e:
             logger.error(f"❌ Erro no modelo: {e}")
@@ -171,16 +162,18 @@ async def predict(flight: FlightRequest):
         atraso = bool(prediction)
         logger.info(f"📤 Resultado: Atraso={atraso}, Prob={probability:.1%}")
         
-        # Explicação das features
-        features_explained = {
-            "turno_operacional": "Manhã" if features[0] == 0 else "Tarde/Noite",
-            "companhia_aerea": f"{flight.companhia_aerea} (código: {features[1]})",
-            "rota_aerea": f"{flight.aeroporto_origem}-{flight.aeroporto_destino} (código: {features[2]})",
-            "distancia": f"{flight.distancia_km}km (normalizado: {features[3]:.3f})",
-            "dia_da_semana": ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"][features[4]],
-            "mes": features[5],
-            "hora_do_dia": f"{features[6]}h"
-        }
+        # Explicação das features só quando pedida (header X-Debug-Trace, mesma regra do app.py)
+        features_explained = None
+        if wants_trace(x_debug_trace):
+            features_explained = {
+                "turno_operacional": "Manhã" if features[0] == 0 else "Tarde/Noite",
+                "companhia_aerea": f"{flight.companhia_aerea} (código: {features[1]})",
+                "rota_aerea": f"{flight.aeroporto_origem}-{flight.aeroporto_destino} (código: {features[2]})",
+                "distancia": f"{flight.distancia_km}km (normalizado: {features[3]:.3f})",
+                "dia_da_semana": ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"][features[4]],
+                "mes": features[5],
+                "hora_do_dia": f"{features[6]}h"
+            }
         
         return PredictionResponse(
             atraso=atraso,
@@ -197,42 +190,8 @@ async def predict(flight: FlightRequest):
         raise HTTPException(500, f"Erro interno: {str(e)}")
 
 def prepare_features(flight: FlightRequest) -> list:
-    """Preparar TODAS as 7 features na ordem correta"""
-    features = []
-    
-    # 0. TURNO OPERACIONAL (0=Manhã, 1=Tarde/Noite)
-    hora = flight.data_hora_partida.hour
-    turno = 0 if hora < 12 else 1
-    features.append(turno)
-    
-    # 1. COMPANHIA AÉREA CODIFICADA
-    companhia = flight.companhia_aerea.upper()
-    codigo_companhia = airline_encoder.get(companhia, airline_encoder.get("UNKNOWN", 0))
-    features.append(codigo_companhia)
-    
-    # 2. PAR DE AEROPORTOS CODIFICADO
-    rota = f"{flight.aeroporto_origem.upper()}-{flight.aeroporto_destino.upper()}"
-    codigo_rota = airport_pair_encoder.get(rota, airport_pair_encoder.get("UNKNOWN", 0))
-    features.append(codigo_rota)
-    
-    # 3. DISTÂNCIA NORMALIZADA (0-1)
-    distancia = float(flight.distancia_km)
-    distancia_norm = min(distancia / 10000.0, 1.0)  # Assume máximo 10,000km
-    features.append(distancia_norm)
-    
-    # 4. DIA DA SEMANA (0=Segunda, 6=Domingo)
-    dia_semana = flight.data_hora_partida.weekday()
-    features.append(dia_semana)
-    
-    # 5. MÊS (1-12)
-    mes = flight.data_hora_partida.month
-    features.append(mes)
-    
-    # 6. HORA DO DIA (0-23) - NOSSA 7ª FEATURE!
-    hora_do_dia = flight.data_hora_partida.hour
-    features.append(hora_do_dia)
-    
-    return features
+    """As 7 features na ordem do modelo: turno, companhia, rota, distância, dia, mês, hora_do_dia"""
+    return adapter.row(flight)
 
 if __name__ == "__main__":
     import uvicorn
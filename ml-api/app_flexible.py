@@ -1,3 +1,5 @@
+# Variante legada: o app.py serve este mesmo layout como o modelo "hora" de models.json
+# (POST /models/hora/predict ou header X-Model: hora), no mesmo processo dos demais.
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from datetime import datetime
@@ -9,6 +11,10 @@ import logging
 import os
 from contextlib import asynccontextmanager
 
+from encoders import CompiledEncoders
+from feature_layouts import FeatureAdapter
+from inference import load_threshold, predict_with_threshold
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,7 +23,9 @@ logger = logging.getLogger(__name__)
 model = None
 airline_encoder = {}
 airport_pair_encoder = {}
+decision_threshold = 0.5
 n_features_expected = 7  # DESCOBRIMOS QUE SÃO 7!
+adapter = None
 
 # Lifespan manager
 @asynccontextmanager
@@ -49,7 +57,7 @@ class PredictionResponse(BaseModel):
     features_used: Optional[int] = None
 
 async def load_model_and_encoders():
-    global model, airline_encoder, airport_pair_encoder, n_features_expected
+    global model, airline_encoder, airport_pair_encoder, n_features_expected, decision_threshold, adapter
     
     try:
         # 1. Carregar o modelo
@@ -63,6 +71,9 @@ async def load_model_and_encoders():
         else:
             logger.warning("⚠️ Não consegui determinar número de features, usando 7")
         
+        # Threshold de decisão ajustado no treinamento
+        decision_threshold = load_threshold()
+        
         # 2. Carregar encoders
         with open('companhia_encoder.json', 'r') as f:
             airline_encoder = json.load(f)
@@ -70,6 +81,9 @@ async def load_model_and_encoders():
         with open('airport_pair_encoder.json', 'r') as f:
             airport_pair_encoder = json.load(f)
         
+        # Mesmo pipeline de features do app.py e do treino: 6 base + hora_do_dia, zeros até n_features_expected
+        adapter = FeatureAdapter("hour7", n_features_expected, CompiledEncoders(airline_encoder, airport_pair_encoder))
+        
         logger.info("🚀 API pronta para receber requisições!")
         
     except Exception as e:
@@ -111,6 +125,7 @@ async def model_info():
         "type": str(type(model)),
         "n_features_expected": n_features_expected,
         "has_predict_proba": hasattr(model, 'predict_proba'),
+        "decision_threshold": decision_threshold,
         "classes": model.classes_.tolist() if hasattr(model, 'classes_') else None
     }
     
@@ -154,19 +169,8 @@ async def predict(flight: FlightRequest):
         if not model:
             raise HTTPException(503, "Modelo não carregado")
         
-        # Preparar features BASE (6 que sabemos)
-        features = prepare_base_features(flight)
-        
-        # Precisamos de 7 features, vamos adicionar um placeholder para a 7ª
-        # A 7ª feature provavelmente é: ano, hora exata, ou outro derivado temporal
-        if len(features) < n_features_expected:
-            # Adicionar hora_do_dia como candidato para 7ª feature
-            hora = flight.data_hora_partida.hour
-            features.append(hora)  # hora_do_dia (0-23)
-            
-            # Se ainda faltar, preencher com zeros
-            while len(features) < n_features_expected:
-                features.append(0)
+        # 6 features base + hora_do_dia como 7ª, completadas com zeros até n_features_expected
+        features = adapter.row(flight)
         
         logger.info(f"🔧 Features preparadas ({len(features)}): {features}")
         
@@ -174,16 +178,9 @@ async def predict(flight: FlightRequest):
         features_array = np.array([features], dtype=np.float32)
         
         try:
-            prediction = model.predict(features_array)[0]
-            
-            if hasattr(model, 'predict_proba'):
-                proba = model.predict_proba(features_array)[0]
-                if len(proba) == 2:
-                    probability = float(proba[1])  # Probabilidade de atraso
-                else:
-                    probability = 0.8 if prediction == 1 else 0.2
-            else:
-                probability = 0.8 if prediction == 1 else 0.2
+            predictions, probabilities = predict_with_threshold(model, features_array, decision_threshold)
+            prediction = predictions[0]
+            probability = float(probabilities[0])  # Probabilidade de atraso
             
         except Exception as e:
             logger.error(f"❌ Erro no modelo: {e}")
@@ -208,40 +205,6 @@ async def predict(flight: FlightRequest):
         logger.error(f"❌ Erro: {e}", exc_info=True)
         raise HTTPException(500, f"Erro interno: {str(e)}")
 
-def prepare_base_features(flight: FlightRequest) -> list:
-    """Preparar as 6 features que sabemos"""
-    features = []
-    
-    # 1. TURNO (0=Manhã, 1=Tarde/Noite)
-    hora = flight.data_hora_partida.hour
-    turno = 0 if hora < 12 else 1
-    features.append(turno)
-    
-    # 2. COMPANHIA AÉREA
-    companhia = flight.companhia_aerea.upper()
-    codigo_companhia = airline_encoder.get(companhia, airline_encoder.get("UNKNOWN", 0))
-    features.append(codigo_companhia)
-    
-    # 3. PAR DE AEROPORTOS
-    rota = f"{flight.aeroporto_origem.upper()}-{flight.aeroporto_destino.upper()}"
-    codigo_rota = airport_pair_encoder.get(rota, airport_pair_encoder.get("UNKNOWN", 0))
-    features.append(codigo_rota)
-    
-    # 4. DISTÂNCIA (normalizada 0-1)
-    distancia = float(flight.distancia_km)
-    distancia_norm = min(distancia / 10000.0, 1.0)
-    features.append(distancia_norm)
-    
-    # 5. DIA DA SEMANA (0-6)
-    dia_semana = flight.data_hora_partida.weekday()
-    features.append(dia_semana)
-    
-    # 6. MÊS (1-12)
-    mes = flight.data_hora_partida.month
-    features.append(mes)
-    
-    return features
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,135 @@
+"""
+Entrada e saída em Apache Arrow (IPC stream) para pontuação em massa.
+
+POST /predict/arrow recebe um stream IPC com as colunas do FlightRequest
+e devolve outro com `atraso` (bool) e `probabilidade` (float64), uma linha
+por voo, na mesma ordem. Para jobs que já têm os dados em pandas/Arrow, isso
+evita o JSON e um modelo pydantic por linha:
+
+- textos (companhia, origem, destino) são codificados em dicionário pelo
+  Arrow e só os valores distintos passam pelos encoders (Categorical);
+- o timestamp vira datetime64 sem cópia e hora, dia da semana e mês saem
+  da mesma aritmética de datas do resto do pipeline (raw_columns);
+- distância vira um array NumPy sem cópia.
+
+data_hora_partida pode ser timestamp (com ou sem fuso: vale a hora local,
+como no /predict) ou texto ISO 8601 sem fuso.
+
+pyarrow está no requirements.txt (imagem Docker); em instalações de dev
+sem ele, ARROW_AVAILABLE é False e a rota responde 501.
+O import (~100 ms) só acontece na primeira requisição Arrow, para não pesar
+no cold start dos workers que nunca recebem uma.
+"""
+
+import importlib.util
+import os
+
+import numpy as np
+
+from encoders import Categorical
+from feature_layouts import raw_columns
+
+# Preenchidos por _load_pyarrow() no primeiro uso
+pa = pc = None
+
+ARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_MAX_ROWS = int(os.getenv("ARROW_MAX_ROWS", "1000000"))
+
+TEXT_COLUMNS = ("companhia_aerea", "aeroporto_origem", "aeroporto_destino")
+REQUIRED_COLUMNS = TEXT_COLUMNS + ("data_hora_partida", "distancia_km")
+
+
+class ArrowInputError(ValueError):
+    """Stream IPC ilegível ou colunas ausentes/inválidas (vira 422)"""
+
+
+def _load_pyarrow():
+    global pa, pc
+    if pa is None:
+        import pyarrow
+        import pyarrow.compute
+        pa, pc = pyarrow, pyarrow.compute
+
+
+def read_table(body: bytes) -> "pa.Table":
+    """Tabela (um só chunk por coluna) a partir do corpo em Arrow IPC stream"""
+    _load_pyarrow()
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    except pa.ArrowInvalid as e:
+        raise ArrowInputError(f"Arrow IPC stream inválido: {e}")
+
+    missing = [name for name in REQUIRED_COLUMNS if name not in table.column_names]
+    if missing:
+        raise ArrowInputError(f"Colunas faltando: {missing}")
+    table = table.select(list(REQUIRED_COLUMNS)).combine_chunks()
+    for name in REQUIRED_COLUMNS:
+        nulls = table.column(name).null_count
+        if nulls:
+            raise ArrowInputError(f"{name}: {nulls} valores nulos")
+    return table
+
+
+def _single(column) -> "pa.Array":
+    return column.chunk(0) if column.num_chunks else pa.array([], type=column.type)
+
+
+def _categorical(column, name: str) -> Categorical:
+    """Coluna de texto → Categorical (reaproveita o dicionário se a coluna já vier assim)"""
+    array = _single(column)
+    if not pa.types.is_dictionary(array.type):
+        if not (pa.types.is_string(array.type) or pa.types.is_large_string(array.type)):
+            raise ArrowInputError(f"{name}: esperado texto, veio {array.type}")
+        array = pc.dictionary_encode(array)
+    return Categorical(array.dictionary.to_pylist(), array.indices.to_numpy(zero_copy_only=False))
+
+
+def _departures(column) -> np.ndarray:
+    """datetime64 com a hora local de cada partida"""
+    array = _single(column)
+    if not pa.types.is_timestamp(array.type):
+        try:
+            array = pc.cast(array, pa.timestamp("us"))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            raise ArrowInputError(f"data_hora_partida: use timestamp ou ISO 8601 sem fuso ({e})")
+    if array.type.tz is not None:
+        array = pc.local_timestamp(array)
+    return array.to_numpy(zero_copy_only=False)
+
+
+def arrow_columns(table: "pa.Table") -> dict:
+    """Colunas de feature_layouts.raw_columns direto dos buffers do Arrow"""
+    departures = _departures(table.column("data_hora_partida"))
+    try:
+        distances = pc.cast(_single(table.column("distancia_km")), pa.float64())
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        raise ArrowInputError(f"distancia_km: {e}")
+
+    return raw_columns(
+        *(_categorical(table.column(name), name) for name in TEXT_COLUMNS),
+        departures, distances.to_numpy(zero_copy_only=False),
+    )
+
+
+def write_predictions(atrasos: np.ndarray, probabilidades: np.ndarray) -> bytes:
+    """Arrow IPC stream com um record batch (atraso, probabilidade)"""
+    _load_pyarrow()
+    batch = pa.record_batch([
+        pa.array(np.asarray(atrasos, dtype=bool)),
+        pa.array(np.asarray(probabilidades, dtype=np.float64)),
+    ], names=["atraso", "probabilidade"])
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def write_table(data) -> bytes:
+    """Arrow IPC stream de uma tabela ou DataFrame (lado do cliente e testes)"""
+    _load_pyarrow()
+    table = data if isinstance(data, pa.Table) else pa.Table.from_pandas(data, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
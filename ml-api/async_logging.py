@@ -0,0 +1,158 @@
+"""
+Logging assíncrono: o caminho da requisição só enfileira o LogRecord.
+
+- QueueHandler com fila limitada; fila cheia descarta o registro e conta
+  (nunca bloqueia a requisição).
+- Formatação e escrita no stdout acontecem numa thread (QueueListener).
+- Access log estruturado em JSON (um registro por requisição), com
+  amostragem configurável por endpoint; respostas de erro são sempre logadas.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+
+ASYNC_LOGGING = os.getenv("ASYNC_LOGGING", "true").lower() in ("1", "true", "yes")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# "endpoint=fração" separados por vírgula; "default" vale para o resto (ex.: "/predict=0.01,default=1")
+ACCESS_LOG_SAMPLING = os.getenv("ACCESS_LOG_SAMPLING", "default=1")
+
+ACCESS_LOGGER_NAME = "api.access"
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que descarta (e conta) quando a fila está cheia"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Sem formatar aqui: msg % args e tracebacks são resolvidos na thread do listener
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Registros do access log (msg = dict) viram uma linha JSON"""
+
+    def format(self, record):
+        if isinstance(record.msg, dict):
+            return json.dumps(record.msg, ensure_ascii=False, separators=(",", ":"))
+        return super().format(record)
+
+
+class AsyncLogging:
+    """Pipeline fila → thread → stdout para todos os loggers do processo"""
+
+    def __init__(self, level: str = LOG_LEVEL, queue_size: int = LOG_QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.handler = DroppingQueueHandler(self.queue)
+
+        output = logging.StreamHandler()
+        output.setFormatter(JsonFormatter("%(levelname)s:%(name)s:%(message)s"))
+        self.listener = logging.handlers.QueueListener(self.queue, output, respect_handler_level=False)
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(self.handler)
+
+        self._started = False
+        os.register_at_fork(after_in_child=self._restart_in_child)
+
+    def start(self):
+        self.listener.start()
+        self._started = True
+        atexit.register(self.stop)
+
+    def _restart_in_child(self):
+        # Depois de um fork (serve.py) a thread do listener não existe no filho;
+        # fila nova, porque a antiga pode ter sido copiada com o lock preso
+        self.queue = queue.Queue(maxsize=self.queue.maxsize)
+        self.handler.queue = self.queue
+        self.listener.queue = self.queue
+        self.listener._thread = None
+        if self._started:
+            self.listener.start()
+
+    def stop(self):
+        # Esvazia a fila antes de sair
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    @property
+    def dropped(self) -> int:
+        return self.handler.dropped
+
+    def stats(self) -> dict:
+        return {
+            "enabled": True,
+            "queue_depth": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "dropped": self.handler.dropped,
+        }
+
+
+def parse_sampling(spec: str) -> dict:
+    """'/predict=0.01,default=1' -> {'/predict': 0.01, 'default': 1.0}"""
+    rates = {"default": 1.0}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        endpoint, _, rate = item.rpartition("=")
+        rate = float(rate)
+        if not endpoint or not 0.0 <= rate <= 1.0:
+            raise ValueError(f"Amostragem inválida em ACCESS_LOG_SAMPLING: {item!r}")
+        rates[endpoint] = rate
+    return rates
+
+
+class AccessLog:
+    """Um registro JSON por requisição, amostrado por endpoint"""
+
+    def __init__(self, sampling: str = ACCESS_LOG_SAMPLING, logger: logging.Logger = None):
+        self.rates = parse_sampling(sampling)
+        self.default_rate = self.rates["default"]
+        self.logger = logger or logging.getLogger(ACCESS_LOGGER_NAME)
+        self.sampled_out = 0
+
+    def __call__(self, endpoint: str, method: str, status: int, timer, duration: float):
+        # Decisão de amostragem antes de montar qualquer coisa; erros sempre entram
+        if status < 400:
+            rate = self.rates.get(endpoint, self.default_rate)
+            if rate < 1.0 and random.random() >= rate:
+                self.sampled_out += 1
+                return
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+
+        self.logger.info({
+            "ts": time.time(),
+            "method": method,
+            "endpoint": endpoint,
+            "status": status,
+            "duration_ms": round(duration * 1000, 3),
+            "model": timer.model,
+            "model_version": timer.version,
+            "stages_ms": {name: round(seconds * 1000, 3) for name, seconds in timer.stages},
+        })
+
+
+def setup_logging(level: str = LOG_LEVEL):
+    """Configura o logging do processo; devolve o pipeline assíncrono (ou None se desligado)"""
+    if not ASYNC_LOGGING:
+        logging.basicConfig(level=level)
+        return None
+
+    pipeline = AsyncLogging(level)
+    pipeline.start()
+    return pipeline
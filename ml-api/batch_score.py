@@ -0,0 +1,243 @@
+"""
+Pontuação offline de uma grade de voos (CSV ou Parquet), sem HTTP.
+
+Lê o arquivo em blocos de --chunk-size linhas, monta as features com o
+mesmo FeatureAdapter do /predict/batch (mesmo catálogo, layout, encoders e
+threshold) e pontua os blocos em paralelo num pool de processos. O modelo
+é carregado uma vez antes do fork e os workers herdam as páginas (como no
+serve.py). Os resultados saem na ordem de entrada, com as colunas
+originais mais:
+
+    atraso, probabilidade   predição (vazias se a linha for inválida)
+    status                  "success" ou "error" (campo faltando, data ou distância inválida)
+
+No fim imprime linhas/s e o pico de RSS do processo principal e do maior
+worker. Parquet usa o pyarrow do requirements.txt.
+
+Uso:
+    python batch_score.py grade.csv -o previsoes.parquet [--model hora] [--workers 8] [--chunk-size 100000]
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Antes do import do app: sem thread de logging (não sobrevive ao fork)
+os.environ.setdefault("ASYNC_LOGGING", "false")
+
+import numpy as np
+import pandas as pd
+
+from feature_layouts import frame_columns
+from inference import predict_with_threshold
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ["companhia_aerea", "aeroporto_origem", "aeroporto_destino", "data_hora_partida", "distancia_km"]
+DEFAULT_CHUNK_SIZE = int(os.getenv("BATCH_SCORE_CHUNK_SIZE", "100000"))
+
+# Modelo do processo (carregado no principal antes do fork; com spawn, no initializer)
+_current = None
+
+
+def load_model(model_name: str = None, model_format: str = None):
+    """Versão do modelo pedida no catálogo, carregada como no startup da API"""
+    global _current
+    import app
+    _current = app.load_model_and_encoders(model_format).get(model_name)
+    return _current
+
+
+def _init_worker(model_name: str, model_format: str):
+    if _current is None:
+        load_model(model_name, model_format)
+
+
+def _require_pyarrow(path: str):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit(f"❌ {path}: Parquet precisa do pyarrow (pip install pyarrow)")
+    return pq
+
+
+def is_parquet(path: str) -> bool:
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def read_chunks(path: str, chunk_size: int):
+    """DataFrames de até chunk_size linhas, sem carregar o arquivo inteiro"""
+    if is_parquet(path):
+        parquet_file = _require_pyarrow(path).ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype={"companhia_aerea": str,
+                                                                   "aeroporto_origem": str, "aeroporto_destino": str})
+
+
+class ChunkWriter:
+    """Escrita incremental em CSV ou Parquet (esquema do primeiro bloco)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.parquet = is_parquet(path)
+        self._writer = None
+        self._started = False
+
+    def write(self, chunk):
+        """Bloco pronto: DataFrame (Parquet) ou texto CSV já serializado no worker"""
+        if isinstance(chunk, str):
+            with open(self.path, "a" if self._started else "w", encoding="utf-8", newline="") as f:
+                f.write(chunk)
+        elif self.parquet:
+            frame = chunk
+            import pyarrow as pa
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = _require_pyarrow(self.path).ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+        else:
+            chunk.to_csv(self.path, mode="a" if self._started else "w", header=not self._started, index=False)
+        self._started = True
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def valid_rows(frame: pd.DataFrame) -> tuple:
+    """(máscara de linhas válidas, DataFrame só com elas e tipos normalizados)"""
+    departures = pd.to_datetime(frame["data_hora_partida"], errors="coerce", format="ISO8601")
+    distances = pd.to_numeric(frame["distancia_km"], errors="coerce")
+    mask = departures.notna() & distances.notna()
+    for column in ("companhia_aerea", "aeroporto_origem", "aeroporto_destino"):
+        mask &= frame[column].notna()
+    mask = mask.to_numpy()
+
+    valid = frame.loc[mask, REQUIRED_COLUMNS[:3]].copy()
+    valid["data_hora_partida"] = departures[mask]
+    valid["distancia_km"] = distances[mask]
+    return mask, valid
+
+
+def predict_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Bloco com as colunas de saída, pontuado com o modelo do processo (inválidas ficam vazias)"""
+    current = _current
+    mask, valid = valid_rows(frame)
+    atraso = np.zeros(len(frame), dtype=bool)
+    probabilidade = np.full(len(frame), np.nan)
+
+    if not valid.empty:
+        dtype = current.scorer.dtype if current.scorer is not None else np.float32
+        features_matrix = current.adapter.matrix_from_columns(frame_columns(valid), len(valid), dtype=dtype)
+        predictions, probabilities = predict_with_threshold(
+            current.scorer or current.model, features_matrix, current.decision_threshold
+        )
+        atraso[mask] = predictions
+        probabilidade[mask] = probabilities
+
+    return frame.assign(atraso=pd.arrays.BooleanArray(atraso, ~mask), probabilidade=probabilidade,
+                        status=np.where(mask, "success", "error"))
+
+
+def score_chunk(frame: pd.DataFrame, csv_header: bool = None) -> tuple:
+    """(linhas, inválidas, bloco de saída) — em CSV já serializado, para o processo principal só escrever"""
+    output = predict_frame(frame)
+    errors = int((output["status"] == "error").sum())
+    if csv_header is not None:
+        return len(output), errors, output.to_csv(index=False, header=csv_header)
+    return len(output), errors, output
+
+
+def peak_rss_mb() -> dict:
+    """Pico de RSS (ru_maxrss, kB no Linux) do processo e do maior filho já encerrado"""
+    scale = 1 / (1024 * 1024) if sys.platform == "darwin" else 1 / 1024
+    return {
+        "main": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale, 1),
+        "workers": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale, 1),
+    }
+
+
+def score_file(input_path: str, output_path: str, model_name: str = None, model_format: str = None,
+               workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """Pontuar o arquivo inteiro; devolve as estatísticas da execução"""
+    workers = workers or os.cpu_count() or 1
+    current = load_model(model_name, model_format)
+    start = time.perf_counter()
+    rows = errors = chunks = 0
+
+    writer = ChunkWriter(output_path)
+    pool = None
+    if workers > 1:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        pool = ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                   initargs=(model_name, model_format))
+
+    # No máximo 2 blocos por worker em andamento: memória limitada e saída na ordem de entrada
+    pending = deque()
+
+    def drain(keep: int):
+        nonlocal rows, errors, chunks
+        while len(pending) > keep:
+            result = pending.popleft()
+            chunk_rows, chunk_errors, output = result.result() if pool else result
+            writer.write(output)
+            rows, errors, chunks = rows + chunk_rows, errors + chunk_errors, chunks + 1
+
+    try:
+        for frame in read_chunks(input_path, chunk_size):
+            missing = [column for column in REQUIRED_COLUMNS if column not in frame.columns]
+            if missing:
+                raise SystemExit(f"❌ {input_path}: colunas faltando: {missing}")
+            csv_header = None if writer.parquet else chunks + len(pending) == 0
+            pending.append(pool.submit(score_chunk, frame, csv_header) if pool else score_chunk(frame, csv_header))
+            drain(2 * workers - 1 if pool else 0)
+        drain(0)
+    finally:
+        writer.close()
+        if pool:
+            pool.shutdown(cancel_futures=True)
+
+    seconds = time.perf_counter() - start
+    return {
+        "model": current.name,
+        "model_version": current.version,
+        "rows": rows,
+        "errors": errors,
+        "chunks": chunks,
+        "workers": workers,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds) if seconds else 0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pontuação offline de voos (CSV/Parquet) com o modelo da API")
+    parser.add_argument("input", help="Grade de voos (.csv ou .parquet) com as colunas do /predict")
+    parser.add_argument("-o", "--output", required=True, help="Arquivo de saída (.csv ou .parquet)")
+    parser.add_argument("--model", help="Modelo do catálogo (padrão: o default do models.json)")
+    parser.add_argument("--format", dest="model_format", choices=["joblib", "compact"],
+                        help="Formato do modelo (padrão: MODEL_FORMAT)")
+    parser.add_argument("--workers", type=int, help="Processos de pontuação (padrão: número de CPUs)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    stats = score_file(args.input, args.output, args.model, args.model_format, args.workers, args.chunk_size)
+    print(f"✅ [{stats['model']}] {stats['rows']} linhas ({stats['errors']} inválidas) em {stats['seconds']:.2f}s "
+          f"com {stats['workers']} workers: {stats['rows_per_second']} linhas/s")
+    workers_rss = f", maior worker {stats['peak_rss_mb']['workers']} MB" if stats["workers"] > 1 else ""
+    print(f"📊 Pico de RSS: principal {stats['peak_rss_mb']['main']} MB{workers_rss}")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Micro-batching de requisições concorrentes ao /predict.
+
+Cada chamada entra numa fila asyncio; um worker junta até max_batch_size
+itens (ou o que chegar em max_wait_ms), pontua tudo numa única matriz e
+devolve o resultado para o future de cada chamador.
+
+Cada item carrega um contexto (a versão do modelo da requisição); itens
+de contextos diferentes no mesmo flush são pontuados em matrizes separadas.
+
+A fila é limitada (MICROBATCH_MAX_QUEUE): cheia, submit recusa na hora com
+ExecutorSaturated, o mesmo 503 + Retry-After do executor de inferência.
+
+score_fn pode ser assíncrona (no app, o executor de inferência): enquanto
+um lote está sendo pontuado, os próximos itens se acumulam na fila.
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+import time
+
+import numpy as np
+
+from deadline import DeadlineExceeded, dropped, expired
+from executor import ExecutorSaturated
+
+logger = logging.getLogger(__name__)
+
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "1.0"))
+MICROBATCH_MAX_QUEUE = int(os.getenv("MICROBATCH_MAX_QUEUE", "1024"))
+
+
+class MicroBatcher:
+    """Agrupa predições concorrentes numa única chamada de score_fn"""
+
+    def __init__(self, score_fn, max_batch_size: int = MICROBATCH_MAX_SIZE,
+                 max_wait_ms: float = MICROBATCH_MAX_WAIT_MS, max_queue: int = MICROBATCH_MAX_QUEUE,
+                 dtype=np.float64):
+        """
+        Args:
+            score_fn: função (matriz, contexto) -> (rótulos, probabilidades), síncrona ou async
+            max_batch_size: flush ao atingir este número de itens
+            max_wait_ms: flush após este tempo desde o primeiro item do lote
+            max_queue: itens esperando antes de recusar com ExecutorSaturated
+        """
+        if max_batch_size < 1 or max_queue < 1:
+            raise ValueError(f"max_batch_size e max_queue devem ser >= 1: {max_batch_size}, {max_queue}")
+
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue = max_queue
+        self.dtype = dtype
+        self._queue = None
+        self._worker = None
+
+        # Estatísticas
+        self.batches = 0
+        self.items = 0
+        self.max_batch_seen = 0
+        self.rejected = 0
+        self.avg_batch_seconds = 0.0
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._worker = asyncio.create_task(self._run())
+        logger.info(f"🧺 Micro-batching ativo (até {self.max_batch_size} itens / {self.max_wait * 1000:g}ms)")
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        # Não deixar chamadores esperando para sempre
+        while self._queue is not None and not self._queue.empty():
+            _, _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher encerrado"))
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def submit(self, features, context=None, deadline=None):
+        """Enfileirar um vetor de features e aguardar (atraso, probabilidade)"""
+        if not self.running:
+            raise RuntimeError("Micro-batcher não iniciado")
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((features, context, future, deadline))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise ExecutorSaturated(self.retry_after())
+        return await future
+
+    def retry_after(self) -> float:
+        """Tempo estimado para esvaziar a fila, em segundos (mínimo 1)"""
+        waves = self._queue.qsize() / self.max_batch_size if self._queue is not None else 0
+        return max(1.0, round(waves * self.avg_batch_seconds, 1))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._flush(batch)
+
+    async def _flush(self, batch):
+        # Chamadores que desistiram (cancelados) ou com deadline vencido não entram no lote
+        groups = {}
+        for features, context, future, deadline in batch:
+            if future.done():
+                continue
+            if expired(deadline):
+                dropped["micro_batch"] += 1
+                future.set_exception(DeadlineExceeded("micro_batch"))
+                continue
+            groups.setdefault(id(context), (context, []))[1].append((features, future))
+
+        for context, items in groups.values():
+            await self._score_group(context, items)
+
+    async def _score_group(self, context, items):
+        start = time.perf_counter()
+        try:
+            features_matrix = np.array([features for features, _ in items], dtype=self.dtype)
+            result = self.score_fn(features_matrix, context)
+            predictions, probabilities = await result if inspect.isawaitable(result) else result
+        except asyncio.CancelledError:
+            # stop() no meio da pontuação: não deixar estes chamadores esperando
+            self._fail(items, RuntimeError("Micro-batcher encerrado"))
+            raise
+        except Exception as e:
+            logger.error(f"❌ Erro no lote do micro-batcher: {e}")
+            self._fail(items, e)
+            return
+
+        for (_, future), prediction, probability in zip(items, predictions.tolist(), probabilities.tolist()):
+            if not future.done():
+                future.set_result((bool(prediction), probability))
+
+        elapsed = time.perf_counter() - start
+        self.avg_batch_seconds = elapsed if not self.batches else 0.9 * self.avg_batch_seconds + 0.1 * elapsed
+        self.batches += 1
+        self.items += len(items)
+        self.max_batch_seen = max(self.max_batch_seen, len(items))
+
+    @staticmethod
+    def _fail(items, error):
+        for _, future in items:
+            if not future.done():
+                future.set_exception(error)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.running,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_seen": self.max_batch_seen,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+        }
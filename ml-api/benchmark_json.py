@@ -0,0 +1,94 @@
+"""
+Benchmark do codec JSON: caminho Pydantic/FastAPI vs fast_json.
+
+Mede decodificação do corpo e codificação da resposta de /predict e de
+um lote de /predict/batch, fora do servidor (só CPU do codec).
+
+Uso: python benchmark_json.py [--batch 1000] [--repeat 5]
+"""
+
+import argparse
+import json
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app import BatchPredictionResponse, FlightRequest, PredictionResponse, build_message
+from fast_json import FlightDecoder, encode_batch, encode_prediction
+
+FLIGHT = {
+    "companhia_aerea": "LATAM",
+    "aeroporto_origem": "GRU",
+    "aeroporto_destino": "SCL",
+    "data_hora_partida": "2024-01-15T14:30:00",
+    "distancia_km": 2600.0,
+}
+
+RESPONSE_ADAPTER = TypeAdapter(PredictionResponse)
+BATCH_ADAPTER = TypeAdapter(BatchPredictionResponse)
+LIST_ADAPTER = TypeAdapter(list[FlightRequest])
+
+
+def fastapi_bytes(adapter, value) -> bytes:
+    """O que o FastAPI faz com response_model: dump em modo JSON + json.dumps compacto"""
+    content = jsonable_encoder(adapter.dump_python(value, mode="json", exclude_none=True))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def bench(label: str, fn, number: int, repeat: int):
+    best = min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+    print(f"   {label:<28} {best * 1e6:10.2f} µs/op")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=1000, help="voos no lote")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    decoder = FlightDecoder(FlightRequest)
+    body = json.dumps(FLIGHT).encode()
+    batch_body = json.dumps([FLIGHT] * args.batch).encode()
+
+    probability = 0.0734
+    response = PredictionResponse(atraso=True, probabilidade=probability, mensagem=build_message(True, probability))
+    atrasos = [i % 3 == 0 for i in range(args.batch)]
+    probabilities = [(i % 97) / 97 for i in range(args.batch)]
+    mensagens = [build_message(a, p) for a, p in zip(atrasos, probabilities)]
+    batch_response = BatchPredictionResponse(
+        resultados=[PredictionResponse(atraso=a, probabilidade=p, mensagem=m)
+                    for a, p, m in zip(atrasos, probabilities, mensagens)],
+        total=args.batch,
+    )
+    assert encode_prediction(response) == fastapi_bytes(RESPONSE_ADAPTER, response)
+    assert encode_batch(atrasos, probabilities, mensagens) == fastapi_bytes(BATCH_ADAPTER, batch_response)
+
+    print(f"🔬 Codec JSON ({decoder.stats()['backend']}), lote de {args.batch} voos\n")
+    rows = [
+        # O FastAPI faz request.json() (json.loads) e depois valida o dict
+        ("decode /predict",
+         lambda: FlightRequest.model_validate(json.loads(body)), lambda: decoder.decode(body), 20000),
+        ("encode /predict",
+         lambda: fastapi_bytes(RESPONSE_ADAPTER, response), lambda: encode_prediction(response), 20000),
+        ("decode /predict/batch",
+         lambda: LIST_ADAPTER.validate_python(json.loads(batch_body)), lambda: decoder.decode_list(batch_body), 20),
+        # O caminho antigo também criava um PredictionResponse por voo antes de serializar
+        ("encode /predict/batch",
+         lambda: fastapi_bytes(BATCH_ADAPTER, BatchPredictionResponse(
+             resultados=[PredictionResponse(atraso=a, probabilidade=p, mensagem=m)
+                         for a, p, m in zip(atrasos, probabilities, mensagens)],
+             total=args.batch)),
+         lambda: encode_batch(atrasos, probabilities, mensagens), 20),
+    ]
+
+    for label, slow, fast, number in rows:
+        print(f"📊 {label}")
+        slow_time = bench("Pydantic/FastAPI", slow, number, args.repeat)
+        fast_time = bench("fast_json", fast, number, args.repeat)
+        print(f"   {'ganho':<28} {slow_time / fast_time:10.1f}x\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Deadlines por requisição e cancelamento de trabalho abandonado.
+
+O chamador informa quanto tempo ainda espera a resposta:
+- X-Request-Timeout-Ms: orçamento relativo à chegada (ex.: 3000 do backend Java);
+- X-Request-Deadline: instante absoluto em epoch ms.
+
+O deadline vira um instante de time.monotonic() (comparável entre threads
+e processos da mesma máquina), guardado num contextvar. Preparação de
+features, inferência, micro-batch e executor chamam check()/expired() e
+descartam o trabalho vencido com DeadlineExceeded (o app responde 504).
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from collections import defaultdict
+
+TIMEOUT_HEADER = "x-request-timeout-ms"
+DEADLINE_HEADER = "x-request-deadline"
+
+# Orçamento usado quando o chamador não manda header (0 = sem deadline)
+DEFAULT_TIMEOUT_MS = float(os.getenv("DEFAULT_REQUEST_TIMEOUT_MS", "0"))
+
+_deadline = contextvars.ContextVar("request_deadline", default=None)
+
+# Trabalho descartado por estágio e desconexões detectadas (exportados no /metrics)
+dropped = defaultdict(int)
+disconnects = 0
+
+
+class DeadlineExceeded(Exception):
+    """O deadline da requisição passou antes do estágio informado"""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Deadline da requisição expirado antes de '{stage}'")
+        self.stage = stage
+
+
+def parse_deadline(headers, now: float = None, wall: float = None):
+    """Instante monotonic do deadline a partir dos headers (None se não houver)"""
+    now = time.monotonic() if now is None else now
+    timeout_ms = headers.get(TIMEOUT_HEADER)
+    absolute_ms = headers.get(DEADLINE_HEADER)
+
+    try:
+        if timeout_ms is not None:
+            return now + float(timeout_ms) / 1000
+        if absolute_ms is not None:
+            wall = time.time() if wall is None else wall
+            return now + (float(absolute_ms) / 1000 - wall)
+    except ValueError:
+        return None   # header malformado: tratar como sem deadline
+
+    return now + DEFAULT_TIMEOUT_MS / 1000 if DEFAULT_TIMEOUT_MS > 0 else None
+
+
+def set_deadline(deadline):
+    return _deadline.set(deadline)
+
+
+def reset_deadline(token):
+    _deadline.reset(token)
+
+
+def current_deadline():
+    return _deadline.get()
+
+
+def remaining(deadline=None):
+    """Segundos até o deadline (None sem deadline; negativo se já passou)"""
+    deadline = _deadline.get() if deadline is None else deadline
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def expired(deadline) -> bool:
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def check(stage: str, deadline=None):
+    """Levanta DeadlineExceeded (e conta o descarte) se o deadline já passou"""
+    deadline = _deadline.get() if deadline is None else deadline
+    if deadline is not None and time.monotonic() >= deadline:
+        dropped[stage] += 1
+        raise DeadlineExceeded(stage)
+
+
+def call_before_deadline(deadline, stage: str, fn, *args):
+    """fn(*args) só se ainda houver tempo (usado dentro do pool do executor)"""
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceeded(stage)
+    return fn(*args)
+
+
+async def cancel_on_disconnect(request, awaitable):
+    """
+    Aguarda awaitable, cancelando-o se o cliente desconectar antes
+
+    Depois que o corpo foi lido, receive() só devolve http.disconnect.
+    O cancelamento para só a corrotina: um job já entregue ao
+    inference_executor roda até o fim na thread (o resultado é descartado).
+    O que ainda está na fila é descartado pelo deadline, não por aqui.
+    """
+    global disconnects
+    work = asyncio.ensure_future(awaitable)
+    watcher = asyncio.ensure_future(request.receive())
+    try:
+        done, _ = await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        if work in done:
+            return work.result()
+
+        disconnects += 1
+        work.cancel()
+        raise asyncio.CancelledError("Cliente desconectou")
+    finally:
+        watcher.cancel()
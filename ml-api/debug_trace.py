@@ -0,0 +1,78 @@
+"""
+Trace de debug por requisição, só quando pedido.
+
+Com o header X-Debug-Trace (ou sorteado por DEBUG_TRACE_SAMPLE_RATE) o
+/predict devolve no campo "debug": features nomeadas, acertos dos
+encoders, tempos por estágio e a contribuição de cada coeficiente para o
+logit. Sem o header nada disso é calculado.
+"""
+
+import os
+import random
+import time
+
+import numpy as np
+
+DEBUG_TRACE_ENABLED = os.getenv("DEBUG_TRACE_ENABLED", "true").lower() in ("1", "true", "yes")
+DEBUG_TRACE_SAMPLE_RATE = float(os.getenv("DEBUG_TRACE_SAMPLE_RATE", "0"))
+
+_FALSY = ("", "0", "false", "no", "off")
+
+
+def wants_trace(header_value, sample_rate: float = None) -> bool:
+    """Header X-Debug-Trace verdadeiro ou sorteio pela taxa de amostragem"""
+    if not DEBUG_TRACE_ENABLED:
+        return False
+    if header_value is not None and header_value.strip().lower() not in _FALSY:
+        return True
+    rate = DEBUG_TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+    return rate > 0 and random.random() < rate
+
+
+def coefficient_contributions(current, features) -> dict:
+    """coef_i * x_i por feature, intercepto e logit (None se o modelo não for linear)"""
+    scorer = current.scorer
+    if scorer is not None:
+        coef, intercept, link_scale = scorer.coef, scorer.intercept, scorer.link_scale
+    elif hasattr(current.model, "coef_"):
+        coef, intercept, link_scale = np.ravel(current.model.coef_), float(np.ravel(current.model.intercept_)[0]), None
+    else:
+        return None
+
+    values = np.asarray(features, dtype=np.float64)
+    contributions = values * np.asarray(coef, dtype=np.float64)
+    logit = float(contributions.sum() + intercept)
+    return {
+        "intercepto": float(intercept),
+        "features": {
+            name: {"coef": float(c), "contribuicao": float(contribution)}
+            for name, c, contribution in zip(current.adapter.feature_names, coef, contributions)
+        },
+        "logit": logit,
+        "link_scale": link_scale,
+    }
+
+
+def build_trace(flight, current, features, atraso: bool, probability: float, timer=None) -> dict:
+    """Detalhamento completo de uma predição (chamado só quando wants_trace)"""
+    trace = {
+        "modelo": current.name,
+        "versao": current.version,
+        "layout": current.adapter.layout,
+        "features": dict(zip(current.adapter.feature_names, features)),
+        "encoders": current.encoders.explain(flight.companhia_aerea, flight.aeroporto_origem, flight.aeroporto_destino),
+        "contribuicoes": coefficient_contributions(current, features),
+        "threshold": current.decision_threshold,
+        "resultado": {"atraso": atraso, "probabilidade": probability},
+    }
+
+    if timer is not None:
+        stages = {}
+        if timer.handler_start is not None:
+            stages["parse"] = (timer.handler_start - timer.start) * 1000
+        for name, seconds in timer.stages:
+            stages[name] = seconds * 1000
+        stages["total_ate_agora"] = (time.perf_counter() - timer.start) * 1000
+        trace["tempos_ms"] = {name: round(ms, 4) for name, ms in stages.items()}
+
+    return trace
@@ -0,0 +1,138 @@
+"""
+Encoders compilados para o caminho quente do /predict.
+
+Os JSON de encoders ({"LATAM": 0, ...} e {"GRU-SCL": 0, ...}) são
+convertidos no carregamento em:
+- uma tabela de companhias (nome normalizado → código);
+- um índice de aeroportos e uma tabela 2D origem x destino de códigos de
+  rota, sem montar a string "ORIG-DEST" a cada requisição.
+
+A consulta tenta primeiro a string como veio (normalmente já em
+maiúsculas) e só chama .upper() se não encontrar.
+
+As versões vetorizadas aceitam arrays de strings ou uma coluna já
+codificada em dicionário (Categorical, ex.: vinda do Arrow): nos dois
+casos só os valores distintos passam pelas tabelas.
+
+A tabela de rotas também pode vir pronta (ex.: mapeada de um artefato
+compacto); nesse caso ela é usada como está, sem cópia por worker.
+"""
+
+import sys
+from typing import NamedTuple
+
+import numpy as np
+
+UNKNOWN_KEY = "UNKNOWN"
+
+
+class Categorical(NamedTuple):
+    """Coluna de texto codificada em dicionário: valores distintos + índice (em values) de cada linha"""
+    values: list
+    indices: np.ndarray
+
+
+def _distinct(values) -> tuple:
+    """(valores distintos como lista, índice de cada linha)"""
+    if isinstance(values, Categorical):
+        return values.values, values.indices
+    unique, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    return unique.tolist(), inverse.reshape(-1)
+
+
+class CompiledEncoders:
+    """Tabelas de consulta de companhia e rota montadas a partir dos encoders JSON"""
+
+    def __init__(self, airline_encoder: dict, airport_pair_encoder: dict, airports=None, route_table=None):
+        self.airline_default = airline_encoder.get(UNKNOWN_KEY, 0)
+        self.route_default = airport_pair_encoder.get(UNKNOWN_KEY, 0)
+
+        self.airline_codes = {
+            sys.intern(name.strip().upper()): code
+            for name, code in airline_encoder.items() if name != UNKNOWN_KEY
+        }
+
+        # Índice de aeroportos (origens e destinos compartilham o mesmo índice)
+        pairs = []
+        for key, code in airport_pair_encoder.items():
+            if key == UNKNOWN_KEY or "-" not in key:
+                continue
+            origin, destination = key.strip().upper().split("-", 1)
+            pairs.append((origin, destination, code))
+
+        self._route_keys = frozenset(f"{o}-{d}" for o, d, _ in pairs)
+
+        if route_table is not None:
+            if route_table.shape != (len(airports) + 1, len(airports) + 1):
+                raise ValueError(f"Tabela de rotas {route_table.shape} não confere com {len(airports)} aeroportos")
+            self.airport_index = {sys.intern(airport): i for i, airport in enumerate(airports)}
+            self.route_table = route_table
+            # Sem lista Python: ela seria uma cópia privada em cada worker
+            self._route_rows = None
+            return
+
+        airports = sorted({a for o, d, _ in pairs for a in (o, d)})
+        self.airport_index = {sys.intern(airport): i for i, airport in enumerate(airports)}
+
+        # Linha/coluna extra (índice -1) para aeroporto desconhecido
+        size = len(airports) + 1
+        self.route_table = np.full((size, size), self.route_default, dtype=np.int64)
+        for origin, destination, code in pairs:
+            self.route_table[self.airport_index[origin], self.airport_index[destination]] = code
+        self._route_rows = self.route_table.tolist()
+
+    def _airport(self, airport: str) -> int:
+        index = self.airport_index.get(airport)
+        if index is None:
+            index = self.airport_index.get(airport.upper(), -1)
+        return index
+
+    def airline(self, name: str) -> int:
+        """Código da companhia (default UNKNOWN)"""
+        code = self.airline_codes.get(name)
+        if code is None:
+            code = self.airline_codes.get(name.upper(), self.airline_default)
+        return code
+
+    def route(self, origin: str, destination: str) -> int:
+        """Código do par origem-destino (default UNKNOWN)"""
+        if self._route_rows is None:
+            return self.route_table.item(self._airport(origin), self._airport(destination))
+        return self._route_rows[self._airport(origin)][self._airport(destination)]
+
+    def explain(self, airline: str, origin: str, destination: str) -> dict:
+        """Códigos usados e se cada valor existia no encoder (False = caiu no UNKNOWN)"""
+        origin_index, destination_index = self._airport(origin), self._airport(destination)
+        route_code = self.route(origin, destination)
+        airline_found = airline in self.airline_codes or airline.upper() in self.airline_codes
+        return {
+            "companhia": {"valor": airline, "codigo": self.airline(airline), "encontrada": airline_found},
+            "origem": {"valor": origin, "conhecido": origin_index != -1},
+            "destino": {"valor": destination, "conhecido": destination_index != -1},
+            # Rota com os dois aeroportos conhecidos ainda pode não existir no encoder
+            "rota": {"valor": f"{origin}-{destination}", "codigo": route_code,
+                     "encontrada": origin_index != -1 and destination_index != -1
+                     and f"{origin.upper()}-{destination.upper()}" in self._route_keys},
+        }
+
+    def airlines(self, names) -> np.ndarray:
+        """Versão vetorizada de airline(): uma consulta por valor distinto"""
+        unique, inverse = _distinct(names)
+        codes = np.array([self.airline(name) for name in unique], dtype=np.int64)
+        return codes[inverse]
+
+    def airport_indexes(self, airports) -> np.ndarray:
+        unique, inverse = _distinct(airports)
+        indexes = np.array([self._airport(airport) for airport in unique], dtype=np.int64)
+        return indexes[inverse]
+
+    def routes(self, origins, destinations) -> np.ndarray:
+        """Versão vetorizada de route(): índice na tabela 2D para todas as linhas"""
+        return self.route_table[self.airport_indexes(origins), self.airport_indexes(destinations)]
+
+    def stats(self) -> dict:
+        return {
+            "airlines": len(self.airline_codes),
+            "airports": len(self.airport_index),
+            "routes_table_bytes": int(self.route_table.nbytes),
+        }
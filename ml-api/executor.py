@@ -0,0 +1,144 @@
+"""
+Execução da inferência fora do event loop.
+
+Backends (INFERENCE_BACKEND):
+- inline: roda no próprio event loop (modelos triviais, sem overhead);
+- thread: pool de threads limitado (NumPy/sklearn liberam o GIL nas contas);
+- process: pool de processos (spawn) para modelos pesados em Python puro.
+
+Trabalhos com menos de INFERENCE_OFFLOAD_MIN_ROWS linhas rodam inline em
+qualquer backend, exceto os marcados heavy (predict_proba do sklearn, sem
+scorer NumPy), que vão sempre para o pool. Acima de INFERENCE_MAX_PENDING trabalhos em andamento o
+executor recusa com ExecutorSaturated (o app responde 503 + Retry-After),
+para /health e requisições baratas continuarem respondendo.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from deadline import DeadlineExceeded, call_before_deadline, check, dropped
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("inline", "thread", "process")
+
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "thread").lower()
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", "32"))
+INFERENCE_OFFLOAD_MIN_ROWS = int(os.getenv("INFERENCE_OFFLOAD_MIN_ROWS", "256"))
+
+
+class ExecutorSaturated(Exception):
+    """Fila do executor cheia; retry_after é a espera estimada em segundos"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Executor de inferência saturado (tente novamente em {retry_after:.1f}s)")
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """Executa funções de inferência inline ou num pool limitado, com backpressure"""
+
+    def __init__(self, backend: str = INFERENCE_BACKEND, workers: int = INFERENCE_WORKERS,
+                 max_pending: int = INFERENCE_MAX_PENDING, offload_min_rows: int = INFERENCE_OFFLOAD_MIN_ROWS):
+        """
+        Args:
+            backend: "inline", "thread" ou "process"
+            workers: tamanho do pool
+            max_pending: trabalhos no pool (rodando + esperando) antes de recusar
+            offload_min_rows: trabalhos menores que isso rodam inline
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend de inferência desconhecido: {backend} (disponíveis: {BACKENDS})")
+        if workers < 1 or max_pending < 1:
+            raise ValueError(f"workers e max_pending devem ser >= 1: {workers}, {max_pending}")
+
+        self.backend = backend
+        self.workers = workers
+        self.max_pending = max_pending
+        self.offload_min_rows = offload_min_rows
+        self._pool = None
+
+        self.in_flight = 0
+        self.inline_jobs = 0
+        self.offloaded_jobs = 0
+        self.rejected = 0
+        self.max_in_flight_seen = 0
+        self.avg_job_seconds = 0.0     # média móvel exponencial dos trabalhos no pool
+
+    def start(self):
+        if self.backend == "thread":
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="inference")
+        elif self.backend == "process":
+            # spawn: o processo da API tem threads (logging, registry), fork não é seguro
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        logger.info(f"🧵 Inferência: backend {self.backend}, {self.workers} workers, "
+                    f"fila até {self.max_pending}, inline abaixo de {self.offload_min_rows} linhas")
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Trabalhos esperando um worker livre (estimativa: em andamento além do tamanho do pool)"""
+        return max(0, self.in_flight - self.workers)
+
+    def retry_after(self) -> float:
+        """Espera estimada até a fila andar, em segundos (mínimo 1)"""
+        waves = (self.in_flight + 1) / self.workers
+        return max(1.0, round(waves * self.avg_job_seconds, 1))
+
+    async def run(self, fn, *args, rows: int = 1, deadline: float = None, heavy: bool = False):
+        """
+        fn(*args) inline ou no pool, conforme backend e tamanho do trabalho
+
+        Com deadline (time.monotonic), o trabalho é descartado se vencer antes
+        de começar, inclusive enquanto espera um worker livre no pool.
+        Com heavy, vai para o pool mesmo abaixo de offload_min_rows.
+        Para o backend "process", fn e args precisam ser serializáveis (pickle).
+        """
+        check("executor", deadline)
+        if self._pool is None or (rows < self.offload_min_rows and not heavy):
+            self.inline_jobs += 1
+            return fn(*args)
+
+        if self.in_flight >= self.max_pending:
+            self.rejected += 1
+            raise ExecutorSaturated(self.retry_after())
+
+        self.in_flight += 1
+        self.max_in_flight_seen = max(self.max_in_flight_seen, self.in_flight)
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._pool, call_before_deadline, deadline, "executor_queue", fn, *args
+            )
+        except DeadlineExceeded as e:
+            dropped[e.stage] += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.offloaded_jobs += 1
+            elapsed = time.perf_counter() - start
+            self.avg_job_seconds = elapsed if self.offloaded_jobs == 1 else 0.9 * self.avg_job_seconds + 0.1 * elapsed
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "offload_min_rows": self.offload_min_rows,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_in_flight_seen": self.max_in_flight_seen,
+            "inline_jobs": self.inline_jobs,
+            "offloaded_jobs": self.offloaded_jobs,
+            "rejected": self.rejected,
+            "avg_job_ms": round(self.avg_job_seconds * 1000, 3),
+        }
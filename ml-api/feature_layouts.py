@@ -0,0 +1,196 @@
+"""
+Layouts de features por modelo.
+
+Os apps antigos diferiam só na ordem/quantidade de features:
+- app.py: 6 features (turno, companhia, rota, distância, dia, mês) + zeros;
+- app_final.py / app_flexible.py: as mesmas 6 + hora_do_dia como 7ª.
+
+Cada layout é uma lista de nomes de colunas. FeatureAdapter compila o
+layout para um modelo específico (já cortado/completado até
+n_features_expected) e gera uma linha (/predict) ou a matriz inteira.
+
+A matriz sai sempre de raw_columns: FlightRequest (/predict/batch e
+/predict/stream), DataFrame (batch_score.py e o treino em
+datascience/3_development/code/transform_simple.py) e Arrow chegam lá
+como colunas. Hora, dia da semana e mês vêm de aritmética de datetime64,
+e companhias e rotas passam pelos encoders uma vez por valor distinto.
+O treino importa este módulo porque o build Docker só enxerga a ml-api/.
+"""
+
+import numpy as np
+
+from encoders import Categorical
+
+# Extratores: nome → (valor de um voo, coluna de vários voos)
+# Os vetorizados recebem um dicionário de colunas já extraídas dos voos.
+FEATURE_EXTRACTORS = {
+    "turno": (
+        lambda flight, encoders: 0 if flight.data_hora_partida.hour < 12 else 1,
+        lambda cols, encoders: (cols["hora"] >= 12).astype(np.int64),
+    ),
+    "companhia": (
+        lambda flight, encoders: encoders.airline(flight.companhia_aerea),
+        lambda cols, encoders: encoders.airlines(cols["companhia_aerea"]),
+    ),
+    "rota": (
+        lambda flight, encoders: encoders.route(flight.aeroporto_origem, flight.aeroporto_destino),
+        lambda cols, encoders: encoders.routes(cols["aeroporto_origem"], cols["aeroporto_destino"]),
+    ),
+    "distancia_norm": (
+        lambda flight, encoders: min(float(flight.distancia_km) / 10000.0, 1.0),
+        lambda cols, encoders: np.minimum(cols["distancia_km"] / 10000.0, 1.0),
+    ),
+    "dia_semana": (
+        lambda flight, encoders: flight.data_hora_partida.weekday(),
+        lambda cols, encoders: cols["dia_semana"],
+    ),
+    "mes": (
+        lambda flight, encoders: flight.data_hora_partida.month,
+        lambda cols, encoders: cols["mes"],
+    ),
+    "hora_do_dia": (
+        lambda flight, encoders: flight.data_hora_partida.hour,
+        lambda cols, encoders: cols["hora"],
+    ),
+}
+
+LAYOUTS = {
+    # app.py
+    "padded6": ["turno", "companhia", "rota", "distancia_norm", "dia_semana", "mes"],
+    # app_final.py / app_flexible.py
+    "hour7": ["turno", "companhia", "rota", "distancia_norm", "dia_semana", "mes", "hora_do_dia"],
+}
+
+DISTANCE_FEATURE = "distancia_norm"
+
+
+def departure_columns(departures: np.ndarray) -> dict:
+    """hora, dia_semana (0=segunda) e mes de um array datetime64 (hora local), só com aritmética de datas"""
+    minutes = departures.astype("datetime64[m]")
+    days = minutes.astype("datetime64[D]")
+    return {
+        "hora": (minutes - days).astype(np.int64) // 60,
+        "dia_semana": (days.astype(np.int64) + 3) % 7,     # 1970-01-01 foi uma quinta (3)
+        "mes": days.astype("datetime64[M]").astype(np.int64) % 12 + 1,
+    }
+
+
+def raw_columns(companhias, origens, destinos, departures: np.ndarray, distancias) -> dict:
+    """
+    Colunas dos extratores vetorizados a partir dos 5 campos de entrada
+
+    Ponto único de entrada do pipeline em colunas: /predict/batch, /predict/stream,
+    /predict/arrow, batch_score.py e o treinamento (transform_simple.py) passam por aqui.
+    Textos podem ser arrays/listas ou Categorical; departures é datetime64 sem fuso.
+    """
+    return {
+        "companhia_aerea": companhias,
+        "aeroporto_origem": origens,
+        "aeroporto_destino": destinos,
+        "distancia_km": np.asarray(distancias, dtype=np.float64),
+        **departure_columns(departures),
+    }
+
+
+# Dias do calendário gregoriano (date.toordinal) até 1970-01-01
+_EPOCH_ORDINAL = 719163
+
+
+def _minutes(departure) -> int:
+    # Hora local (com fuso, como .hour no /predict); np.array(datetimes) é ~15x mais lento
+    return (departure.toordinal() - _EPOCH_ORDINAL) * 1440 + departure.hour * 60 + departure.minute
+
+
+def _categorical(values: list) -> Categorical:
+    """Categorical de strings Python por hash (sem ordenar, ao contrário de np.unique)"""
+    codes = {value: i for i, value in enumerate(dict.fromkeys(values))}
+    return Categorical(list(codes), np.fromiter(map(codes.__getitem__, values), dtype=np.int64, count=len(values)))
+
+
+def flight_columns(flights) -> dict:
+    """Colunas a partir de uma lista de FlightRequest"""
+    n = len(flights)
+    departures = np.fromiter(map(_minutes, [flight.data_hora_partida for flight in flights]), dtype=np.int64, count=n)
+    return raw_columns(
+        _categorical([flight.companhia_aerea for flight in flights]),
+        _categorical([flight.aeroporto_origem for flight in flights]),
+        _categorical([flight.aeroporto_destino for flight in flights]),
+        departures.view("datetime64[m]"),
+        np.fromiter([flight.distancia_km for flight in flights], dtype=np.float64, count=n),
+    )
+
+
+def _factorized(series) -> Categorical:
+    codes, uniques = series.factorize()
+    return Categorical([str(value) for value in uniques], codes)
+
+
+def frame_columns(frame) -> dict:
+    """Colunas a partir de um DataFrame (data_hora_partida já em datetime64, com ou sem fuso)"""
+    departures = frame["data_hora_partida"]
+    if departures.dt.tz is not None:
+        departures = departures.dt.tz_localize(None)
+    return raw_columns(
+        _factorized(frame["companhia_aerea"]),
+        _factorized(frame["aeroporto_origem"]),
+        _factorized(frame["aeroporto_destino"]),
+        departures.to_numpy(),
+        frame["distancia_km"].to_numpy(dtype=np.float64),
+    )
+
+
+class FeatureAdapter:
+    """Layout compilado para um modelo: colunas na ordem certa, cortadas ou completadas com zeros"""
+
+    def __init__(self, layout: str, n_features_expected: int, encoders):
+        if layout not in LAYOUTS:
+            raise ValueError(f"Layout desconhecido: {layout} (disponíveis: {sorted(LAYOUTS)})")
+
+        self.layout = layout
+        self.n_features = n_features_expected
+        self.encoders = encoders
+        self.columns = LAYOUTS[layout][:n_features_expected]
+        self.padding = n_features_expected - len(self.columns)
+        self._row_extractors = tuple(FEATURE_EXTRACTORS[name][0] for name in self.columns)
+        self._column_extractors = tuple(FEATURE_EXTRACTORS[name][1] for name in self.columns)
+
+    @property
+    def feature_names(self) -> list:
+        return self.columns + [f"padding_{i}" for i in range(self.padding)]
+
+    @property
+    def distance_index(self):
+        return self.columns.index(DISTANCE_FEATURE) if DISTANCE_FEATURE in self.columns else None
+
+    def row(self, flight) -> list:
+        """Vetor de features de um voo"""
+        encoders = self.encoders
+        features = [extract(flight, encoders) for extract in self._row_extractors]
+        if self.padding:
+            features.extend([0] * self.padding)
+        return features
+
+    def matrix(self, flights, dtype=np.float64) -> np.ndarray:
+        """Matriz de features (uma linha por voo), igual a empilhar row() de cada voo"""
+        return self.matrix_from_columns(flight_columns(flights), len(flights), dtype)
+
+    def matrix_from_columns(self, columns: dict, n_rows: int, dtype=np.float64) -> np.ndarray:
+        """Matriz de features a partir de colunas já extraídas (flight_columns ou frame_columns)"""
+        features_matrix = np.zeros((n_rows, self.n_features), dtype=dtype)
+        for i, extract in enumerate(self._column_extractors):
+            features_matrix[:, i] = extract(columns, self.encoders)
+        return features_matrix
+
+    def categorical_domains(self, airline_encoder: dict, airport_pair_encoder: dict) -> dict:
+        """Valores possíveis das features categóricas (posição no vetor → valores)"""
+        domains_by_name = {
+            "turno": [0, 1],
+            "companhia": list(airline_encoder.values()) + [0],      # 0 se não houver UNKNOWN
+            "rota": list(airport_pair_encoder.values()) + [0],
+            "dia_semana": range(7),
+            "mes": range(1, 13),
+            "hora_do_dia": range(24),
+        }
+        return {
+            i: domains_by_name[name] for i, name in enumerate(self.columns) if name in domains_by_name
+        }
@@ -0,0 +1,173 @@
+"""
+Inferência em passo único para os modelos de atraso.
+
+O modelo calcula as probabilidades uma única vez e o rótulo é derivado
+delas usando o threshold ajustado no treinamento (optimal_threshold.json),
+em vez do 0.5 implícito do model.predict().
+
+Para regressão logística binária, LogisticScorer extrai coef_/intercept_
+no carregamento e pontua com NumPy puro, sem a validação do sklearn.
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.5
+THRESHOLD_PATH = os.getenv("THRESHOLD_PATH", "optimal_threshold.json")
+SCORER_DTYPE = np.dtype(os.getenv("SCORER_DTYPE", "float64"))
+
+
+def load_threshold(path: str = THRESHOLD_PATH) -> float:
+    """Threshold de decisão: DECISION_THRESHOLD > arquivo JSON > 0.5"""
+    env_threshold = os.getenv("DECISION_THRESHOLD")
+    if env_threshold:
+        threshold = float(env_threshold)
+        logger.info(f"🎚️ Threshold via DECISION_THRESHOLD: {threshold}")
+    elif os.path.exists(path):
+        with open(path, 'r') as f:
+            threshold = float(json.load(f)["optimal_threshold"])
+        logger.info(f"🎚️ Threshold de {path}: {threshold}")
+    else:
+        threshold = DEFAULT_THRESHOLD
+        logger.warning(f"⚠️ {path} não encontrado, usando threshold {threshold}")
+
+    if not 0.0 < threshold < 1.0:
+        raise ValueError(f"Threshold inválido: {threshold} (esperado entre 0 e 1)")
+
+    return threshold
+
+
+def sigmoid(z: np.ndarray) -> np.ndarray:
+    """Sigmoide numericamente estável (sem overflow para |z| grande)"""
+    return np.exp(-np.logaddexp(0.0, -z))
+
+
+def sigmoid_scalar(z: float) -> float:
+    """Sigmoide estável para um único float (sem passar pelo NumPy)"""
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    exp_z = math.exp(z)
+    return exp_z / (1.0 + exp_z)
+
+
+class LogisticScorer:
+    """
+    Regressão logística binária em NumPy: sigmoide(escala * (x · coef + intercept)).
+
+    A escala existe porque versões diferentes do sklearn calculam o
+    predict_proba binário de formas diferentes: expit(d) (OvR) ou
+    softmax([-d, d]) = expit(2d) (multinomial). from_model() descobre
+    qual delas o modelo carregado usa, para reproduzir o predict_proba.
+    """
+
+    def __init__(self, coef, intercept, classes, link_scale: float = 1.0, dtype=SCORER_DTYPE):
+        self.dtype = np.dtype(dtype)
+        self.coef = np.ascontiguousarray(np.ravel(coef), dtype=self.dtype)
+        self.intercept = float(intercept)
+        self.classes_ = np.asarray(classes)
+        self.link_scale = float(link_scale)
+        self.n_features = self.coef.size
+        self._local = threading.local()
+
+    def __getstate__(self):
+        # O buffer por thread não vai junto (ex.: envio para o pool de processos)
+        state = self.__dict__.copy()
+        del state['_local']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    @classmethod
+    def from_model(cls, model, dtype=SCORER_DTYPE) -> "LogisticScorer":
+        """Extrair os coeficientes de um LogisticRegression binário já treinado"""
+        coef = getattr(model, 'coef_', None)
+        intercept = getattr(model, 'intercept_', None)
+        classes = getattr(model, 'classes_', None)
+
+        if coef is None or intercept is None or classes is None or not hasattr(model, 'predict_proba'):
+            raise ValueError(f"Modelo sem coef_/intercept_/predict_proba: {type(model).__name__}")
+        if len(classes) != 2 or np.shape(coef)[0] != 1:
+            raise ValueError(f"Apenas classificação binária é suportada ({len(classes)} classes)")
+
+        scorer = cls(coef, np.ravel(intercept)[0], classes, dtype=dtype)
+        scorer.link_scale = _detect_link_scale(model, scorer)
+        return scorer
+
+    def _buffer(self) -> np.ndarray:
+        """Buffer de features pré-alocado, um por thread"""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = self._local.buffer = np.empty(self.n_features, dtype=self.dtype)
+        return buffer
+
+    def decision_function(self, features_array: np.ndarray) -> np.ndarray:
+        """Logit (x · coef + intercept) para uma matriz de features"""
+        features_array = np.asarray(features_array, dtype=self.dtype)
+        return features_array @ self.coef + self.intercept
+
+    def predict_proba_positive(self, features_array: np.ndarray) -> np.ndarray:
+        """Probabilidade da classe positiva para uma matriz de features"""
+        return sigmoid(self.link_scale * self.decision_function(features_array))
+
+    def predict_one(self, features, threshold: float):
+        """(atraso, probabilidade) de um único voo, reaproveitando o buffer"""
+        buffer = self._buffer()
+        buffer[:] = features
+        probability = sigmoid_scalar(self.link_scale * (float(buffer @ self.coef) + self.intercept))
+        return probability >= threshold, probability
+
+
+def _detect_link_scale(model, scorer: LogisticScorer) -> float:
+    """Comparar com o predict_proba do sklearn para descobrir a escala do logit"""
+    probe = np.vstack([
+        np.ones(scorer.n_features),
+        np.arange(scorer.n_features, dtype=float) / scorer.n_features,
+    ])
+    expected = model.predict_proba(probe)[:, 1]
+    z = probe @ np.asarray(model.coef_, dtype=float)[0] + float(np.ravel(model.intercept_)[0])
+
+    for scale in (1.0, 2.0):
+        if np.allclose(sigmoid(scale * z), expected, rtol=0, atol=1e-9):
+            return scale
+
+    raise ValueError("predict_proba do modelo não corresponde a uma sigmoide do logit")
+
+
+def build_scorer(model):
+    """LogisticScorer para o modelo, ou None se ele não for suportado"""
+    try:
+        scorer = LogisticScorer.from_model(model)
+    except ValueError as e:
+        logger.warning(f"⚠️ Scorer NumPy indisponível, usando sklearn: {e}")
+        return None
+
+    logger.info(f"⚡ Scorer NumPy ativo ({scorer.n_features} coeficientes, {scorer.dtype}, escala {scorer.link_scale:g})")
+    return scorer
+
+
+def predict_with_threshold(model, features_array: np.ndarray, threshold: float):
+    """
+    Calcular (rótulos, probabilidades de atraso) para uma matriz de features
+    com uma única passada pelo modelo (sklearn ou LogisticScorer).
+    """
+    if isinstance(model, LogisticScorer):
+        probabilities = model.predict_proba_positive(features_array)
+        predictions = probabilities >= threshold
+    elif hasattr(model, 'predict_proba') and len(model.classes_) == 2:
+        probabilities = model.predict_proba(features_array)[:, 1]
+        predictions = probabilities >= threshold
+    else:
+        # Sem probabilidades: usar o predict e valores fixos (comportamento antigo)
+        predictions = model.predict(features_array) == 1
+        probabilities = np.where(predictions, 0.8, 0.2)
+
+    return predictions, probabilities
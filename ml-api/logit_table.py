@@ -0,0 +1,120 @@
+"""
+Tabela de logits pré-calculada para modelos lineares.
+
+Com 6 das 7 features categóricas (ou ordinais com domínio pequeno), o
+logit parcial de cada combinação (turno, companhia, rota, dia, mês, ...)
+é calculado no carregamento do modelo e guardado num array contíguo.
+A predição vira: índice na tabela + termos contínuos (distância) + sigmoide.
+
+Se o produto dos domínios não couber em LOGIT_TABLE_MAX_MB (ex.: milhares
+de rotas x dezenas de companhias), a tabela é montada separada por feature
+(uma linha por feature, somadas na consulta). Para um modelo linear as
+duas formas dão exatamente o mesmo logit.
+"""
+
+import logging
+import math
+import os
+
+import numpy as np
+
+from inference import sigmoid_scalar
+
+logger = logging.getLogger(__name__)
+
+LOGIT_TABLE_ENABLED = os.getenv("LOGIT_TABLE_ENABLED", "true").lower() in ("1", "true", "yes")
+LOGIT_TABLE_MAX_MB = float(os.getenv("LOGIT_TABLE_MAX_MB", "64"))
+
+
+class LogitTable:
+    """Logits parciais pré-calculados para as features categóricas de um LogisticScorer"""
+
+    def __init__(self, scorer, domains: dict, max_bytes: float = LOGIT_TABLE_MAX_MB * 1024 * 1024):
+        """
+        Args:
+            scorer: LogisticScorer com coeficientes, intercept e escala do logit
+            domains: {índice da feature: valores possíveis} das features categóricas
+            max_bytes: limite para a tabela combinada; acima disso usa tabelas por feature
+        """
+        self.scorer = scorer
+        self.indexes = sorted(domains)
+        self.values = [sorted(set(domains[i])) for i in self.indexes]
+        self.positions = [{value: pos for pos, value in enumerate(values)} for values in self.values]
+        self.continuous = [i for i in range(scorer.n_features) if i not in domains]
+
+        coef = scorer.coef.astype(np.float64)
+        self.continuous_coef = [float(coef[i]) for i in self.continuous]
+        partials = [coef[i] * np.array(values, dtype=np.float64) for i, values in zip(self.indexes, self.values)]
+
+        shape = tuple(len(values) for values in self.values)
+        combined_bytes = math.prod(shape) * np.dtype(np.float64).itemsize
+
+        if combined_bytes <= max_bytes:
+            # Soma por broadcasting: table[i0, i1, ...] = intercept + Σ coef_k * valor_k
+            table = np.full(shape, scorer.intercept, dtype=np.float64)
+            for axis, partial in enumerate(partials):
+                table += partial.reshape([-1 if a == axis else 1 for a in range(len(shape))])
+            self.mode = "combined"
+            self.table = np.ascontiguousarray(table).ravel()
+            self.strides = [int(np.prod(shape[axis + 1:])) for axis in range(len(shape))]
+        else:
+            # Uma tabela por feature, concatenadas num único array
+            self.mode = "separable"
+            self.table = np.concatenate(partials) if partials else np.empty(0)
+            self.offsets = np.cumsum([0] + [len(p) for p in partials[:-1]]).tolist()
+
+        # Acesso rápido por índice Python no caminho de uma linha
+        self._table_list = self.table.tolist()
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.table.nbytes)
+
+    def logit(self, features):
+        """Logit (já sem escala) do vetor de features, ou None se algum valor estiver fora da tabela"""
+        table = self._table_list
+
+        try:
+            if self.mode == "combined":
+                flat = 0
+                for index, positions, stride in zip(self.indexes, self.positions, self.strides):
+                    flat += positions[features[index]] * stride
+                z = table[flat]
+            else:
+                z = self.scorer.intercept
+                for index, positions, offset in zip(self.indexes, self.positions, self.offsets):
+                    z += table[offset + positions[features[index]]]
+        except KeyError:
+            return None
+
+        for index, coef in zip(self.continuous, self.continuous_coef):
+            z += coef * features[index]
+        return z
+
+    def predict_one(self, features, threshold: float):
+        """(atraso, probabilidade) do vetor, ou None se precisar do scorer"""
+        z = self.logit(features)
+        if z is None:
+            return None
+
+        probability = sigmoid_scalar(self.scorer.link_scale * z)
+        return probability >= threshold, probability
+
+    def stats(self) -> dict:
+        return {
+            "enabled": True,
+            "mode": self.mode,
+            "entries": int(self.table.size),
+            "bytes": self.nbytes,
+            "domain_sizes": {str(i): len(values) for i, values in zip(self.indexes, self.values)},
+        }
+
+
+def build_logit_table(scorer, domains: dict):
+    """LogitTable para o scorer, ou None se desativada/indisponível"""
+    if not LOGIT_TABLE_ENABLED or scorer is None:
+        return None
+
+    table = LogitTable(scorer, domains)
+    logger.info(f"🧮 Tabela de logits ({table.mode}): {table.table.size} entradas, {table.nbytes / 1024:.1f} KiB")
+    return table
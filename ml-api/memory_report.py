@@ -0,0 +1,114 @@
+"""
+Memória por processo a partir de /proc/<pid>/smaps_rollup (Linux).
+
+Rss conta as páginas compartilhadas em cada processo; Pss divide cada
+página compartilhada pelo número de processos que a usam. Com workers
+pré-fork, Shared_* alto e Pss bem abaixo do Rss confirmam que o modelo
+carregado no master está sendo compartilhado copy-on-write.
+
+mapped_files() faz a mesma conta só para os arquivos mapeados com mmap
+(artefatos compactos), a partir de /proc/<pid>/smaps: páginas desses
+arquivos vêm do page cache e aparecem como Shared_Clean em todo worker.
+"""
+
+import os
+import re
+
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty", "Swap")
+
+
+def process_memory(pid="self") -> dict:
+    """Memória do processo em MB ({} fora do Linux ou se o processo não existir)"""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in FIELDS:
+                    values[key] = int(rest.split()[0])   # kB
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return {}
+
+    if not values:
+        return {}
+
+    return _summarize(values)
+
+
+_MAPPING_HEADER = re.compile(r"^[0-9a-f]+-[0-9a-f]+ \S+ \S+ \S+ \S+\s*(.*)$")
+
+
+def _summarize(values: dict) -> dict:
+    kb = lambda key: values.get(key, 0)
+    return {
+        "rss_mb": round(kb("Rss") / 1024, 2),
+        "pss_mb": round(kb("Pss") / 1024, 2),
+        "shared_mb": round((kb("Shared_Clean") + kb("Shared_Dirty")) / 1024, 2),
+        "private_mb": round((kb("Private_Clean") + kb("Private_Dirty")) / 1024, 2),
+        "swap_mb": round(kb("Swap") / 1024, 2),
+    }
+
+
+def mapped_files(paths, pid="self") -> dict:
+    """Memória residente/compartilhada em kB de cada arquivo mapeado ({} se não disponível)"""
+    wanted = {os.path.realpath(path) for path in paths}
+    totals = {}
+    current = None
+    try:
+        with open(f"/proc/{pid}/smaps") as f:
+            for line in f:
+                header = _MAPPING_HEADER.match(line)
+                if header:
+                    path = header.group(1).strip()
+                    current = totals.setdefault(path, {}) if path in wanted else None
+                    continue
+                if current is not None:
+                    key, _, rest = line.partition(":")
+                    if key in FIELDS:
+                        current[key] = current.get(key, 0) + int(rest.split()[0])   # kB
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return {}
+
+    kb = lambda values, *keys: sum(values.get(key, 0) for key in keys)
+    return {
+        path: {
+            "rss_kb": kb(values, "Rss"),
+            "pss_kb": kb(values, "Pss"),
+            "shared_kb": kb(values, "Shared_Clean", "Shared_Dirty"),
+            "private_kb": kb(values, "Private_Clean", "Private_Dirty"),
+        }
+        for path, values in totals.items()
+    }
+
+
+def format_mapped_report(rows: dict) -> str:
+    """Tabela {rótulo: mapped_files()} somada por processo: quanto dos artefatos é residente e compartilhado"""
+    lines = [f"{'processo':<20}{'rss':>10}{'pss':>10}{'shared':>10}{'private':>10}  (kB, artefatos mapeados)"]
+    for label, files in rows.items():
+        total = {key: sum(memory[key] for memory in files.values()) for key in ("rss_kb", "pss_kb", "shared_kb", "private_kb")}
+        lines.append(f"{label:<20}{total['rss_kb']:>10}{total['pss_kb']:>10}{total['shared_kb']:>10}{total['private_kb']:>10}")
+    return "\n".join(lines)
+
+
+def format_report(rows: dict) -> str:
+    """Tabela {rótulo: process_memory()} para o log"""
+    lines = [f"{'processo':<20}{'rss':>10}{'pss':>10}{'shared':>10}{'private':>10}  (MB)"]
+    totals = {"rss_mb": 0.0, "pss_mb": 0.0}
+    for label, memory in rows.items():
+        if not memory:
+            lines.append(f"{label:<20}{'?':>10}")
+            continue
+        lines.append(f"{label:<20}{memory['rss_mb']:>10.1f}{memory['pss_mb']:>10.1f}"
+                     f"{memory['shared_mb']:>10.1f}{memory['private_mb']:>10.1f}")
+        totals["rss_mb"] += memory["rss_mb"]
+        totals["pss_mb"] += memory["pss_mb"]
+    lines.append(f"{'soma':<20}{totals['rss_mb']:>10.1f}{totals['pss_mb']:>10.1f}"
+                 f"   (memória real ≈ soma do pss)")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import sys
+
+    pids = sys.argv[1:] or [str(os.getpid())]
+    print(format_report({f"pid {pid}": process_memory(pid) for pid in pids}))
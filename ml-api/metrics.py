@@ -0,0 +1,335 @@
+"""
+Métricas no formato texto do Prometheus, sem dependências externas.
+
+- Histogramas de latência por estágio do /predict (parse, prepare_features,
+  inference, serialization), com buckets fixos e incremento O(log n).
+- Contadores de requisições e erros, gauge de requisições em andamento e
+  info da versão de cada modelo carregado. Cliente que desconecta antes da
+  resposta conta como 499 (client_closed), não como erro 5xx.
+
+Um middleware ASGI puro abre um RequestTimer por requisição (num
+contextvar); os handlers só marcam os estágios que executam.
+"""
+
+import asyncio
+import contextvars
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+# Limites superiores dos buckets em segundos (0.1 ms … 2.5 s, o orçamento da requisição)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Status registrado quando o cliente desconecta antes da resposta (convenção do nginx)
+CLIENT_CLOSED_STATUS = 499
+
+_current_timer = contextvars.ContextVar("request_timer", default=None)
+
+
+class Histogram:
+    """Histograma cumulativo estilo Prometheus para uma combinação de labels"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # último = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float):
+        """Estimativa pelo limite superior do bucket (None sem observações)"""
+        if not self.count:
+            return None
+        target = q * self.count
+        running = 0
+        for bound, n in zip(self.buckets, self.counts):
+            running += n
+            if running >= target:
+                return bound
+        return float("inf")
+
+
+class RequestTimer:
+    """Marcas de tempo de uma requisição; os estágios são gravados no fim"""
+
+    __slots__ = ("start", "handler_start", "handler_end", "stages", "model", "version")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.handler_start = None
+        self.handler_end = None
+        self.stages = []
+        self.model = None
+        self.version = None
+
+    def stage(self, name: str):
+        return _Stage(self, name)
+
+
+class _Stage:
+    __slots__ = ("timer", "name", "t0")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.stages.append((self.name, time.perf_counter() - self.t0))
+        return False
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def current_timer():
+    """RequestTimer da requisição em andamento (None fora do middleware)"""
+    return _current_timer.get()
+
+
+def handler_started(model: str = None, version: str = None):
+    """Marca o início do handler: tudo antes disso conta como parse"""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.handler_start = time.perf_counter()
+        timer.model = model
+        timer.version = version
+
+
+def handler_finished():
+    """Marca o fim do handler: tudo depois disso (até enviar a resposta) é serialization"""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.handler_end = time.perf_counter()
+
+
+def stage(name: str):
+    """Context manager que mede um estágio da requisição atual (no-op fora do middleware)"""
+    timer = _current_timer.get()
+    return timer.stage(name) if timer is not None else _NULL_STAGE
+
+
+class Metrics:
+    """Contadores, gauges e histogramas do processo"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.requests = defaultdict(int)       # (endpoint, method, status) -> n
+        self.errors = defaultdict(int)         # (endpoint, kind) -> n
+        self.predictions = defaultdict(int)    # (model, version) -> n
+        self.model_errors = defaultdict(int)   # model -> n (predições que caíram no fallback)
+        self.in_flight = 0
+        self.stages = defaultdict(lambda: Histogram(self.buckets))    # (endpoint, stage) -> h
+        self.latency = defaultdict(lambda: Histogram(self.buckets))   # endpoint -> h
+        self.started_at = time.time()
+
+    def record_error(self, endpoint: str, kind: str):
+        self.errors[(endpoint, kind)] += 1
+
+    def record_model_error(self, model: str):
+        self.model_errors[model] += 1
+
+    def record(self, endpoint: str, method: str, status: int, timer: RequestTimer, response_start: float):
+        self.requests[(endpoint, method, status)] += 1
+        if status >= 500:
+            self.record_error(endpoint, "http_5xx")
+        elif status == CLIENT_CLOSED_STATUS:
+            self.record_error(endpoint, "client_closed")
+        self.latency[endpoint].observe(time.perf_counter() - timer.start)
+
+        if timer.handler_start is None:
+            return
+        self.stages[(endpoint, "parse")].observe(timer.handler_start - timer.start)
+        for name, seconds in timer.stages:
+            self.stages[(endpoint, name)].observe(seconds)
+        if timer.handler_end is not None and response_start is not None:
+            self.stages[(endpoint, "serialization")].observe(response_start - timer.handler_end)
+        if timer.model is not None and status < 400:
+            self.predictions[(timer.model, timer.version)] += 1
+
+    def render(self, model_set=None, gauges: dict = None, counters: dict = None) -> str:
+        """
+        Texto no formato de exposição do Prometheus (0.0.4)
+
+        Args:
+            model_set: conjunto ativo (labels de versão em api_model_info)
+            gauges: gauges extras {nome: (descrição, valor)}, ex. profundidade de filas
+            counters: contadores extras {nome: (descrição, {labels: valor})}, labels como dict
+        """
+        lines = [
+            "# HELP api_requests_total Requisições HTTP por endpoint, método e status",
+            "# TYPE api_requests_total counter",
+        ]
+        for (endpoint, method, status), n in sorted(self.requests.items()):
+            lines.append(f'api_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {n}')
+
+        lines += ["# HELP api_errors_total Erros por endpoint e tipo",
+                  "# TYPE api_errors_total counter"]
+        for (endpoint, kind), n in sorted(self.errors.items()):
+            lines.append(f'api_errors_total{{endpoint="{endpoint}",kind="{kind}"}} {n}')
+
+        lines += ["# HELP api_model_errors_total Falhas do modelo respondidas com fallback",
+                  "# TYPE api_model_errors_total counter"]
+        for model, n in sorted(self.model_errors.items()):
+            lines.append(f'api_model_errors_total{{model="{model}"}} {n}')
+
+        lines += ["# HELP api_requests_in_flight Requisições em andamento",
+                  "# TYPE api_requests_in_flight gauge",
+                  f"api_requests_in_flight {self.in_flight}"]
+        for name, (help_text, value) in sorted((gauges or {}).items()):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+        for name, (help_text, series) in sorted((counters or {}).items()):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for labels, value in series:
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        lines += ["# HELP api_predictions_total Predições servidas por modelo e versão",
+                  "# TYPE api_predictions_total counter"]
+        for (model, version), n in sorted(self.predictions.items()):
+            lines.append(f'api_predictions_total{{model="{model}",version="{version}"}} {n}')
+
+        lines += ["# HELP api_request_duration_seconds Latência total da requisição",
+                  "# TYPE api_request_duration_seconds histogram"]
+        for endpoint, hist in sorted(self.latency.items()):
+            lines += _histogram_lines("api_request_duration_seconds", f'endpoint="{endpoint}"', hist)
+
+        lines += ["# HELP api_stage_duration_seconds Latência por estágio da requisição",
+                  "# TYPE api_stage_duration_seconds histogram"]
+        for (endpoint, stage_name), hist in sorted(self.stages.items()):
+            lines += _histogram_lines("api_stage_duration_seconds",
+                                      f'endpoint="{endpoint}",stage="{stage_name}"', hist)
+
+        if model_set is not None:
+            lines += ["# HELP api_model_info Versão de cada modelo carregado",
+                      "# TYPE api_model_info gauge"]
+            for name, version in sorted(model_set.models.items()):
+                default = "true" if name == model_set.default else "false"
+                lines.append(f'api_model_info{{model="{name}",version="{version.version}",'
+                             f'set_version="{model_set.version}",default="{default}"}} 1')
+
+        lines += ["# HELP api_uptime_seconds Tempo desde o início do processo",
+                  "# TYPE api_uptime_seconds gauge",
+                  f"api_uptime_seconds {time.time() - self.started_at:.3f}"]
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict:
+        """Resumo em JSON (para clientes que pedem application/json)"""
+        stages = {}
+        for (endpoint, stage_name), hist in sorted(self.stages.items()):
+            stages.setdefault(endpoint, {})[stage_name] = _histogram_summary(hist)
+
+        return {
+            "requests_total": sum(self.requests.values()),
+            "errors_total": sum(self.errors.values()),
+            "in_flight": self.in_flight,
+            "requests": {f"{method} {endpoint} {status}": n
+                         for (endpoint, method, status), n in sorted(self.requests.items())},
+            "errors": {f"{endpoint} {kind}": n for (endpoint, kind), n in sorted(self.errors.items())},
+            "model_errors": dict(sorted(self.model_errors.items())),
+            "predictions": {f"{model}@{version}": n for (model, version), n in sorted(self.predictions.items())},
+            "latency": {endpoint: _histogram_summary(hist) for endpoint, hist in sorted(self.latency.items())},
+            "stages": stages,
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+        }
+
+
+def _histogram_lines(name: str, labels: str, hist: Histogram) -> list:
+    lines = []
+    running = 0
+    for bound, n in zip(hist.buckets, hist.counts):
+        running += n
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {running}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+    lines.append(f"{name}_sum{{{labels}}} {hist.sum:.9f}")
+    lines.append(f"{name}_count{{{labels}}} {hist.count}")
+    return lines
+
+
+def _histogram_summary(hist: Histogram) -> dict:
+    def ms(value):
+        return None if value is None else round(value * 1000, 4)
+
+    return {
+        "count": hist.count,
+        "mean_ms": ms(hist.sum / hist.count) if hist.count else None,
+        "p50_ms": ms(hist.quantile(0.50)),
+        "p99_ms": ms(hist.quantile(0.99)),
+    }
+
+
+class MetricsMiddleware:
+    """Middleware ASGI: in-flight, latência total e estágios de cada requisição HTTP"""
+
+    def __init__(self, app, metrics: Metrics, route_paths=None, skip_paths=("/metrics",), on_complete=None):
+        """
+        Args:
+            metrics: destino das observações
+            route_paths: função -> template da rota (evita um label por path_param)
+            on_complete: chamado com (endpoint, método, status, timer, duração) ao fim de cada requisição
+        """
+        self.app = app
+        self.metrics = metrics
+        self.route_paths = route_paths
+        self.skip_paths = skip_paths
+        self.on_complete = on_complete
+
+    async def __call__(self, scope, receive, send):
+        # Requisições internas de aquecimento (warmup.py) não contam
+        if scope["type"] != "http" or scope["path"] in self.skip_paths or scope.get("warmup"):
+            await self.app(scope, receive, send)
+            return
+
+        timer = RequestTimer()
+        token = _current_timer.set(timer)
+        status = 500
+        response_start = None
+        metrics = self.metrics
+        metrics.in_flight += 1
+
+        async def send_wrapper(message):
+            nonlocal status, response_start
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_start = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except asyncio.CancelledError:
+            # cancel_on_disconnect: o cliente foi embora, não é falha do servidor
+            if response_start is None:
+                status = CLIENT_CLOSED_STATUS
+            raise
+        finally:
+            metrics.in_flight -= 1
+            _current_timer.reset(token)
+            endpoint = self._endpoint(scope)
+            metrics.record(endpoint, scope["method"], status, timer, response_start)
+            if self.on_complete is not None:
+                self.on_complete(endpoint, scope["method"], status, timer, time.perf_counter() - timer.start)
+
+    def _endpoint(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        route_paths = self.route_paths() if callable(self.route_paths) else (self.route_paths or {})
+        return route_paths.get(endpoint, scope["path"])
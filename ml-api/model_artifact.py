@@ -0,0 +1,336 @@
+"""
+Artefato compacto do modelo servido (sem sklearn/joblib no startup).
+
+Importar sklearn/joblib e fazer o unpickle do model.joblib domina o tempo
+de subida do container. O export grava, por modelo do catálogo, um binário
+pequeno e versionado com tudo que a API usa para pontuar:
+
+    MAGIC (8 bytes) | versão (uint32) | tamanho do cabeçalho (uint32)
+    cabeçalho JSON (classes, ordem das features, layout, intercepto,
+                    escala do logit, threshold, encoders, aeroportos e
+                    a tabela de seções: offset, dtype, shape e sha256)
+    seções de arrays little-endian, cada uma alinhada em 64 bytes
+    ("coef" e "route_table", a tabela origem x destino já compilada)
+
+O leitor mapeia o arquivo com mmap somente leitura e as seções viram
+arrays NumPy sobre o mapeamento, sem cópia: todos os workers (e containers
+que montam o mesmo arquivo) usam as mesmas páginas do page cache em vez de
+uma cópia privada cada. Os checksums das seções são conferidos conforme
+ARTIFACT_VERIFY: lazy (padrão: numa thread, sem atrasar o startup),
+eager (antes de usar) ou off.
+
+MODEL_FORMAT=compact faz a API carregar só esses arquivos, com NumPy
+(LogisticScorer), sem nunca importar sklearn.
+
+Uso:
+    python model_artifact.py export      # gera os artefatos a partir do catálogo (precisa do sklearn)
+    python model_artifact.py benchmark   # compara o cold start joblib x compact em processos novos
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import subprocess
+import sys
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+from inference import LogisticScorer
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FOTMODEL"
+FORMAT_VERSION = 2
+COEF_DTYPE = np.dtype("<f8")
+ROUTE_DTYPE = np.dtype("<i8")
+
+ARTIFACT_VERIFY = os.getenv("ARTIFACT_VERIFY", "lazy").lower()
+
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGN = 64
+
+# Verificações em background ainda em andamento (serve.py espera antes do fork)
+_pending = []
+
+
+class ArtifactError(ValueError):
+    """Artefato ausente, corrompido, de outra versão ou incompatível com o catálogo"""
+
+
+def artifact_path(name: str, entry: dict) -> str:
+    """Arquivo do artefato compacto de um modelo do catálogo ("artifact" ou model_<nome>.bin)"""
+    return entry.get("artifact", f"model_{name}.bin")
+
+
+@dataclass
+class CompactArtifact:
+    """Conteúdo de um artefato compacto (arrays sobre o mmap quando lido do disco)"""
+
+    name: str
+    layout: str
+    feature_names: list
+    coef: np.ndarray
+    intercept: float
+    classes: list
+    link_scale: float
+    threshold: float
+    airline_encoder: dict
+    airport_pair_encoder: dict
+    airports: list = field(default_factory=list)
+    route_table: Optional[np.ndarray] = None
+    exported_at: str = ""
+    source_version: str = ""
+    path: Optional[str] = None
+    checksums: dict = field(default_factory=dict, repr=False)
+    checksum_status: str = "not_mapped"      # pending | ok | mismatch | skipped
+    _mapping: Optional[mmap.mmap] = field(default=None, repr=False)
+
+    @property
+    def n_features(self) -> int:
+        return int(self.coef.size)
+
+    @property
+    def mapped_bytes(self) -> int:
+        return len(self._mapping) if self._mapping is not None else 0
+
+    def sections(self) -> dict:
+        return {"coef": self.coef, "route_table": self.route_table}
+
+    def scorer(self) -> LogisticScorer:
+        # float64 contíguo: o scorer usa a própria view do mmap, sem cópia
+        return LogisticScorer(self.coef, self.intercept, self.classes, link_scale=self.link_scale)
+
+    def verify(self) -> bool:
+        """Conferir o sha256 de cada seção (uma vez; lê o arquivo inteiro)"""
+        if self.checksum_status in ("ok", "mismatch"):
+            return self.checksum_status == "ok"
+
+        bad = [name for name, array in self.sections().items()
+               if hashlib.sha256(array).hexdigest() != self.checksums.get(name)]
+        self.checksum_status = "mismatch" if bad else "ok"
+        if bad:
+            logger.error(f"❌ {self.path}: checksum não confere nas seções {bad}")
+        return not bad
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "format_version": FORMAT_VERSION,
+            "mapped_bytes": self.mapped_bytes,
+            "checksum": self.checksum_status,
+            "exported_at": self.exported_at,
+        }
+
+
+def write_artifact(path: str, artifact: CompactArtifact):
+    """Gravar o artefato (arquivo temporário + rename, para leitores nunca verem meio arquivo)"""
+    arrays = {
+        "coef": np.ascontiguousarray(artifact.coef, dtype=COEF_DTYPE),
+        "route_table": np.ascontiguousarray(
+            artifact.route_table if artifact.route_table is not None else np.zeros((1, 1)), dtype=ROUTE_DTYPE
+        ),
+    }
+    header = {
+        "name": artifact.name,
+        "layout": artifact.layout,
+        "feature_names": list(artifact.feature_names),
+        "intercept": float(artifact.intercept),
+        "classes": np.asarray(artifact.classes).tolist(),
+        "link_scale": float(artifact.link_scale),
+        "threshold": float(artifact.threshold),
+        "airline_encoder": artifact.airline_encoder,
+        "airport_pair_encoder": artifact.airport_pair_encoder,
+        "airports": list(artifact.airports),
+        "exported_at": artifact.exported_at or datetime.now().isoformat(),
+        "source_version": artifact.source_version,
+        "sections": {},
+    }
+
+    # Offsets dependem do tamanho do cabeçalho: reservar espaço até estabilizar
+    header_size = 0
+    while True:
+        offset = _PREAMBLE.size + header_size
+        for name, array in arrays.items():
+            offset += -offset % _ALIGN
+            header["sections"][name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape),
+                                        "sha256": hashlib.sha256(array).hexdigest()}
+            offset += array.nbytes
+        header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        if len(header_bytes) <= header_size:
+            break
+        header_size = len(header_bytes) + 64
+    header_bytes = header_bytes.ljust(header_size)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, header_size))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.write(b"\0" * (header["sections"][name]["offset"] - f.tell()))
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_artifact(path: str, verify: str = None) -> CompactArtifact:
+    """
+    Mapear e validar um artefato compacto (ArtifactError se inválido)
+
+    verify: lazy (checksums depois, em background), eager (agora) ou off;
+    padrão ARTIFACT_VERIFY.
+    """
+    verify = verify or ARTIFACT_VERIFY
+    if not os.path.exists(path):
+        raise ArtifactError(f"Artefato compacto não encontrado: {path} (rode python model_artifact.py export)")
+
+    with open(path, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mapping) < _PREAMBLE.size:
+        raise ArtifactError(f"{path}: arquivo truncado")
+    magic, version, header_size = _PREAMBLE.unpack_from(mapping)
+    if magic != MAGIC:
+        raise ArtifactError(f"{path}: não é um artefato compacto")
+    if version != FORMAT_VERSION:
+        raise ArtifactError(f"{path}: formato v{version}, esperado v{FORMAT_VERSION} (exporte de novo)")
+
+    header = json.loads(mapping[_PREAMBLE.size:_PREAMBLE.size + header_size])
+    arrays = {}
+    for name, section in header["sections"].items():
+        dtype = np.dtype(section["dtype"])
+        count = int(np.prod(section["shape"]))
+        if section["offset"] + count * dtype.itemsize > len(mapping):
+            raise ArtifactError(f"{path}: seção {name} além do fim do arquivo")
+        # View somente leitura sobre o mmap: as páginas vêm do page cache, compartilhadas
+        arrays[name] = np.frombuffer(mapping, dtype=dtype, count=count, offset=section["offset"]).reshape(section["shape"])
+
+    artifact = CompactArtifact(
+        name=header["name"],
+        layout=header["layout"],
+        feature_names=header["feature_names"],
+        coef=arrays["coef"],
+        intercept=header["intercept"],
+        classes=header["classes"],
+        link_scale=header["link_scale"],
+        threshold=header["threshold"],
+        airline_encoder=header["airline_encoder"],
+        airport_pair_encoder=header["airport_pair_encoder"],
+        airports=header["airports"],
+        route_table=arrays["route_table"],
+        exported_at=header["exported_at"],
+        source_version=header["source_version"],
+        path=path,
+        checksums={name: section["sha256"] for name, section in header["sections"].items()},
+        checksum_status="pending",
+        _mapping=mapping,
+    )
+
+    if verify == "eager" and not artifact.verify():
+        raise ArtifactError(f"{path}: checksum das seções não confere")
+    if verify == "off":
+        artifact.checksum_status = "skipped"
+    return artifact
+
+
+def verify_in_background(artifacts) -> threading.Thread:
+    """Conferir os checksums numa thread, sem atrasar o startup (ver checksum_status)"""
+    pending = [artifact for artifact in artifacts if artifact.checksum_status == "pending"]
+    thread = threading.Thread(target=lambda: [artifact.verify() for artifact in pending],
+                              name="artifact-verify", daemon=True)
+    _pending.append(thread)
+    thread.start()
+    return thread
+
+
+def wait_for_verification(timeout: float = None):
+    """Esperar as verificações em background (antes do fork, para os workers herdarem o resultado)"""
+    while _pending:
+        _pending.pop().join(timeout)
+
+
+def export_catalog() -> list:
+    """Gerar o artefato de cada modelo do catálogo carregado pelo caminho sklearn"""
+    import app as app_module
+
+    catalog = app_module.load_catalog()
+    model_set = app_module.load_model_and_encoders(model_format="joblib")
+
+    written = []
+    for name, entry in catalog["models"].items():
+        current = model_set.get(name)
+        if current.scorer is None:
+            raise ArtifactError(f"[{name}] só regressão logística binária pode ser exportada")
+
+        path = artifact_path(name, entry)
+        write_artifact(path, CompactArtifact(
+            name=name,
+            layout=current.adapter.layout,
+            feature_names=current.adapter.feature_names,
+            coef=current.scorer.coef,
+            intercept=current.scorer.intercept,
+            classes=current.scorer.classes_,
+            link_scale=current.scorer.link_scale,
+            threshold=current.decision_threshold,
+            airline_encoder=current.airline_encoder,
+            airport_pair_encoder=current.airport_pair_encoder,
+            airports=sorted(current.encoders.airport_index, key=current.encoders.airport_index.get),
+            route_table=current.encoders.route_table,
+            source_version=current.version,
+        ))
+        written.append((name, path, os.path.getsize(path)))
+    return written
+
+
+# Roda num processo novo: import do app + carga do catálogo, como no startup
+_COLD_START_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.registry.load_initial()
+loaded = time.perf_counter()
+print(json.dumps({"import_seconds": imported - start, "load_seconds": loaded - imported,
+                  "total_seconds": loaded - start, "sklearn_imported": "sklearn" in sys.modules}))
+"""
+
+
+def measure_cold_start(model_format: str, repeat: int = 3) -> dict:
+    """Melhor de `repeat` cold starts (import + carga) com o formato informado"""
+    env = {**os.environ, "MODEL_FORMAT": model_format, "LOG_LEVEL": "WARNING", "MODEL_WATCH_INTERVAL": "0"}
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", _COLD_START_PROBE], env=env, check=True,
+                                capture_output=True, text=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return min(runs, key=lambda run: run["total_seconds"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Artefato compacto do modelo (serving sem sklearn)")
+    parser.add_argument("command", choices=["export", "benchmark"])
+    parser.add_argument("--repeat", type=int, default=3, help="Execuções por formato no benchmark")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        for name, path, size in export_catalog():
+            print(f"✅ [{name}] {path} ({size} bytes)")
+        return
+
+    results = {model_format: measure_cold_start(model_format, args.repeat) for model_format in ("joblib", "compact")}
+    for model_format, run in results.items():
+        print(f"{model_format:8s} import {run['import_seconds'] * 1000:7.1f}ms  carga {run['load_seconds'] * 1000:7.1f}ms  "
+              f"total {run['total_seconds'] * 1000:7.1f}ms  sklearn: {'sim' if run['sklearn_imported'] else 'não'}")
+    saved = results["joblib"]["total_seconds"] - results["compact"]["total_seconds"]
+    print(f"⏱️ compact economiza {saved * 1000:.1f}ms "
+          f"({results['joblib']['total_seconds'] / results['compact']['total_seconds']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
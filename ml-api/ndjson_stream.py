@@ -0,0 +1,148 @@
+"""
+Pontuação em streaming (NDJSON) para /predict/stream.
+
+O corpo é lido aos pedaços conforme chega, quebrado em linhas (um voo
+JSON por linha) e pontuado em blocos de STREAM_CHUNK_SIZE voos com a
+mesma montagem vetorizada de features do /predict/batch. Cada bloco vira
+um pedaço da resposta (uma linha de resultado por linha de entrada, na
+mesma ordem) antes do próximo bloco ser lido: a memória fica limitada a
+um bloco, qualquer que seja o tamanho do upload, e o TCP faz o resto do
+controle de fluxo.
+
+O StreamingResponse do Starlette consome o receive() para detectar
+desconexão, o que roubaria o corpo ainda não lido; NDJSONStreamingResponse
+só envia, e a desconexão aparece como ClientDisconnect na leitura.
+
+O cliente precisa ler a resposta enquanto envia (full duplex); clientes
+que só leem depois de enviar tudo travam quando os buffers enchem. Este
+módulo traz um cliente assim:
+
+    python ndjson_stream.py voos.ndjson [--url http://localhost:8000/predict/stream] > resultados.ndjson
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from urllib.parse import urlsplit
+
+from starlette.responses import StreamingResponse
+
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "1000"))
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", "65536"))
+# Streams simultâneos por processo (fora do controle de admissão: um stream
+# de minutos inflaria a espera prevista do tráfego ao vivo)
+STREAM_MAX_CONCURRENT = int(os.getenv("STREAM_MAX_CONCURRENT", "2"))
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class LineTooLong(ValueError):
+    """Linha maior que STREAM_MAX_LINE_BYTES (provavelmente não é NDJSON)"""
+
+
+async def ndjson_lines(byte_chunks, max_line_bytes: int = STREAM_MAX_LINE_BYTES):
+    """(número da linha, bytes) de cada linha não vazia de um fluxo de pedaços de bytes"""
+    pending = b""
+    line_number = 0
+    async for data in byte_chunks:
+        if not data:
+            continue
+        lines = (pending + data).split(b"\n")
+        pending = lines.pop()
+        if len(pending) > max_line_bytes:
+            raise LineTooLong(f"Linha {line_number + len(lines) + 1} com mais de {max_line_bytes} bytes")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+    if pending.strip():
+        yield line_number + 1, pending
+
+
+async def chunked(lines, size: int = STREAM_CHUNK_SIZE):
+    """Agrupar as linhas em listas de até `size` itens"""
+    chunk = []
+    async for item in lines:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """StreamingResponse que não lê o receive() (o corpo da requisição ainda está sendo lido)"""
+
+    media_type = NDJSON_MEDIA_TYPE
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+async def _send_file(writer, path: str, block_size: int = 1 << 16):
+    """Corpo em chunked transfer encoding, lido do arquivo aos blocos"""
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            writer.write(b"%x\r\n%s\r\n" % (len(block), block))
+            await writer.drain()
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+
+async def _read_response(reader, out):
+    """Copiar a resposta (chunked) para `out` conforme chega; devolve o status HTTP"""
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+
+    if headers.get("transfer-encoding") != "chunked":
+        out.write(await reader.read())
+        return status
+    while True:
+        size = int((await reader.readline()).split(b";")[0], 16)
+        if size == 0:
+            break
+        out.write(await reader.readexactly(size))
+        await reader.readexactly(2)
+    return status
+
+
+async def stream_file(url: str, path: str, out, headers: dict = None) -> int:
+    """Enviar um arquivo NDJSON e escrever os resultados em `out` ao mesmo tempo"""
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    request_headers = {"Host": parts.netloc, "Content-Type": NDJSON_MEDIA_TYPE,
+                       "Transfer-Encoding": "chunked", "Connection": "close", **(headers or {})}
+    writer.write(f"POST {parts.path or '/'} HTTP/1.1\r\n".encode() +
+                 "".join(f"{key}: {value}\r\n" for key, value in request_headers.items()).encode() + b"\r\n")
+
+    sender = asyncio.create_task(_send_file(writer, path))
+    try:
+        status = await _read_response(reader, out)
+    finally:
+        sender.cancel()
+        writer.close()
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cliente full duplex do /predict/stream")
+    parser.add_argument("path", help="Arquivo NDJSON (um voo por linha)")
+    parser.add_argument("--url", default="http://localhost:8000/predict/stream")
+    parser.add_argument("--model", help="Valor do header X-Model")
+    args = parser.parse_args(argv)
+
+    headers = {"X-Model": args.model} if args.model else None
+    status = asyncio.run(stream_file(args.url, args.path, sys.stdout.buffer, headers))
+    sys.stdout.buffer.flush()
+    if status != 200:
+        sys.exit(f"HTTP {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Cache em memória (LRU + TTL) das predições do /predict.
+
+A chave é o vetor de features já codificado. Só a distância é contínua,
+então ela é arredondada para uma resolução configurável (em km); com o
+cache ativo o modelo sempre recebe a distância arredondada, de modo que
+acerto e falha de cache devolvem exatamente o mesmo resultado.
+
+O cache se invalida sozinho quando algum dos arquivos observados
+(modelo, encoders, threshold) muda de tamanho ou data de modificação.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+ENABLE_CACHING = os.getenv("ENABLE_CACHING", "false").lower() in ("1", "true", "yes")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "100000"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "3600"))
+CACHE_DISTANCE_RESOLUTION_KM = float(os.getenv("CACHE_DISTANCE_RESOLUTION_KM", "1.0"))
+
+# Distância normalizada = km / 10000 (ver prepare_features)
+DISTANCE_SCALE_KM = 10000.0
+
+
+class PredictionCache:
+    """LRU com expiração por TTL e contadores de acerto/falha/remoção"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl_seconds: float = CACHE_TTL_SECONDS,
+                 distance_resolution_km: float = CACHE_DISTANCE_RESOLUTION_KM, distance_index: int = 3,
+                 watched_paths=(), check_interval: float = 5.0, clock=time.monotonic):
+        if max_entries < 1:
+            raise ValueError(f"max_entries deve ser >= 1: {max_entries}")
+
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.distance_resolution_km = distance_resolution_km
+        self.distance_index = distance_index
+        self.watched_paths = list(watched_paths)
+        self.check_interval = check_interval
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = self._artifact_fingerprint()
+        self._next_check = clock() + check_interval
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def quantize(self, features: list) -> list:
+        """Arredondar a distância (no próprio vetor) para a resolução do cache"""
+        index = self.distance_index
+        if self.distance_resolution_km > 0 and index is not None and len(features) > index:
+            km = features[index] * DISTANCE_SCALE_KM
+            bucket = round(km / self.distance_resolution_km) * self.distance_resolution_km
+            features[index] = bucket / DISTANCE_SCALE_KM
+        return features
+
+    def get(self, features):
+        """Resultado em cache para o vetor (já quantizado), ou None"""
+        self._check_artifacts()
+        key = tuple(features)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, features, value):
+        key = tuple(features)
+
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self._fingerprint = self._artifact_fingerprint()
+
+    def _artifact_fingerprint(self):
+        fingerprint = []
+        for path in self.watched_paths:
+            try:
+                stat = os.stat(path)
+                fingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                fingerprint.append((path, None, None))
+        return tuple(fingerprint)
+
+    def _check_artifacts(self):
+        """Limpar o cache se modelo/encoders mudaram (no máximo a cada check_interval)"""
+        now = self._clock()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+
+        fingerprint = self._artifact_fingerprint()
+        if fingerprint != self._fingerprint:
+            logger.info("♻️ Artefatos do modelo mudaram, limpando cache de predições")
+            self.invalidations += 1
+            self.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "distance_resolution_km": self.distance_resolution_km,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,227 @@
+"""
+Registro versionado dos modelos servidos, com recarga a quente.
+
+Tudo que uma predição precisa (modelo, scorer, encoders, layout de
+features, threshold, tabela de logits, cache) é carregado junto num
+ModelVersion imutável; os modelos do catálogo ficam juntos num ModelSet.
+As requisições leem registry.active uma única vez e usam esse conjunto do
+começo ao fim; a recarga monta e aquece o novo conjunto em background
+(thread) e só então troca a referência, de forma atômica.
+
+A recarga é disparada por mudança nos arquivos observados (checados a
+cada MODEL_WATCH_INTERVAL segundos) ou pela chamada administrativa.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "10"))
+
+
+@dataclass
+class ModelVersion:
+    """Snapshot de tudo que foi carregado para servir predições"""
+
+    version: str
+    model: Any
+    scorer: Any
+    decision_threshold: float
+    n_features_expected: int
+    airline_encoder: dict
+    airport_pair_encoder: dict
+    encoders: Any
+    adapter: Any = None
+    name: str = "default"
+    logit_table: Any = None
+    cache: Any = None
+    artifact: Any = None
+    loaded_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    load_seconds: float = 0.0
+
+    def summary(self) -> dict:
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 4),
+        }
+
+
+@dataclass
+class ModelSet:
+    """Todos os modelos do catálogo, carregados e trocados juntos"""
+
+    version: str
+    models: dict
+    default: str
+    artifact_paths: list = field(default_factory=list)
+    loaded_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    load_seconds: float = 0.0
+
+    def get(self, name: Optional[str] = None) -> ModelVersion:
+        """Modelo pelo nome (ou o padrão); KeyError se não existir"""
+        return self.models[name or self.default]
+
+    def corrupted(self) -> list:
+        """Artefatos compactos cujo checksum não conferiu (a tabela de rotas é compartilhada: o conjunto todo para)"""
+        return sorted({model.artifact.path for model in self.models.values()
+                       if model.artifact is not None and model.artifact.checksum_status == "mismatch"})
+
+    def summary(self) -> dict:
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 4),
+            "models": {name: model.version for name, model in self.models.items()},
+        }
+
+
+def artifacts_fingerprint(paths) -> tuple:
+    """(caminho, mtime, tamanho) dos artefatos; barato o bastante para checar periodicamente"""
+    fingerprint = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            fingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            fingerprint.append((path, None, None))
+    return tuple(fingerprint)
+
+
+def artifacts_digest(paths) -> str:
+    """Hash do conteúdo dos artefatos (identifica a versão)"""
+    digest = hashlib.sha256()
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        digest.update(b"\0")
+    return digest.hexdigest()[:12]
+
+
+class ModelRegistry:
+    """Mantém a versão ativa e faz a troca atômica na recarga"""
+
+    def __init__(self, loader: Callable[[], ModelSet], watched_paths,
+                 warmup: Optional[Callable[[ModelSet], None]] = None,
+                 watch_interval: float = MODEL_WATCH_INTERVAL, history_size: int = 5):
+        """
+        Args:
+            loader: função síncrona que carrega e devolve um ModelSet (o catálogo inteiro)
+            watched_paths: artefatos cuja mudança dispara a recarga
+            warmup: chamada com a nova versão antes da troca (ex.: predições sintéticas)
+            watch_interval: segundos entre checagens dos arquivos (0 desativa)
+        """
+        self.loader = loader
+        self.watched_paths = list(watched_paths)
+        self.warmup = warmup
+        self.watch_interval = watch_interval
+        self.active: Optional[ModelSet] = None
+        self.history = deque(maxlen=history_size)
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.last_error = None
+        self._fingerprint = None
+        self._failed_fingerprint = None
+        self._lock = None
+        self._watcher = None
+
+    def _load_and_warm(self):
+        fingerprint = artifacts_fingerprint(self.watched_paths)
+        start = time.perf_counter()
+
+        version = self.loader()
+        if self.warmup is not None:
+            self.warmup(version)
+
+        version.load_seconds = time.perf_counter() - start
+
+        # O conjunto carregado pode trazer novos arquivos para observar (ex.: catálogo mudou)
+        paths = getattr(version, 'artifact_paths', None)
+        if paths and list(paths) != self.watched_paths:
+            self.watched_paths = list(paths)
+            fingerprint = artifacts_fingerprint(self.watched_paths)
+        return version, fingerprint
+
+    def _activate(self, version: ModelSet, fingerprint):
+        previous = self.active
+        # Uma única atribuição: leitores veem a versão antiga ou a nova, nunca uma mistura
+        self.active = version
+        self._fingerprint = fingerprint
+        if previous is not None:
+            self.history.appendleft(previous.summary())
+        logger.info(f"🔁 Versão ativa do modelo: {version.version} (carregada em {version.load_seconds:.3f}s)")
+
+    def load_initial(self) -> ModelSet:
+        """Carga síncrona usada no startup"""
+        version, fingerprint = self._load_and_warm()
+        self._activate(version, fingerprint)
+        return version
+
+    async def reload(self, reason: str = "manual") -> ModelSet:
+        """Carregar e aquecer uma nova versão em background e trocá-la atomicamente"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            logger.info(f"♻️ Recarregando modelo ({reason})...")
+            try:
+                version, fingerprint = await asyncio.to_thread(self._load_and_warm)
+            except Exception as e:
+                self.failed_reloads += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                self._failed_fingerprint = artifacts_fingerprint(self.watched_paths)
+                logger.error(f"❌ Falha ao recarregar, mantendo versão {self.active.version if self.active else None}: {e}")
+                raise
+
+            self.reloads += 1
+            self.last_error = None
+            self._activate(version, fingerprint)
+            return version
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.watch_interval)
+            fingerprint = artifacts_fingerprint(self.watched_paths)
+            if fingerprint == self._fingerprint or fingerprint == self._failed_fingerprint:
+                continue
+            try:
+                await self.reload(reason="artefatos alterados")
+            except Exception:
+                # Já registrado; tenta de novo quando os arquivos mudarem outra vez
+                pass
+
+    def start_watching(self):
+        # Lock novo a cada ciclo de vida (o event loop pode ser outro)
+        self._lock = asyncio.Lock()
+        if self.watch_interval > 0 and self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch())
+            logger.info(f"👀 Observando artefatos a cada {self.watch_interval:g}s")
+
+    async def stop(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active.summary() if self.active else None,
+            "previous": list(self.history),
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+            "last_error": self.last_error,
+            "watch_interval_seconds": self.watch_interval,
+            "watched_paths": self.watched_paths,
+        }
@@ -0,0 +1,323 @@
+"""
+Launcher de produção pré-fork.
+
+O master importa o app, carrega e aquece modelos e encoders uma única vez,
+congela o heap (gc.freeze, para o GC não sujar as páginas compartilhadas)
+e abre o socket; depois faz fork de N workers uvicorn que herdam tudo isso
+copy-on-write e aceitam conexões no mesmo socket.
+
+Supervisão: cada worker escreve um heartbeat (memória compartilhada) a
+partir do próprio event loop; worker que morre é recriado e worker com o
+loop travado por mais de WORKER_TIMEOUT segundos é morto e recriado.
+O master loga a memória de cada worker (rss/pss/shared) no início, a cada
+MEMORY_REPORT_INTERVAL segundos e ao receber SIGUSR1.
+
+Uso: python serve.py [--workers N] [--host 0.0.0.0] [--port 8000]
+     (WEB_CONCURRENCY=N também define o número de workers; padrão: CPUs disponíveis)
+"""
+
+import argparse
+import gc
+import logging
+import math
+import mmap
+import os
+import signal
+import socket
+import struct
+import sys
+import time
+
+from memory_report import format_mapped_report, format_report, mapped_files, process_memory
+from model_artifact import wait_for_verification
+
+logger = logging.getLogger("serve")
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+WEB_CONCURRENCY = os.getenv("WEB_CONCURRENCY")
+WORKER_TIMEOUT = float(os.getenv("WORKER_TIMEOUT", "30"))
+HEARTBEAT_INTERVAL = float(os.getenv("HEARTBEAT_INTERVAL", "2"))
+GRACEFUL_TIMEOUT = float(os.getenv("GRACEFUL_TIMEOUT", "10"))
+MEMORY_REPORT_INTERVAL = float(os.getenv("MEMORY_REPORT_INTERVAL", "300"))
+
+_SLOT = struct.Struct("d")
+
+
+def available_cpus(cgroup_root: str = "/sys/fs/cgroup") -> float:
+    """CPUs utilizáveis: afinidade do processo limitada pela cota do cgroup (containers)"""
+    try:
+        cpus = float(len(os.sched_getaffinity(0)))
+    except AttributeError:
+        cpus = float(os.cpu_count() or 1)
+
+    quota = None
+    try:
+        # cgroup v2: "max 100000" ou "200000 100000"
+        with open(os.path.join(cgroup_root, "cpu.max")) as f:
+            limit, period = f.read().split()[:2]
+            if limit != "max":
+                quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            # cgroup v1
+            with open(os.path.join(cgroup_root, "cpu", "cpu.cfs_quota_us")) as f:
+                limit = int(f.read())
+            with open(os.path.join(cgroup_root, "cpu", "cpu.cfs_period_us")) as f:
+                period = int(f.read())
+            if limit > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+
+    return min(cpus, quota) if quota else cpus
+
+
+def auto_worker_count(cgroup_root: str = "/sys/fs/cgroup") -> int:
+    """Um worker por CPU disponível (a inferência é CPU-bound)"""
+    return max(1, math.ceil(available_cpus(cgroup_root)))
+
+
+class Heartbeats:
+    """Um double (time.monotonic) por slot, num mmap anônimo compartilhado com os filhos"""
+
+    def __init__(self, slots: int):
+        self._buffer = mmap.mmap(-1, _SLOT.size * slots)
+
+    def beat(self, slot: int, value: float = None):
+        _SLOT.pack_into(self._buffer, slot * _SLOT.size, time.monotonic() if value is None else value)
+
+    def last(self, slot: int) -> float:
+        return _SLOT.unpack_from(self._buffer, slot * _SLOT.size)[0]
+
+
+class Master:
+    """Carrega o modelo, faz fork dos workers e os supervisiona"""
+
+    def __init__(self, workers: int, host: str = HOST, port: int = PORT, worker_timeout: float = WORKER_TIMEOUT):
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.worker_timeout = worker_timeout
+        self.heartbeats = Heartbeats(workers)
+        self.children = {}          # pid -> slot
+        self.spawned_at = {}        # slot -> monotonic
+        self.failures = [0] * workers
+        self.respawn_at = {}        # slot -> monotonic (recriação adiada após crash loop)
+        self.sock = None
+        self.app_module = None
+        self.stopping = False
+        self._report_requested = False
+        self.restarts = 0
+
+    # Master -----------------------------------------------------------------
+
+    def preload(self):
+        """Importar o app e carregar/aquecer tudo antes do fork"""
+        start = time.perf_counter()
+        import app as app_module
+        imported = time.perf_counter()
+
+        app_module.registry.load_initial()
+        app_module.preloaded = True
+        self.app_module = app_module
+        loaded = time.perf_counter()
+
+        # Checksums dos artefatos mapeados: terminados aqui, os workers herdam o resultado
+        wait_for_verification()
+
+        # Objetos já carregados vão para a geração permanente: o GC dos workers
+        # não toca neles e as páginas continuam compartilhadas
+        gc.collect()
+        gc.freeze()
+        logger.info(f"📦 Master {os.getpid()}: modelos carregados e aquecidos em "
+                    f"{time.perf_counter() - start:.2f}s ({gc.get_freeze_count()} objetos congelados)")
+        # Cold start (MODEL_FORMAT=compact evita o import do sklearn; compare com model_artifact.py benchmark)
+        logger.info(f"⏱️ Cold start: import {imported - start:.2f}s, carga {loaded - imported:.2f}s, "
+                    f"formato {app_module.MODEL_FORMAT}, sklearn {'importado' if 'sklearn' in sys.modules else 'não importado'}")
+
+    def bind(self):
+        self.sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.sock.listen(2048)
+        self.sock.set_inheritable(True)
+        self.port = self.sock.getsockname()[1]
+
+    def run(self):
+        self.preload()
+        self.bind()
+        logger.info(f"🚀 Master {os.getpid()} em http://{self.host}:{self.port} com {self.workers} workers")
+
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGUSR1, self._on_report)
+
+        for slot in range(self.workers):
+            self.spawn(slot)
+
+        next_report = time.monotonic() + min(5.0, self.worker_timeout)
+        try:
+            while not self.stopping:
+                self.reap()
+                self.respawn_due()
+                self.check_heartbeats()
+                if self._report_requested or (MEMORY_REPORT_INTERVAL > 0 and time.monotonic() >= next_report):
+                    self._report_requested = False
+                    self.log_memory()
+                    next_report = time.monotonic() + MEMORY_REPORT_INTERVAL
+                time.sleep(0.5)
+        finally:
+            self.shutdown()
+
+    def spawn(self, slot: int):
+        self.heartbeats.beat(slot)
+        self.spawned_at[slot] = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self.run_worker(slot)
+            except BaseException:
+                logger.exception(f"❌ Worker {os.getpid()} terminou com erro")
+                code = 1
+            finally:
+                pipeline = getattr(self.app_module, "log_pipeline", None)
+                if pipeline is not None:
+                    pipeline.stop()
+                logging.shutdown()
+                os._exit(code)
+
+        self.children[pid] = slot
+        logger.info(f"👷 Worker {pid} iniciado (slot {slot})")
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            slot = self.children.pop(pid, None)
+            if slot is None or self.stopping:
+                continue
+
+            lifetime = time.monotonic() - self.spawned_at.get(slot, 0.0)
+            self.failures[slot] = self.failures[slot] + 1 if lifetime < self.worker_timeout else 0
+            self.restarts += 1
+            # Crash loop: espera crescente antes de recriar um worker que morreu logo após subir
+            delay = min(30.0, 2.0 ** (self.failures[slot] - 1)) if self.failures[slot] > 1 else 0.0
+            logger.warning(f"⚠️ Worker {pid} (slot {slot}) saiu com status {os.waitstatus_to_exitcode(status)}, "
+                           f"recriando em {delay:.0f}s")
+            self.respawn_at[slot] = time.monotonic() + delay
+
+    def respawn_due(self):
+        now = time.monotonic()
+        for slot, when in list(self.respawn_at.items()):
+            if now >= when:
+                del self.respawn_at[slot]
+                self.spawn(slot)
+
+    def check_heartbeats(self):
+        now = time.monotonic()
+        for pid, slot in list(self.children.items()):
+            if now - self.heartbeats.last(slot) > self.worker_timeout:
+                logger.error(f"💀 Worker {pid} sem heartbeat há {now - self.heartbeats.last(slot):.0f}s, matando")
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                # reap() recria no próximo ciclo; evita matar de novo enquanto isso
+                self.heartbeats.beat(slot)
+
+    def memory_rows(self) -> dict:
+        rows = {f"master {os.getpid()}": process_memory(os.getpid())}
+        for pid, slot in sorted(self.children.items(), key=lambda item: item[1]):
+            rows[f"worker {pid}"] = process_memory(pid)
+        return rows
+
+    def mapped_rows(self, paths) -> dict:
+        rows = {f"master {os.getpid()}": mapped_files(paths, os.getpid())}
+        for pid, slot in sorted(self.children.items(), key=lambda item: item[1]):
+            rows[f"worker {pid}"] = mapped_files(paths, pid)
+        return rows
+
+    def log_memory(self):
+        logger.info("🧠 Memória por processo:\n" + format_report(self.memory_rows()))
+        paths = self.app_module.mapped_artifact_paths() if self.app_module is not None else []
+        if paths:
+            logger.info("🗺️ Artefatos mapeados (page cache compartilhado):\n" + format_mapped_report(self.mapped_rows(paths)))
+
+    def shutdown(self):
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT
+        while self.children and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self.children.pop(pid, None)
+            else:
+                time.sleep(0.1)
+
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        if self.sock is not None:
+            self.sock.close()
+        logger.info("👋 Master encerrado")
+
+    def _on_stop(self, signum, frame):
+        self.stopping = True
+
+    def _on_report(self, signum, frame):
+        self._report_requested = True
+
+    # Worker -----------------------------------------------------------------
+
+    def run_worker(self, slot: int):
+        import uvicorn
+
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGUSR1):
+            signal.signal(signum, signal.SIG_DFL)
+
+        async def heartbeat():
+            self.heartbeats.beat(slot)
+
+        config = uvicorn.Config(
+            self.app_module.app,
+            lifespan="on",
+            access_log=False,
+            log_config=None,          # logs do uvicorn seguem para o pipeline assíncrono do app
+            callback_notify=heartbeat,
+            timeout_notify=HEARTBEAT_INTERVAL,
+        )
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Launcher pré-fork da API de atrasos")
+    parser.add_argument("--workers", type=int, default=int(WEB_CONCURRENCY) if WEB_CONCURRENCY else None,
+                        help="número de workers (padrão: CPUs disponíveis)")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--worker-timeout", type=float, default=WORKER_TIMEOUT)
+    args = parser.parse_args()
+
+    workers = args.workers or auto_worker_count()
+    Master(workers, args.host, args.port, args.worker_timeout).run()
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    main()
@@ -0,0 +1,147 @@
+"""
+Shadow scoring de um modelo desafiante.
+
+Uma fração amostrada do tráfego do /predict é colocada (sem bloquear)
+numa fila limitada; uma thread em background pontua o voo com o modelo
+desafiante depois que a resposta principal já foi montada e registra a
+concordância, a diferença de probabilidade e a latência do desafiante.
+
+Se a fila estiver cheia o item é descartado (e contado), para o shadow
+nunca gerar backpressure no caminho principal.
+"""
+
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+SHADOW_MODEL = os.getenv("SHADOW_MODEL")
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "0.1"))
+SHADOW_QUEUE_SIZE = int(os.getenv("SHADOW_QUEUE_SIZE", "1000"))
+
+
+class ShadowScorer:
+    """Pontua uma amostra do tráfego com o desafiante, fora do caminho da requisição"""
+
+    def __init__(self, challenger: str, score_fn, sample_rate: float = SHADOW_SAMPLE_RATE,
+                 queue_size: int = SHADOW_QUEUE_SIZE, latency_window: int = 1000):
+        """
+        Args:
+            challenger: nome do modelo desafiante no catálogo
+            score_fn: função (voo, ModelVersion) -> (atraso, probabilidade)
+            sample_rate: fração das requisições enviadas ao desafiante (0 a 1)
+            queue_size: máximo de itens esperando; acima disso são descartados
+        """
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f"sample_rate deve estar entre 0 e 1: {sample_rate}")
+
+        self.challenger = challenger
+        self.score_fn = score_fn
+        self.sample_rate = sample_rate
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._latencies = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+        self.sampled = 0
+        self.dropped = 0
+        self.scored = 0
+        self.errors = 0
+        self.agreements = 0
+        self.sum_abs_delta = 0.0
+        self.max_abs_delta = 0.0
+        self.sum_delta = 0.0
+
+    def start(self):
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._thread.start()
+        logger.info(f"🕶️ Shadow ativo: desafiante '{self.challenger}', amostra {self.sample_rate:.0%}")
+
+    def stop(self, timeout: float = 2.0):
+        """Encerrar sem bloquear: itens ainda na fila são descartados (e contados)"""
+        if self._thread is not None:
+            self._stopping.set()
+            while True:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    break
+            try:
+                self._queue.put_nowait(None)     # acordar a thread se ela estiver esperando na fila
+            except queue.Full:
+                pass                             # um offer() concorrente encheu a fila: ela acorda com ele
+            self._thread.join(timeout)
+            self._thread = None
+
+    def offer(self, flight, primary: tuple, model_set):
+        """Chamado no caminho principal: O(1), nunca bloqueia"""
+        if self._stopping.is_set() or (self.sample_rate < 1.0 and random.random() >= self.sample_rate):
+            return
+
+        challenger = model_set.models.get(self.challenger)
+        if challenger is None:
+            return
+
+        self.sampled += 1
+        try:
+            self._queue.put_nowait((flight, primary, challenger))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None or self._stopping.is_set():
+                return
+
+            flight, (primary_atraso, primary_probability), challenger = item
+            start = time.perf_counter()
+            try:
+                atraso, probability = self.score_fn(flight, challenger)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"⚠️ Erro no shadow '{self.challenger}': {e}")
+                continue
+            latency_ms = (time.perf_counter() - start) * 1000
+
+            delta = probability - primary_probability
+            with self._lock:
+                self.scored += 1
+                self.agreements += int(bool(atraso) == bool(primary_atraso))
+                self.sum_delta += delta
+                self.sum_abs_delta += abs(delta)
+                self.max_abs_delta = max(self.max_abs_delta, abs(delta))
+                self._latencies.append(latency_ms)
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            scored = self.scored
+
+            def percentile(p):
+                return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 4) if latencies else None
+
+            return {
+                "enabled": self._thread is not None,
+                "challenger": self.challenger,
+                "sample_rate": self.sample_rate,
+                "sampled": self.sampled,
+                "scored": scored,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "queue_depth": self._queue.qsize(),
+                "queue_size": self._queue.maxsize,
+                "agreement_rate": round(self.agreements / scored, 4) if scored else None,
+                "mean_delta": round(self.sum_delta / scored, 6) if scored else None,
+                "mean_abs_delta": round(self.sum_abs_delta / scored, 6) if scored else None,
+                "max_abs_delta": round(self.max_abs_delta, 6),
+                "latency_ms": {"p50": percentile(0.50), "p95": percentile(0.95), "p99": percentile(0.99)},
+            }
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""Configurações do pytest para os testes da ml-api"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ML_API_DIR = Path(__file__).parent.parent
+
+# A API carrega model.joblib e os encoders com caminhos relativos
+sys.path.insert(0, str(ML_API_DIR))
+os.chdir(ML_API_DIR)
+
+# Aquecimento do startup desligado por padrão (o lifespan roda a cada teste); test_warmup liga
+os.environ.setdefault("WARMUP_ENABLED", "false")
+
+
+@pytest.fixture
+def client():
+    """Cliente de teste com o lifespan da API executado (estado global recarregado a cada teste)"""
+    from fastapi.testclient import TestClient
+    from app import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def flight_payload():
+    """Payload de voo válido"""
+    return {
+        "companhia_aerea": "LATAM",
+        "aeroporto_origem": "GRU",
+        "aeroporto_destino": "SCL",
+        "data_hora_partida": "2024-01-15T14:30:00",
+        "distancia_km": 2600.0
+    }
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Testes do controle de admissão (503 + Retry-After acima do orçamento)"""
+
+import pytest
+
+import app as app_module
+from admission import AdmissionController, Overloaded
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_service_time_learned_from_latency_and_concurrency():
+    clock = FakeClock()
+    controller = AdmissionController(budget_seconds=1.0, safety=1.0, alpha=1.0, clock=clock)
+
+    tickets = [controller.admit("predict") for _ in range(4)]
+    clock.now = 0.4
+    controller.release(tickets[-1])           # 0.4s com 4 em andamento -> 0.1s por requisição
+    assert controller.service_seconds["predict"] == pytest.approx(0.1)
+
+    # 3 em andamento + a nova = 0.4s previstos
+    assert controller.estimated_seconds("predict") == pytest.approx(0.4)
+
+
+def test_sheds_when_estimated_wait_exceeds_budget():
+    controller = AdmissionController(budget_seconds=0.5, safety=1.0)
+    controller.service_seconds["predict"] = 0.1
+
+    # Previsões 0.1, 0.2, ..., 0.5s: todas dentro do orçamento
+    tickets = [controller.admit("predict") for _ in range(5)]
+    with pytest.raises(Overloaded) as exc_info:
+        controller.admit("predict")                              # 0.6s > 0.5s
+
+    assert exc_info.value.reason.startswith("espera estimada")
+    assert exc_info.value.retry_after >= 1.0
+    assert controller.shed[("predict", "estimated_wait")] == 1
+    for ticket in tickets:
+        controller.release(ticket)
+
+
+def test_class_recovers_after_slow_request():
+    """Um lote lento não fecha a classe: a sonda passa com a classe ociosa e a média decai"""
+    clock = FakeClock()
+    controller = AdmissionController(budget_seconds=1.0, safety=1.0, decay_seconds=5.0, clock=clock)
+
+    ticket = controller.admit("batch")
+    clock.now = 3.0
+    controller.release(ticket)                # 3s > orçamento de 1s
+    assert controller.estimated_seconds("batch") > 1.0
+
+    # Nada em andamento: a sonda é admitida mesmo acima do orçamento
+    probe = controller.admit("batch")
+    with pytest.raises(Overloaded):
+        controller.admit("batch")             # com a sonda em andamento, continua recusando
+    clock.now = 3.05
+    controller.release(probe)
+
+    # Sem observações a média cai pela metade a cada 5s
+    clock.now = 3.05 + 20.0
+    assert controller.service("batch") < 0.2
+    tickets = [controller.admit("batch") for _ in range(3)]
+    assert controller.shed[("batch", "estimated_wait")] == 1
+    for ticket in tickets:
+        controller.release(ticket)
+
+
+def test_hard_in_flight_limit():
+    controller = AdmissionController(max_in_flight=2)
+    controller.admit("batch")
+    controller.admit("batch")
+    with pytest.raises(Overloaded):
+        controller.admit("batch")
+    assert controller.shed[("batch", "in_flight")] == 1
+
+
+def test_overloaded_predict_returns_503_and_is_counted(client, flight_payload, monkeypatch):
+    monkeypatch.setattr(app_module.admission, "max_in_flight", 0)
+
+    response = client.post("/predict", json=flight_payload)
+    assert response.status_code == 503
+    assert int(response.headers["retry-after"]) >= 1
+    assert client.get("/health").status_code == 200
+
+    monkeypatch.setattr(app_module.admission, "max_in_flight", 512)
+    assert client.post("/predict", json=flight_payload).status_code == 200
+
+    body = client.get("/metrics").text
+    assert 'api_admission_shed_total{class="predict",reason="in_flight"}' in body
+    assert 'api_admission_accepted_total{class="predict"}' in body
+    assert app_module.admission.in_flight == 0
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Testes da entrada/saída Arrow (/predict/arrow)"""
+
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+import arrow_io  # noqa: E402
+
+ARROW_HEADERS = {"Content-Type": arrow_io.ARROW_STREAM_MEDIA_TYPE}
+
+
+@pytest.fixture
+def flights(flight_payload):
+    return [
+        flight_payload,
+        {**flight_payload, "companhia_aerea": "GOL", "data_hora_partida": "2024-07-06T08:15:00"},
+        {**flight_payload, "aeroporto_origem": "gig", "aeroporto_destino": "EZE", "distancia_km": 2000.0},
+        {**flight_payload, "companhia_aerea": "DESCONHECIDA", "aeroporto_origem": "XXX"},
+        {**flight_payload, "data_hora_partida": "2024-12-24T23:59:00", "distancia_km": 15000.0},
+    ]
+
+
+def _predict(client, data):
+    response = client.post("/predict/arrow", content=arrow_io.write_table(data), headers=ARROW_HEADERS)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == arrow_io.ARROW_STREAM_MEDIA_TYPE
+    return pa.ipc.open_stream(response.content).read_all()
+
+
+@pytest.mark.parametrize("departures", ["string", "timestamp", "categorical"])
+def test_arrow_matches_batch(client, flights, departures):
+    """Mesmas predições do /predict/batch, com datas em texto ou timestamp e textos categóricos"""
+    frame = pd.DataFrame(flights)
+    if departures != "string":
+        frame["data_hora_partida"] = pd.to_datetime(frame["data_hora_partida"])
+    if departures == "categorical":
+        frame["companhia_aerea"] = frame["companhia_aerea"].astype("category")
+
+    table = _predict(client, frame)
+    assert table.column_names == ["atraso", "probabilidade"]
+    expected = client.post("/predict/batch", json=flights).json()["resultados"]
+    assert table.column("atraso").to_pylist() == [result["atraso"] for result in expected]
+    assert table.column("probabilidade").to_pylist() == pytest.approx([result["probabilidade"] for result in expected])
+
+
+def test_arrow_empty(client, flights):
+    table = _predict(client, pd.DataFrame(flights).iloc[:0])
+    assert table.num_rows == 0
+
+
+@pytest.mark.parametrize("change", [
+    lambda frame: frame.drop(columns=["distancia_km"]),
+    lambda frame: frame.assign(distancia_km=[None] + [1000.0] * (len(frame) - 1)),
+    lambda frame: frame.assign(data_hora_partida="ontem"),
+])
+def test_arrow_invalid_input(client, flights, change):
+    response = client.post("/predict/arrow", content=arrow_io.write_table(change(pd.DataFrame(flights))),
+                           headers=ARROW_HEADERS)
+    assert response.status_code == 422
+
+
+def test_arrow_not_ipc(client):
+    response = client.post("/predict/arrow", content=b'{"nao": "arrow"}', headers=ARROW_HEADERS)
+    assert response.status_code == 422
+
+
+def test_app_import_does_not_load_pyarrow():
+    """pyarrow só é importado na primeira requisição Arrow, não no cold start"""
+    probe = "import sys, app; print('pyarrow' in sys.modules, app.ARROW_AVAILABLE)"
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "False True"
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Testes do logging assíncrono e do access log amostrado"""
+
+import logging
+import queue
+
+import pytest
+
+from async_logging import AccessLog, DroppingQueueHandler, JsonFormatter, parse_sampling
+from metrics import RequestTimer
+
+
+class ListLogger:
+    def __init__(self):
+        self.records = []
+
+    def isEnabledFor(self, level):
+        return True
+
+    def info(self, msg):
+        self.records.append(msg)
+
+
+def test_queue_handler_drops_when_full():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    logger = logging.getLogger("test.async_logging.drop")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        for i in range(5):
+            logger.warning("mensagem %d", i)
+    finally:
+        logger.removeHandler(handler)
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+    # Nada foi formatado no caminho da requisição
+    assert handler.queue.get_nowait().args == (0,)
+
+
+def test_parse_sampling():
+    assert parse_sampling("/predict=0.01, default=0.5") == {"/predict": 0.01, "default": 0.5}
+    with pytest.raises(ValueError):
+        parse_sampling("/predict=2")
+
+
+def test_access_log_samples_success_but_keeps_errors():
+    target = ListLogger()
+    access_log = AccessLog("/predict=0,default=1", logger=target)
+    timer = RequestTimer()
+    timer.stages.append(("inference", 0.0002))
+
+    access_log("/predict", "POST", 200, timer, 0.001)
+    access_log("/predict", "POST", 500, timer, 0.001)
+    access_log("/health", "GET", 200, timer, 0.001)
+
+    assert access_log.sampled_out == 1
+    assert [r["status"] for r in target.records] == [500, 200]
+    assert target.records[0]["stages_ms"] == {"inference": 0.2}
+
+
+def test_json_formatter_serializes_access_records():
+    record = logging.LogRecord("api.access", logging.INFO, __file__, 1, {"status": 200, "rota": "GRU→SCL"}, None, None)
+    assert JsonFormatter().format(record) == '{"status":200,"rota":"GRU→SCL"}'
+
+
+def test_predict_emits_access_log(client, flight_payload, monkeypatch):
+    import app as app_module
+
+    target = ListLogger()
+    monkeypatch.setattr(app_module.access_log, "logger", target)
+    monkeypatch.setattr(app_module.access_log, "rates", {"default": 1.0})
+    monkeypatch.setattr(app_module.access_log, "default_rate", 1.0)
+
+    client.post("/predict", json=flight_payload)
+
+    record = target.records[-1]
+    assert record["endpoint"] == "/predict"
+    assert record["model"] == "padrao"
+    assert set(record["stages_ms"]) == {"prepare_features", "inference"}
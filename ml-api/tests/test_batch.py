@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""Testes do endpoint de predição em lote"""
+
+
+def test_batch_matches_single(client, flight_payload):
+    """Cada item do lote deve ser igual ao /predict do mesmo voo"""
+    flights = [
+        flight_payload,
+        {**flight_payload, "companhia_aerea": "GOL", "data_hora_partida": "2024-07-06T08:15:00"},
+        {**flight_payload, "aeroporto_origem": "GIG", "aeroporto_destino": "EZE", "distancia_km": 2000.0},
+        {**flight_payload, "companhia_aerea": "DESCONHECIDA"},
+    ]
+
+    response = client.post("/predict/batch", json=flights)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == len(flights)
+
+    for flight, result in zip(flights, data["resultados"]):
+        single = client.post("/predict", json=flight).json()
+        assert result["atraso"] == single["atraso"]
+        assert abs(result["probabilidade"] - single["probabilidade"]) < 1e-6
+
+
+def test_batch_empty(client):
+    """Lote vazio retorna lista vazia"""
+    response = client.post("/predict/batch", json=[])
+    assert response.status_code == 200
+    assert response.json()["total"] == 0
+
+
+def test_batch_invalid_item(client, flight_payload):
+    """Um item inválido invalida o lote (422)"""
+    response = client.post("/predict/batch", json=[flight_payload, {"companhia_aerea": "GOL"}])
+    assert response.status_code == 422
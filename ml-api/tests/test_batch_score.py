@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Testes da pontuação offline (batch_score.py)"""
+
+import pandas as pd
+import pytest
+
+import batch_score
+
+
+@pytest.fixture
+def schedule(flight_payload):
+    flights = [
+        flight_payload,
+        {**flight_payload, "companhia_aerea": "GOL", "data_hora_partida": "2024-07-06T08:15:00"},
+        {**flight_payload, "aeroporto_origem": "GIG", "aeroporto_destino": "EZE", "distancia_km": 2000.0},
+        {**flight_payload, "companhia_aerea": "DESCONHECIDA"},
+        {**flight_payload, "data_hora_partida": "2024-12-24T23:59:00", "distancia_km": 15000.0},
+    ]
+    return flights
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_matches_batch_endpoint(client, schedule, tmp_path, workers):
+    """Mesmas predições do /predict/batch, na ordem de entrada (blocos pequenos, com e sem pool)"""
+    input_path, output_path = tmp_path / "grade.csv", tmp_path / "previsoes.csv"
+    pd.DataFrame(schedule * 3).to_csv(input_path, index=False)
+
+    stats = batch_score.score_file(str(input_path), str(output_path), workers=workers, chunk_size=4)
+    assert stats["rows"] == 15 and stats["errors"] == 0 and stats["chunks"] == 4
+    assert stats["rows_per_second"] > 0 and stats["peak_rss_mb"]["main"] > 0
+
+    output = pd.read_csv(output_path)
+    expected = client.post("/predict/batch", json=schedule * 3).json()["resultados"]
+    assert output["atraso"].tolist() == [result["atraso"] for result in expected]
+    assert output["probabilidade"].tolist() == pytest.approx([result["probabilidade"] for result in expected])
+    assert output["companhia_aerea"].tolist() == [flight["companhia_aerea"] for flight in schedule * 3]
+
+
+def test_invalid_rows_marked(schedule, tmp_path):
+    """Linhas com data ou distância inválida saem vazias com status error; o resto é pontuado"""
+    frame = pd.DataFrame(schedule)
+    frame.loc[1, "data_hora_partida"] = "ontem"
+    frame.loc[3, "distancia_km"] = None
+    input_path, output_path = tmp_path / "grade.csv", tmp_path / "previsoes.csv"
+    frame.to_csv(input_path, index=False)
+
+    stats = batch_score.score_file(str(input_path), str(output_path), workers=1)
+    output = pd.read_csv(output_path)
+    assert stats["errors"] == 2
+    assert output["status"].tolist() == ["success", "error", "success", "error", "success"]
+    assert output.loc[[1, 3], "probabilidade"].isna().all()
+    assert output.loc[[0, 2, 4], "probabilidade"].notna().all()
+
+
+def test_missing_columns(tmp_path):
+    input_path = tmp_path / "grade.csv"
+    pd.DataFrame({"companhia_aerea": ["LATAM"]}).to_csv(input_path, index=False)
+    with pytest.raises(SystemExit, match="colunas faltando"):
+        batch_score.score_file(str(input_path), str(tmp_path / "out.csv"), workers=1)
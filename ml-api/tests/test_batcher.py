@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""Testes do micro-batcher"""
+
+import asyncio
+import threading
+
+import pytest
+
+from batcher import MicroBatcher
+
+
+def fake_score(calls):
+    def score(matrix, context):
+        calls.append(len(matrix))
+        probabilities = matrix[:, 0] / 10.0
+        return probabilities >= 0.5, probabilities
+    return score
+
+
+def test_concurrent_calls_are_coalesced():
+    """Chamadas concorrentes viram um lote e cada uma recebe o seu resultado"""
+    calls = []
+
+    async def scenario():
+        batcher = MicroBatcher(fake_score(calls), max_batch_size=8, max_wait_ms=50)
+        await batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit([float(i)]) for i in range(10)))
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(scenario())
+
+    assert results == [(i >= 5, i / 10.0) for i in range(10)]
+    assert calls == [8, 2]
+
+
+def test_flush_after_max_wait():
+    """Uma chamada sozinha é pontuada após max_wait_ms"""
+    calls = []
+
+    async def scenario():
+        batcher = MicroBatcher(fake_score(calls), max_batch_size=64, max_wait_ms=1)
+        await batcher.start()
+        try:
+            return await asyncio.wait_for(batcher.submit([7.0]), timeout=1.0)
+        finally:
+            await batcher.stop()
+
+    assert asyncio.run(scenario()) == (True, 0.7)
+    assert calls == [1]
+
+
+def test_contexts_are_scored_separately():
+    """Itens de versões diferentes do modelo não se misturam na mesma matriz"""
+    seen = []
+
+    def score(matrix, context):
+        seen.append((context, len(matrix)))
+        probabilities = matrix[:, 0] * context
+        return probabilities >= 0.5, probabilities
+
+    async def scenario():
+        batcher = MicroBatcher(score, max_batch_size=8, max_wait_ms=50)
+        await batcher.start()
+        try:
+            return await asyncio.gather(
+                batcher.submit([0.1], 1), batcher.submit([0.1], 2), batcher.submit([0.2], 1)
+            )
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(scenario())
+    assert [p for _, p in results] == pytest.approx([0.1, 0.2, 0.2])
+    assert sorted(seen) == [(1, 2), (2, 1)]
+
+
+def test_errors_reach_every_caller():
+    """Erro no modelo é propagado para todos do lote"""
+    def broken(matrix, context):
+        raise RuntimeError("modelo quebrado")
+
+    async def scenario():
+        batcher = MicroBatcher(broken, max_batch_size=4, max_wait_ms=10)
+        await batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit([1.0]) for _ in range(3)), return_exceptions=True)
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_full_queue_rejects_with_retry_after():
+    """Fila cheia: submit recusa na hora com ExecutorSaturated (503 + Retry-After no app)"""
+    from executor import ExecutorSaturated
+
+    release = None
+
+    async def slow(matrix, context):
+        await release.wait()
+        return fake_score([])(matrix, context)
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        batcher = MicroBatcher(slow, max_batch_size=1, max_wait_ms=0, max_queue=2)
+        await batcher.start()
+        try:
+            first = asyncio.ensure_future(batcher.submit([1.0]))
+            await asyncio.sleep(0.01)                      # o worker pegou o primeiro e está pontuando
+            queued = [asyncio.ensure_future(batcher.submit([2.0])) for _ in range(2)]
+            await asyncio.sleep(0)
+            with pytest.raises(ExecutorSaturated) as exc_info:
+                await batcher.submit([3.0])
+            release.set()
+            await asyncio.gather(first, *queued)
+            return exc_info.value, batcher.stats()
+        finally:
+            await batcher.stop()
+
+    error, stats = asyncio.run(scenario())
+    assert error.retry_after >= 1.0
+    assert stats["rejected"] == 1 and stats["max_queue"] == 2
+
+
+def test_async_score_fn_runs_off_the_loop():
+    """score_fn async (executor de inferência): o lote é pontuado numa thread do pool"""
+    from executor import InferenceExecutor
+
+    executor = InferenceExecutor("thread", workers=1, max_pending=4, offload_min_rows=1)
+    threads = []
+
+    def score(matrix, context):
+        threads.append(threading.current_thread().name)
+        return fake_score([])(matrix, context)
+
+    async def scenario():
+        batcher = MicroBatcher(lambda matrix, context: executor.run(score, matrix, context, rows=len(matrix)),
+                               max_batch_size=8, max_wait_ms=20)
+        await batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit([float(i)]) for i in range(3)))
+        finally:
+            await batcher.stop()
+
+    executor.start()
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert results == [(i >= 5, i / 10.0) for i in range(3)]
+    assert threads and all(name.startswith("inference") for name in threads)
+
+
+def test_predict_through_batcher_matches_inline(monkeypatch, flight_payload):
+    """/predict com micro-batching devolve o mesmo que o caminho direto"""
+    from fastapi.testclient import TestClient
+    import app as app_module
+
+    with TestClient(app_module.app) as client:
+        expected = client.post("/predict", json=flight_payload).json()
+
+    # Sem a tabela de logits para a predição passar pelo micro-batcher
+    monkeypatch.setattr("logit_table.LOGIT_TABLE_ENABLED", False)
+    monkeypatch.setattr(app_module, "MICROBATCH_ENABLED", True)
+    with TestClient(app_module.app) as client:
+        response = client.post("/predict", json=flight_payload).json()
+        stats = client.get("/model-info").json()["micro_batching"]
+
+    assert stats["enabled"] is True
+    assert stats["items"] == 1
+
+    assert response["atraso"] == expected["atraso"]
+    assert response["probabilidade"] == pytest.approx(expected["probabilidade"], abs=1e-12)
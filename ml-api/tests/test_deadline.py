@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Testes de deadline por requisição (504 e descarte de trabalho vencido)"""
+
+import asyncio
+import time
+
+import pytest
+
+import deadline
+from batcher import MicroBatcher
+from deadline import DeadlineExceeded, parse_deadline
+from executor import InferenceExecutor
+
+
+def test_parse_relative_and_absolute_headers():
+    assert parse_deadline({"x-request-timeout-ms": "3000"}, now=10.0) == pytest.approx(13.0)
+    # Epoch absoluto: 500 ms depois do relógio de parede atual
+    assert parse_deadline({"x-request-deadline": "1000500"}, now=10.0, wall=1000.0) == pytest.approx(10.5)
+    assert parse_deadline({"x-request-timeout-ms": "abc"}, now=10.0) is None
+    assert parse_deadline({}, now=10.0) is None
+
+
+def test_expired_items_are_dropped_from_micro_batch():
+    scored = []
+
+    def score(matrix, context):
+        scored.append(len(matrix))
+        return matrix[:, 0] >= 0.5, matrix[:, 0]
+
+    async def scenario():
+        batcher = MicroBatcher(score, max_batch_size=8, max_wait_ms=20)
+        await batcher.start()
+        try:
+            return await asyncio.gather(
+                batcher.submit([0.9], deadline=time.monotonic() + 5),
+                batcher.submit([0.1], deadline=time.monotonic() - 1),
+                return_exceptions=True
+            )
+        finally:
+            await batcher.stop()
+
+    ok, expired = asyncio.run(scenario())
+    assert ok == (True, pytest.approx(0.9))
+    assert isinstance(expired, DeadlineExceeded) and expired.stage == "micro_batch"
+    assert scored == [1]
+
+
+def test_executor_skips_expired_work():
+    calls = []
+    executor = InferenceExecutor(backend="thread", workers=1, offload_min_rows=1)
+    executor.start()
+    try:
+        with pytest.raises(DeadlineExceeded):
+            asyncio.run(executor.run(calls.append, 1, deadline=time.monotonic() - 1))
+        asyncio.run(executor.run(calls.append, 2, deadline=time.monotonic() + 5))
+    finally:
+        executor.shutdown()
+    assert calls == [2]
+
+
+def test_expired_request_returns_504_and_is_counted(client, flight_payload):
+    response = client.post("/predict", json=flight_payload, headers={"X-Request-Timeout-Ms": "0"})
+    assert response.status_code == 504
+    assert response.json()["stage"] == "admission"
+
+    response = client.post("/predict/batch", json=[flight_payload] * 3, headers={"X-Request-Timeout-Ms": "3000"})
+    assert response.status_code == 200
+
+    assert 'api_deadline_dropped_total{stage="admission"}' in client.get("/metrics").text
+    assert deadline.current_deadline() is None
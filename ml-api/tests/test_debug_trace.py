@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""Testes do trace de debug opt-in do /predict"""
+
+import math
+
+import pytest
+
+from debug_trace import wants_trace
+
+
+def test_wants_trace_header_and_sampling():
+    assert wants_trace("1")
+    assert wants_trace("true")
+    assert not wants_trace(None, sample_rate=0.0)
+    assert not wants_trace("false", sample_rate=0.0)
+    assert wants_trace(None, sample_rate=1.0)
+
+
+def test_predict_without_header_has_no_debug(client, flight_payload):
+    data = client.post("/predict", json=flight_payload).json()
+    assert "debug" not in data
+    assert set(data) == {"atraso", "probabilidade", "status", "mensagem"}
+
+    batch = client.post("/predict/batch", json=[flight_payload]).json()
+    assert "debug" not in batch["resultados"][0]
+
+
+def test_predict_with_header_returns_trace(client, flight_payload):
+    data = client.post("/predict", json=flight_payload, headers={"X-Debug-Trace": "1"}).json()
+    debug = data["debug"]
+
+    assert debug["modelo"] == "padrao"
+    assert list(debug["features"]) == debug_feature_names(client)
+    assert debug["encoders"]["companhia"]["encontrada"] is True
+    assert debug["encoders"]["rota"]["codigo"] == debug["features"]["rota"]
+    assert {"parse", "prepare_features", "inference"} <= set(debug["tempos_ms"])
+
+    # Contribuições somam o logit que gera a probabilidade respondida
+    contributions = debug["contribuicoes"]
+    logit = contributions["intercepto"] + sum(f["contribuicao"] for f in contributions["features"].values())
+    assert logit == pytest.approx(contributions["logit"])
+    probability = 1 / (1 + math.exp(-contributions["link_scale"] * logit))
+    assert probability == pytest.approx(data["probabilidade"], abs=1e-6)
+
+
+def test_trace_flags_unknown_airline(client, flight_payload):
+    flight_payload["companhia_aerea"] = "NAO-EXISTE"
+    debug = client.post("/predict", json=flight_payload, headers={"X-Debug-Trace": "1"}).json()["debug"]
+    assert debug["encoders"]["companhia"]["encontrada"] is False
+
+
+def debug_feature_names(client):
+    return client.get("/model-info").json()["feature_layout"]
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Testes dos encoders compilados"""
+
+import numpy as np
+
+from encoders import CompiledEncoders
+
+AIRLINES = {"LATAM": 0, "GOL": 1, "AZUL": 2, "UNKNOWN": -1}
+ROUTES = {"GRU-SCL": 0, "GIG-EZE": 1, "GRU-GIG": 2, "UNKNOWN": -1}
+
+
+def reference_airline(name):
+    return AIRLINES.get(name.upper(), AIRLINES.get("UNKNOWN", 0))
+
+
+def reference_route(origin, destination):
+    return ROUTES.get(f"{origin.upper()}-{destination.upper()}", ROUTES.get("UNKNOWN", 0))
+
+
+def test_same_result_as_dict_lookup():
+    """Mesmo resultado da consulta antiga com f-string + .upper()"""
+    encoders = CompiledEncoders(AIRLINES, ROUTES)
+
+    for name in ["LATAM", "gol", "Azul", "TAP", ""]:
+        assert encoders.airline(name) == reference_airline(name)
+
+    airports = ["GRU", "gru", "SCL", "GIG", "eze", "CGH", "XXX"]
+    for origin in airports:
+        for destination in airports:
+            assert encoders.route(origin, destination) == reference_route(origin, destination)
+
+
+def test_default_without_unknown_key():
+    """Sem UNKNOWN no JSON, o default é 0 (como o dict.get antigo)"""
+    encoders = CompiledEncoders({"LATAM": 3}, {"GRU-SCL": 5})
+    assert encoders.airline("TAP") == 0
+    assert encoders.route("GRU", "EZE") == 0
+
+
+def test_vectorized_matches_scalar():
+    encoders = CompiledEncoders(AIRLINES, ROUTES)
+    names = ["LATAM", "gol", "TAP", "LATAM", "azul"]
+    origins = ["GRU", "gig", "GRU", "CGH", "GRU"]
+    destinations = ["SCL", "EZE", "GIG", "GRU", "scl"]
+
+    np.testing.assert_array_equal(encoders.airlines(names), [encoders.airline(n) for n in names])
+    np.testing.assert_array_equal(
+        encoders.routes(origins, destinations),
+        [encoders.route(o, d) for o, d in zip(origins, destinations)]
+    )
+    assert encoders.airlines([]).shape == (0,)
+
+
+def test_many_routes():
+    """Escala para milhares de rotas"""
+    airports = [f"A{i:02d}" for i in range(80)]
+    routes = {f"{o}-{d}": i for i, (o, d) in enumerate((o, d) for o in airports for d in airports if o != d)}
+    encoders = CompiledEncoders(AIRLINES, routes)
+
+    assert encoders.route("A10", "A42") == routes["A10-A42"]
+    assert encoders.route("a10", "a42") == routes["A10-A42"]
+    assert encoders.route("A10", "A10") == 0
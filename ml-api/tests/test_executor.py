@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""Testes do executor de inferência (inline, threads, processos e backpressure)"""
+
+import asyncio
+import threading
+
+import joblib
+import numpy as np
+import pytest
+
+import app as app_module
+from executor import ExecutorSaturated, InferenceExecutor
+from inference import LogisticScorer, predict_with_threshold
+
+
+def current_thread_name():
+    return threading.current_thread().name
+
+
+def test_small_jobs_run_inline_and_large_ones_in_the_pool():
+    executor = InferenceExecutor("thread", workers=2, max_pending=4, offload_min_rows=100)
+    executor.start()
+    try:
+        inline = asyncio.run(executor.run(current_thread_name, rows=1))
+        pooled = asyncio.run(executor.run(current_thread_name, rows=500))
+    finally:
+        executor.shutdown()
+
+    assert inline == threading.current_thread().name
+    assert pooled.startswith("inference")
+    assert executor.inline_jobs == 1
+    assert executor.offloaded_jobs == 1
+
+
+def test_heavy_jobs_always_go_to_the_pool():
+    """predict_proba do sklearn (heavy) sai do event loop mesmo com poucas linhas"""
+    executor = InferenceExecutor("thread", workers=1, max_pending=4, offload_min_rows=100)
+    executor.start()
+    try:
+        pooled = asyncio.run(executor.run(current_thread_name, rows=1, heavy=True))
+    finally:
+        executor.shutdown()
+
+    assert pooled.startswith("inference")
+    assert executor.inline_jobs == 0
+
+
+def test_saturated_pool_rejects_with_retry_after():
+    executor = InferenceExecutor("thread", workers=1, max_pending=1, offload_min_rows=1)
+    executor.start()
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait, rows=1))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ExecutorSaturated) as exc_info:
+            await executor.run(release.wait, rows=1)
+        release.set()
+        await running
+        return exc_info.value
+
+    try:
+        error = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert error.retry_after >= 1.0
+    assert executor.rejected == 1
+    assert executor.in_flight == 0
+
+
+def test_process_backend_matches_inline():
+    model = joblib.load("model.joblib")
+    scorer = LogisticScorer.from_model(model)
+    features = np.random.default_rng(0).uniform(0, 10, size=(300, scorer.n_features))
+
+    executor = InferenceExecutor("process", workers=1, max_pending=2, offload_min_rows=1)
+    executor.start()
+    try:
+        labels, probabilities = asyncio.run(executor.run(predict_with_threshold, scorer, features, 0.3, rows=300))
+    finally:
+        executor.shutdown()
+
+    expected_labels, expected_probabilities = predict_with_threshold(scorer, features, 0.3)
+    np.testing.assert_array_equal(labels, expected_labels)
+    np.testing.assert_allclose(probabilities, expected_probabilities, rtol=0, atol=1e-12)
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        InferenceExecutor("gpu")
+
+
+def test_batch_returns_503_when_saturated(client, flight_payload, monkeypatch):
+    async def saturated_run(*args, **kwargs):
+        raise ExecutorSaturated(2.5)
+
+    monkeypatch.setattr(app_module.inference_executor, "run", saturated_run)
+    response = client.post("/predict/batch", json=[flight_payload] * 3)
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "3"
+    assert client.get("/health").status_code == 200
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""Contrato do codec JSON rápido: mesmas respostas, byte a byte, que o response_model do FastAPI"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import app as app_module
+from app import BatchPredictionResponse, FlightRequest, PredictionResponse
+from fast_json import FlightDecoder, encode_batch, encode_prediction, parse_datetime
+
+PROBABILITIES = [0.0, 1.0, 0.5, 0.05, 1e-05, 1e-17, 0.1 + 0.2, 0.9999999999999999, 2.5e-300, 0.123456789012345678]
+MESSAGES = ["Predição: Atraso (12.3%)", 'aspas " e barra \\ e \n quebra', "emoji ✈️ e   e \x01", None]
+
+
+def reference_app(responses):
+    """App com a mesma declaração de rota de antes do codec (o FastAPI serializa)"""
+    reference = FastAPI()
+
+    @reference.get("/single", response_model=PredictionResponse, response_model_exclude_none=True)
+    async def single(i: int):
+        return responses[i]
+
+    @reference.get("/batch", response_model=BatchPredictionResponse, response_model_exclude_none=True)
+    async def batch():
+        return BatchPredictionResponse(resultados=responses, total=len(responses))
+
+    return TestClient(reference)
+
+
+def test_encode_prediction_matches_fastapi_bytes():
+    responses = [
+        PredictionResponse(atraso=i % 2 == 0, probabilidade=p, status="success", mensagem=m)
+        for i, (p, m) in enumerate((p, m) for p in PROBABILITIES for m in MESSAGES)
+    ]
+    reference = reference_app(responses)
+
+    for i, response in enumerate(responses):
+        assert encode_prediction(response) == reference.get(f"/single?i={i}").content
+
+
+def test_encode_batch_matches_fastapi_bytes():
+    responses = [
+        PredictionResponse(atraso=p > 0.05, probabilidade=p, status="success", mensagem=app_module.build_message(p > 0.05, p))
+        for p in PROBABILITIES
+    ]
+    expected = reference_app(responses).get("/batch").content
+
+    encoded = encode_batch([r.atraso for r in responses], [r.probabilidade for r in responses],
+                           [r.mensagem for r in responses])
+    assert encoded == expected
+    assert encode_batch([], [], []) == b'{"resultados":[],"total":0,"status":"success"}'
+
+
+@pytest.mark.parametrize("value", [
+    "2024-01-15T14:30:00", "2024-01-15T14:30", "2024-01-15 14:30:00", "2024-01-15T14:30:00.5",
+    "2024-01-15T14:30:00.123456", "2024-01-15T14:30:00Z", "2024-01-15T14:30:00-03:00", "2024-02-29T23:59:59+05:30",
+])
+def test_parse_datetime_matches_pydantic(value):
+    expected = FlightRequest.model_validate({
+        "companhia_aerea": "X", "aeroporto_origem": "A", "aeroporto_destino": "B",
+        "data_hora_partida": value, "distancia_km": 1,
+    }).data_hora_partida
+    parsed = parse_datetime(value)
+
+    assert parsed == expected
+    assert parsed.utcoffset() == expected.utcoffset()
+    assert (parsed.hour, parsed.weekday(), parsed.month) == (expected.hour, expected.weekday(), expected.month)
+
+
+@pytest.mark.parametrize("value", ["2024-02-30T10:00:00", "15/01/2024 14:30", "2024-01-15T14:30:00.1234567", "1705329000"])
+def test_parse_datetime_leaves_other_formats_to_pydantic(value):
+    assert parse_datetime(value) is None
+
+
+def test_decoder_fast_path_equals_pydantic(flight_payload):
+    decoder = FlightDecoder(FlightRequest)
+    body = app_module.json.dumps(flight_payload).encode()
+
+    assert decoder.decode(body) == FlightRequest.model_validate_json(body)
+    assert decoder.fast_hits == 1
+
+    # Tipos "soltos" (distância como string, timestamp numérico) passam pelo Pydantic
+    flight_payload["distancia_km"] = "2600"
+    assert decoder.decode(app_module.json.dumps(flight_payload).encode()).distancia_km == 2600.0
+    assert decoder.fallbacks == 1
+
+
+def test_endpoints_keep_previous_bytes_and_errors(client, flight_payload, monkeypatch):
+    flights = [flight_payload, {**flight_payload, "companhia_aerea": "GOL", "data_hora_partida": "2024-07-06T22:05:00Z"}]
+
+    fast_single = client.post("/predict", json=flight_payload)
+    fast_batch = client.post("/predict/batch", json=flights)
+    fast_error = client.post("/predict", json={**flight_payload, "distancia_km": "longe"})
+    fast_invalid = client.post("/predict", content=b"{nao e json", headers={"Content-Type": "application/json"})
+
+    monkeypatch.setattr(app_module.flight_decoder, "enabled", False)
+    slow_single = client.post("/predict", json=flight_payload)
+    slow_batch = client.post("/predict/batch", json=flights)
+    slow_error = client.post("/predict", json={**flight_payload, "distancia_km": "longe"})
+
+    assert fast_single.content == slow_single.content
+    assert fast_batch.content == slow_batch.content
+    assert fast_single.headers["content-type"] == slow_single.headers["content-type"] == "application/json"
+    assert fast_error.status_code == slow_error.status_code == 422
+    assert fast_error.json() == slow_error.json()
+    assert fast_error.json()["detail"][0]["loc"] == ["body", "distancia_km"]
+    assert fast_invalid.status_code == 422
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Testes do pipeline de features em colunas (mesmas features no /predict, lotes e treino)"""
+
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from encoders import CompiledEncoders
+from feature_layouts import FeatureAdapter, departure_columns, frame_columns
+
+TRANSFORM_DIR = Path(__file__).parent.parent.parent / "datascience" / "3_development" / "code"
+
+DEPARTURES = [
+    datetime(2024, 1, 15, 14, 30),
+    datetime(2024, 2, 29, 0, 0, 59),                                   # bissexto, segundos descartados
+    datetime(1969, 12, 31, 23, 59),                                    # antes da época
+    datetime(2024, 12, 31, 23, 0, tzinfo=timezone(timedelta(hours=-3))),  # com fuso: hora local
+    datetime(2025, 6, 1, 6, 5),
+]
+
+
+@pytest.fixture
+def encoders():
+    return CompiledEncoders({"LATAM": 0, "GOL": 1, "UNKNOWN": -1}, {"GRU-SCL": 0, "GIG-EZE": 1, "UNKNOWN": -1})
+
+
+@pytest.fixture
+def flights():
+    from app import FlightRequest
+
+    return [
+        FlightRequest(companhia_aerea=airline, aeroporto_origem=origin, aeroporto_destino=destination,
+                      data_hora_partida=departure, distancia_km=km)
+        for departure, (airline, origin, destination, km) in zip(DEPARTURES, [
+            ("LATAM", "GRU", "SCL", 2600.0), ("gol", "gig", "eze", 2000.0), ("AZUL", "GRU", "SCL", 15000.0),
+            ("LATAM", "XXX", "SCL", 300.5), ("GOL", "GRU", "EZE", 0.0),
+        ])
+    ]
+
+
+def test_departure_columns_match_datetime():
+    departures = [departure.replace(tzinfo=None) for departure in DEPARTURES]
+    columns = departure_columns(np.array(departures, dtype="datetime64[us]"))
+    assert columns["hora"].tolist() == [d.hour for d in departures]
+    assert columns["dia_semana"].tolist() == [d.weekday() for d in departures]
+    assert columns["mes"].tolist() == [d.month for d in departures]
+
+
+@pytest.mark.parametrize("layout", ["padded6", "hour7"])
+def test_rows_batches_and_frames_agree(encoders, flights, layout):
+    """row() do /predict, matriz do /predict/batch e DataFrame (batch_score/treino) dão as mesmas features"""
+    adapter = FeatureAdapter(layout, 7, encoders)
+    rows = np.array([adapter.row(flight) for flight in flights], dtype=np.float64)
+
+    frame = pd.DataFrame([flight.model_dump() for flight in flights])
+    frame["data_hora_partida"] = [departure.replace(tzinfo=None) for departure in frame["data_hora_partida"]]
+    frame["data_hora_partida"] = pd.to_datetime(frame["data_hora_partida"])
+
+    np.testing.assert_array_equal(adapter.matrix(flights), rows)
+    np.testing.assert_array_equal(adapter.matrix_from_columns(frame_columns(frame), len(frame)), rows)
+
+
+@pytest.mark.skipif(not TRANSFORM_DIR.exists(), reason="datascience/ fora da árvore")
+def test_transform_simple_matches_serving(flights):
+    """Features de treino (transform_simple) iguais às do modelo servido no layout hour7"""
+    sys.path.insert(0, str(TRANSFORM_DIR))
+    from transform_simple import load_encoders, transform_simple
+
+    encoders = load_encoders()
+    records = [{**flight.model_dump(), "data_hora_partida": flight.data_hora_partida.replace(tzinfo=None).isoformat()}
+               for flight in flights]
+    features = transform_simple(records, layout="hour7", encoders=encoders)
+
+    adapter = FeatureAdapter("hour7", 7, encoders)
+    assert list(features.columns) == adapter.feature_names
+    np.testing.assert_array_equal(features.to_numpy(), np.array([adapter.row(flight) for flight in flights]))
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""Testes da inferência em passo único"""
+
+import json
+
+import joblib
+import numpy as np
+import pytest
+
+from inference import DEFAULT_THRESHOLD, load_threshold, predict_with_threshold
+
+
+def test_threshold_from_file(tmp_path, monkeypatch):
+    """O threshold vem do optimal_threshold.json"""
+    monkeypatch.delenv("DECISION_THRESHOLD", raising=False)
+    path = tmp_path / "threshold.json"
+    path.write_text(json.dumps({"optimal_threshold": 0.28}))
+    assert load_threshold(str(path)) == 0.28
+
+
+def test_threshold_env_override(tmp_path, monkeypatch):
+    """DECISION_THRESHOLD tem prioridade sobre o arquivo"""
+    monkeypatch.setenv("DECISION_THRESHOLD", "0.7")
+    assert load_threshold(str(tmp_path / "nao_existe.json")) == 0.7
+
+
+def test_threshold_default(tmp_path, monkeypatch):
+    """Sem arquivo nem variável, usa 0.5"""
+    monkeypatch.delenv("DECISION_THRESHOLD", raising=False)
+    assert load_threshold(str(tmp_path / "nao_existe.json")) == DEFAULT_THRESHOLD
+
+
+def test_threshold_invalid(monkeypatch):
+    """Threshold fora de (0, 1) é rejeitado"""
+    monkeypatch.setenv("DECISION_THRESHOLD", "1.5")
+    with pytest.raises(ValueError):
+        load_threshold()
+
+
+def test_predict_with_threshold_matches_sklearn():
+    """Com threshold 0.5 o rótulo é igual ao model.predict()"""
+    model = joblib.load("model.joblib")
+    rng = np.random.default_rng(42)
+    features = rng.uniform(-1, 24, size=(500, model.n_features_in_))
+
+    predictions, probabilities = predict_with_threshold(model, features, 0.5)
+
+    np.testing.assert_array_equal(predictions, model.predict(features) == 1)
+    np.testing.assert_allclose(probabilities, model.predict_proba(features)[:, 1])
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Testes da tabela de logits pré-calculada"""
+
+import joblib
+import numpy as np
+import pytest
+
+from inference import LogisticScorer
+from logit_table import LogitTable
+
+DOMAINS = {0: [0, 1], 1: [-1, 0, 1, 2], 2: [-1, 0, 1], 4: range(7), 5: range(1, 13)}
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    return LogisticScorer.from_model(joblib.load("model.joblib"))
+
+
+def all_rows():
+    rng = np.random.default_rng(7)
+    for turno in (0, 1):
+        for companhia in DOMAINS[1]:
+            for rota in DOMAINS[2]:
+                for dia in range(7):
+                    for mes in range(1, 13):
+                        yield [turno, companhia, rota, float(rng.uniform(0, 1)), dia, mes, 0]
+
+
+@pytest.mark.parametrize("max_bytes", [64 * 1024 * 1024, 0], ids=["combined", "separable"])
+def test_matches_scorer(scorer, max_bytes):
+    """Tabela combinada e por feature dão o mesmo resultado do scorer"""
+    table = LogitTable(scorer, DOMAINS, max_bytes=max_bytes)
+    assert table.mode == ("combined" if max_bytes else "separable")
+
+    for row in all_rows():
+        atraso, probability = table.predict_one(row, 0.5)
+        expected_atraso, expected = scorer.predict_one(row, 0.5)
+        assert probability == pytest.approx(expected, abs=1e-12)
+        assert atraso == expected_atraso
+
+
+def test_value_outside_domain_returns_none(scorer):
+    """Códigos que não estão nos encoders voltam para o scorer"""
+    table = LogitTable(scorer, DOMAINS)
+    assert table.predict_one([0, 99, 0, 0.3, 1, 1, 0], 0.5) is None
+
+
+def test_memory_footprint(scorer):
+    table = LogitTable(scorer, DOMAINS)
+    assert table.nbytes == 2 * 4 * 3 * 7 * 12 * 8
+    assert table.stats()["bytes"] == table.nbytes
+
+
+def test_model_info_reports_table(client):
+    info = client.get("/model-info").json()["logit_table"]
+    assert info["enabled"] is True
+    assert info["bytes"] > 0
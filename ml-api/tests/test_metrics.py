@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""Testes do endpoint /metrics (texto Prometheus e resumo JSON)"""
+
+import asyncio
+
+import pytest
+
+from metrics import CLIENT_CLOSED_STATUS, Histogram, Metrics, MetricsMiddleware
+
+
+def test_histogram_buckets_and_quantile():
+    hist = Histogram(buckets=(0.001, 0.01, 0.1))
+    for value in (0.0005, 0.005, 0.005, 0.05, 1.0):
+        hist.observe(value)
+
+    assert hist.counts == [1, 2, 1, 1]
+    assert hist.count == 5
+    assert hist.quantile(0.5) == 0.01
+    assert hist.quantile(1.0) == float("inf")
+
+
+def test_client_disconnect_is_not_a_5xx():
+    """CancelledError do cancel_on_disconnect vira 499/client_closed, não http_5xx"""
+    async def abandoned(scope, receive, send):
+        raise asyncio.CancelledError("Cliente desconectou")
+
+    metrics = Metrics()
+    completed = []
+    middleware = MetricsMiddleware(abandoned, metrics, on_complete=lambda *args: completed.append(args[2]))
+    scope = {"type": "http", "path": "/predict/batch", "method": "POST"}
+
+    async def scenario():
+        await middleware(scope, None, None)
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(scenario())
+
+    assert metrics.requests == {("unmatched", "POST", CLIENT_CLOSED_STATUS): 1}
+    assert metrics.errors == {("unmatched", "client_closed"): 1}
+    assert completed == [CLIENT_CLOSED_STATUS]
+    assert metrics.in_flight == 0
+
+
+def test_metrics_prometheus_text_has_stages(client, flight_payload):
+    client.post("/predict", json=flight_payload)
+    client.post("/predict/batch", json=[flight_payload, flight_payload])
+
+    response = client.get("/metrics", headers={"Accept": "text/plain"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+    body = response.text
+    for stage in ("parse", "prepare_features", "inference", "serialization"):
+        assert f'api_stage_duration_seconds_count{{endpoint="/predict",stage="{stage}"}}' in body
+    assert 'api_stage_duration_seconds_count{endpoint="/predict/batch",stage="inference"}' in body
+    assert 'api_requests_total{endpoint="/predict",method="POST",status="200"}' in body
+    assert 'api_model_info{model="padrao"' in body
+    assert "api_requests_in_flight 0" in body
+
+
+def test_metrics_use_route_template_for_path_params(client, flight_payload):
+    client.post("/models/hora/predict", json=flight_payload)
+    client.get("/models/inexistente")
+
+    body = client.get("/metrics").text
+    assert 'endpoint="/models/{model_name}/predict",method="POST",status="200"' in body
+    assert 'endpoint="/models/{model_name}",method="GET",status="404"' in body
+    assert 'api_predictions_total{model="hora"' in body
+
+
+def test_metrics_json_for_api_client(client, flight_payload):
+    # FlightDelayAPIClient.get_metrics envia Accept: application/json
+    client.post("/predict", json=flight_payload)
+
+    data = client.get("/metrics", headers={"Accept": "application/json"}).json()
+    assert data["requests_total"] >= 1
+    assert data["stages"]["/predict"]["inference"]["count"] >= 1
+    assert data["in_flight"] == 0
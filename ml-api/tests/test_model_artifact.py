@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""Testes do artefato compacto (serving sem sklearn)"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import app as app_module
+from encoders import CompiledEncoders
+from memory_report import mapped_files
+from model_artifact import (ArtifactError, CompactArtifact, read_artifact, verify_in_background,
+                            wait_for_verification, write_artifact)
+
+
+def export_version(current, path):
+    write_artifact(str(path), CompactArtifact(
+        name=current.name,
+        layout=current.adapter.layout,
+        feature_names=current.adapter.feature_names,
+        coef=current.scorer.coef,
+        intercept=current.scorer.intercept,
+        classes=current.scorer.classes_,
+        link_scale=current.scorer.link_scale,
+        threshold=current.decision_threshold,
+        airline_encoder=current.airline_encoder,
+        airport_pair_encoder=current.airport_pair_encoder,
+        airports=sorted(current.encoders.airport_index, key=current.encoders.airport_index.get),
+        route_table=current.encoders.route_table,
+    ))
+
+
+@pytest.fixture
+def joblib_set():
+    return app_module.load_model_and_encoders(model_format="joblib")
+
+
+def test_round_trip_and_checksum(joblib_set, tmp_path):
+    current = joblib_set.get("hora")
+    path = tmp_path / "hora.bin"
+    export_version(current, path)
+
+    artifact = read_artifact(str(path), verify="eager")
+    np.testing.assert_array_equal(artifact.coef, current.scorer.coef)
+    np.testing.assert_array_equal(artifact.route_table, current.encoders.route_table)
+    assert artifact.feature_names == current.adapter.feature_names
+    assert artifact.threshold == current.decision_threshold
+    assert artifact.checksum_status == "ok"
+
+    # Arrays são views somente leitura sobre o mmap, não cópias
+    assert not artifact.coef.flags.owndata and not artifact.coef.flags.writeable
+    assert artifact.scorer().coef.base is not None
+
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+    with pytest.raises(ArtifactError, match="checksum"):
+        read_artifact(str(path), verify="eager")
+
+    # lazy: abre na hora e a divergência aparece na verificação em background
+    lazy = read_artifact(str(path), verify="lazy")
+    assert lazy.checksum_status == "pending"
+    verify_in_background([lazy]).join()
+    assert lazy.checksum_status == "mismatch"
+
+
+def test_lazy_checksum_mismatch_stops_serving(client, joblib_set, tmp_path, monkeypatch, flight_payload):
+    """Byte corrompido achado pela verificação em background: 503 nas predições e readiness falha"""
+    catalog = app_module.load_catalog()
+    for name in catalog["models"]:
+        export_version(joblib_set.get(name), tmp_path / f"model_{name}.bin")
+    path = tmp_path / f"model_{catalog['default']}.bin"
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    # Carga como no startup (checksums em background) com os artefatos do tmp_path
+    monkeypatch.setattr(app_module, "MODEL_CATALOG_PATH", os.path.abspath(app_module.MODEL_CATALOG_PATH))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(app_module.registry, "active", None)
+    compact_set = app_module.load_model_and_encoders(model_format="compact")
+    wait_for_verification()
+    monkeypatch.setattr(app_module.registry, "active", compact_set)
+
+    assert compact_set.corrupted() == [f"model_{catalog['default']}.bin"]
+    assert client.post("/predict", json=flight_payload).status_code == 503
+    assert client.post("/predict/batch", json=[flight_payload]).status_code == 503
+
+    ready = client.get("/health/ready")
+    assert ready.status_code == 503
+    assert ready.json()["corrupted_artifacts"] == compact_set.corrupted()
+    assert client.get("/health").json()["status"] == "unhealthy"
+    assert client.get("/model-info").status_code == 200       # diagnóstico continua disponível
+
+
+def test_mapped_route_table_matches_compiled_encoders(joblib_set, tmp_path):
+    current = joblib_set.get("padrao")
+    path = tmp_path / "padrao.bin"
+    export_version(current, path)
+    artifact = read_artifact(str(path))
+
+    mapped = CompiledEncoders(artifact.airline_encoder, artifact.airport_pair_encoder,
+                              airports=artifact.airports, route_table=artifact.route_table)
+    for origin, destination in [("GRU", "SCL"), ("gru", "scl"), ("XXX", "SCL")]:
+        assert mapped.route(origin, destination) == current.encoders.route(origin, destination)
+    np.testing.assert_array_equal(mapped.routes(["GRU", "XXX"], ["SCL", "GRU"]),
+                                  current.encoders.routes(["GRU", "XXX"], ["SCL", "GRU"]))
+
+    report = mapped_files([str(path)])
+    assert set(report) == {os.path.realpath(path)}
+    assert report[os.path.realpath(path)]["rss_kb"] >= 0
+
+
+def test_compact_version_matches_sklearn(joblib_set, tmp_path, flight_payload):
+    for name in ("padrao", "hora"):
+        current = joblib_set.get(name)
+        path = tmp_path / f"{name}.bin"
+        export_version(current, path)
+
+        entry = {"path": "model.joblib", "layout": current.adapter.layout, "artifact": str(path)}
+        compact = app_module.load_model_version(
+            name, entry, current.airline_encoder, current.airport_pair_encoder,
+            CompiledEncoders(current.airline_encoder, current.airport_pair_encoder), {}, model_format="compact"
+        )
+        assert compact.adapter.feature_names == current.adapter.feature_names
+
+        flights = [app_module.FlightRequest(**flight_payload),
+                   app_module.FlightRequest(**{**flight_payload, "data_hora_partida": "2024-06-01T07:05:00"})]
+        expected = app_module.score_matrix(app_module.prepare_features_batch(flights, current), current)
+        actual = app_module.score_matrix(app_module.prepare_features_batch(flights, compact), compact)
+        np.testing.assert_array_equal(actual[0], expected[0])
+        np.testing.assert_allclose(actual[1], expected[1], rtol=0, atol=1e-12)
+
+
+def test_stale_artifact_is_rejected(joblib_set, tmp_path):
+    current = joblib_set.get("padrao")
+    path = tmp_path / "padrao.bin"
+    export_version(current, path)
+
+    entry = {"path": "model.joblib", "layout": "hour7", "artifact": str(path)}
+    with pytest.raises(ArtifactError, match="desatualizado"):
+        app_module.load_model_version(
+            "padrao", entry, current.airline_encoder, current.airport_pair_encoder,
+            CompiledEncoders(current.airline_encoder, current.airport_pair_encoder), {}, model_format="compact"
+        )
+
+
+def test_compact_mode_never_imports_sklearn(joblib_set, tmp_path):
+    catalog = app_module.load_catalog()
+    for name, entry in catalog["models"].items():
+        export_version(joblib_set.get(name), tmp_path / f"model_{name}.bin")
+
+    # Processo novo, no diretório dos artefatos exportados (sem model.joblib nem encoders JSON)
+    api_dir = os.path.dirname(os.path.abspath(app_module.__file__))
+    probe = ("import sys, app; model_set = app.load_model_and_encoders(); "
+             "print(sorted(model_set.models), 'sklearn' in sys.modules, 'joblib' in sys.modules)")
+    result = subprocess.run(
+        [sys.executable, "-c", probe], cwd=tmp_path, capture_output=True, text=True,
+        env={**os.environ, "PYTHONPATH": api_dir, "MODEL_FORMAT": "compact",
+             "MODEL_CATALOG": os.path.join(api_dir, app_module.MODEL_CATALOG_PATH)},
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "['hora', 'otimizado', 'padrao'] False False"
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Testes do catálogo com vários modelos e layouts de features"""
+
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pytest
+
+from encoders import CompiledEncoders
+from feature_layouts import FeatureAdapter
+
+
+def test_catalog_lists_models(client):
+    data = client.get("/models").json()
+    assert data["default"] == "padrao"
+    assert data["models"]["padrao"]["layout"] == "padded6"
+    assert data["models"]["hora"]["feature_layout"][-1] == "hora_do_dia"
+
+
+def test_models_share_the_loaded_artifact(client):
+    import app as app_module
+
+    model_set = app_module.registry.active
+    assert model_set.get("padrao").model is model_set.get("hora").model
+    assert model_set.get("padrao").encoders is model_set.get("hora").encoders
+
+
+def test_select_model_by_header_and_path(client, flight_payload):
+    """hora_do_dia como 7ª feature (layout do app_final.py)"""
+    model = joblib.load("model.joblib")
+    departure = datetime.fromisoformat(flight_payload["data_hora_partida"])
+    row = [[1, 0, 0, 0.26, departure.weekday(), departure.month, departure.hour]]
+    expected = model.predict_proba(row)[0, 1]
+
+    by_header = client.post("/predict", json=flight_payload, headers={"X-Model": "hora"}).json()
+    by_path = client.post("/models/hora/predict", json=flight_payload).json()
+    default = client.post("/predict", json=flight_payload).json()
+
+    assert by_header == by_path
+    assert by_header["probabilidade"] == pytest.approx(expected, abs=1e-9)
+    assert default["probabilidade"] != pytest.approx(expected, abs=1e-9)
+
+
+def test_optimized_model_is_served(client, flight_payload):
+    """logistic_regression_optimized.joblib: outro modelo, mesmo layout hour7"""
+    model = joblib.load("logistic_regression_optimized.joblib")
+    departure = datetime.fromisoformat(flight_payload["data_hora_partida"])
+    row = [[1, 0, 0, 0.26, departure.weekday(), departure.month, departure.hour]]
+
+    response = client.post("/models/otimizado/predict", json=flight_payload).json()
+    hora = client.post("/models/hora/predict", json=flight_payload).json()
+    assert response["probabilidade"] == pytest.approx(model.predict_proba(row)[0, 1], abs=1e-9)
+    assert response["probabilidade"] != pytest.approx(hora["probabilidade"], abs=1e-9)
+
+
+def test_batch_by_model(client, flight_payload):
+    single = client.post("/models/hora/predict", json=flight_payload).json()
+    batch = client.post("/models/hora/predict/batch", json=[flight_payload]).json()
+    assert batch["resultados"][0]["probabilidade"] == pytest.approx(single["probabilidade"], abs=1e-9)
+
+
+def test_unknown_model(client, flight_payload):
+    assert client.post("/predict", json=flight_payload, headers={"X-Model": "nao-existe"}).status_code == 404
+    assert client.post("/models/nao-existe/predict", json=flight_payload).status_code == 404
+
+
+@pytest.mark.parametrize("layout,n_features", [("padded6", 7), ("hour7", 7), ("hour7", 9), ("hour7", 4)])
+def test_adapter_matrix_matches_rows(layout, n_features):
+    from app import FlightRequest
+
+    encoders = CompiledEncoders({"LATAM": 0, "GOL": 1, "UNKNOWN": -1}, {"GRU-SCL": 0, "UNKNOWN": -1})
+    adapter = FeatureAdapter(layout, n_features, encoders)
+    flights = [
+        FlightRequest(companhia_aerea=c, aeroporto_origem="GRU", aeroporto_destino=d,
+                      data_hora_partida=datetime(2024, m, 3, h, 0), distancia_km=km)
+        for c, d, m, h, km in [("LATAM", "SCL", 1, 8, 2600.0), ("gol", "EZE", 7, 19, 12000.0)]
+    ]
+
+    rows = [adapter.row(flight) for flight in flights]
+    assert all(len(row) == n_features for row in rows)
+    np.testing.assert_array_equal(adapter.matrix(flights), np.array(rows, dtype=np.float64))
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Testes do cache de predições"""
+
+import os
+
+import pytest
+
+from prediction_cache import PredictionCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hit_and_miss():
+    cache = PredictionCache(max_entries=10)
+    features = cache.quantize([1, 0, 0, 0.26, 2, 1, 0])
+
+    assert cache.get(features) is None
+    cache.put(features, (True, 0.9))
+    assert cache.get(features) == (True, 0.9)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_distance_quantization():
+    """Distâncias no mesmo intervalo de resolução compartilham a entrada"""
+    cache = PredictionCache(distance_resolution_km=10.0)
+
+    a = cache.quantize([1, 0, 0, 2601.0 / 10000, 2, 1, 0])
+    b = cache.quantize([1, 0, 0, 2604.9 / 10000, 2, 1, 0])
+    c = cache.quantize([1, 0, 0, 2616.0 / 10000, 2, 1, 0])
+
+    assert tuple(a) == tuple(b)
+    assert tuple(a) != tuple(c)
+    assert a[3] == pytest.approx(0.26)
+
+
+def test_lru_eviction():
+    cache = PredictionCache(max_entries=2)
+    cache.put([1], "a")
+    cache.put([2], "b")
+    cache.get([1])
+    cache.put([3], "c")
+
+    assert cache.get([2]) is None
+    assert cache.get([1]) == "a"
+    assert cache.evictions == 1
+
+
+def test_ttl_expiration():
+    clock = FakeClock()
+    cache = PredictionCache(ttl_seconds=10, clock=clock)
+    cache.put([1], "a")
+
+    clock.now = 9.9
+    assert cache.get([1]) == "a"
+    clock.now = 10.1
+    assert cache.get([1]) is None
+    assert cache.expirations == 1
+
+
+def test_invalidated_when_artifact_changes(tmp_path):
+    clock = FakeClock()
+    artifact = tmp_path / "model.joblib"
+    artifact.write_bytes(b"v1")
+    cache = PredictionCache(watched_paths=[str(artifact)], check_interval=1.0, clock=clock)
+    cache.put([1], "a")
+
+    artifact.write_bytes(b"versao 2")
+    os.utime(artifact, ns=(0, 123))
+    clock.now = 2.0
+
+    assert cache.get([1]) is None
+    assert cache.invalidations == 1
+
+
+def test_predict_uses_cache(monkeypatch, flight_payload):
+    """Segunda chamada idêntica ao /predict é servida pelo cache"""
+    from fastapi.testclient import TestClient
+    import app as app_module
+
+    monkeypatch.setattr(app_module, "ENABLE_CACHING", True)
+    with TestClient(app_module.app) as client:
+        first = client.post("/predict", json=flight_payload).json()
+        second = client.post("/predict", json={**flight_payload, "distancia_km": 2600.2}).json()
+        stats = client.get("/model-info").json()["cache"]
+
+    assert first == second
+    assert (stats["hits"], stats["misses"]) == (1, 1)
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""Testes do registro de versões e da recarga a quente"""
+
+import asyncio
+import json
+import os
+import shutil
+
+import pytest
+from fastapi.testclient import TestClient
+
+from registry import ModelRegistry, ModelVersion
+
+ARTIFACTS = ["models.json", "model.joblib", "logistic_regression_optimized.joblib", "companhia_encoder.json",
+             "airport_pair_encoder.json", "optimal_threshold.json"]
+
+
+@pytest.fixture
+def artifacts_dir(tmp_path, monkeypatch):
+    """Cópia dos artefatos num diretório temporário que o teste pode alterar"""
+    for name in ARTIFACTS:
+        shutil.copy(name, tmp_path / name)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_admin_reload_swaps_version(artifacts_dir, flight_payload):
+    import app as app_module
+
+    with TestClient(app_module.app) as client:
+        before = client.get("/model-info").json()
+
+        encoder = json.loads((artifacts_dir / "companhia_encoder.json").read_text())
+        encoder["TAP"] = 3
+        (artifacts_dir / "companhia_encoder.json").write_text(json.dumps(encoder))
+
+        response = client.post("/admin/reload")
+        assert response.status_code == 200
+
+        after = client.get("/model-info").json()
+        assert after["version"] != before["version"]
+        assert after["registry"]["previous"][0]["version"] == before["version"]
+        assert client.get("/encoders").json()["airline_encoder"]["TAP"] == 3
+        assert client.post("/predict", json=flight_payload).status_code == 200
+
+
+def test_failed_reload_keeps_active_version(artifacts_dir, flight_payload):
+    import app as app_module
+
+    with TestClient(app_module.app) as client:
+        before = client.get("/model-info").json()["version"]
+
+        (artifacts_dir / "model.joblib").write_bytes(b"corrompido")
+        response = client.post("/admin/reload")
+        assert response.status_code == 500
+
+        info = client.get("/model-info").json()
+        assert info["version"] == before
+        assert info["registry"]["failed_reloads"] == 1
+        assert client.post("/predict", json=flight_payload).status_code == 200
+
+
+def test_admin_token(monkeypatch):
+    import app as app_module
+
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", "segredo")
+    with TestClient(app_module.app) as client:
+        assert client.post("/admin/reload").status_code == 403
+        assert client.post("/admin/reload", headers={"X-Admin-Token": "segredo"}).status_code == 200
+
+
+def fake_version(name):
+    return ModelVersion(
+        version=name, model=None, scorer=None, decision_threshold=0.5, n_features_expected=1,
+        airline_encoder={}, airport_pair_encoder={}, encoders=None
+    )
+
+
+def test_watcher_reloads_on_file_change(tmp_path):
+    artifact = tmp_path / "model.joblib"
+    artifact.write_bytes(b"v1")
+    loads = []
+
+    def loader():
+        loads.append(artifact.read_bytes())
+        return fake_version(artifact.read_bytes().decode())
+
+    async def scenario():
+        registry = ModelRegistry(loader, [str(artifact)], watch_interval=0.01)
+        registry.load_initial()
+        registry.start_watching()
+        try:
+            artifact.write_bytes(b"v2-maior")
+            os.utime(artifact, ns=(0, 42))
+            for _ in range(200):
+                await asyncio.sleep(0.01)
+                if registry.active.version == "v2-maior":
+                    break
+        finally:
+            await registry.stop()
+        return registry
+
+    registry = asyncio.run(scenario())
+    assert registry.active.version == "v2-maior"
+    assert registry.reloads == 1
+    assert loads == [b"v1", b"v2-maior"]
+
+
+def test_warmup_runs_before_swap():
+    order = []
+
+    def warmup(version):
+        order.append(("warmup", version.version, registry.active.version if registry.active else None))
+
+    registry = ModelRegistry(lambda: fake_version(f"v{len(order) + 1}"), [], warmup=warmup, watch_interval=0)
+    registry.load_initial()
+    asyncio.run(registry.reload())
+
+    # Durante o aquecimento da v2, a v1 ainda era a ativa
+    assert order == [("warmup", "v1", None), ("warmup", "v2", "v1")]
+    assert registry.active.version == "v2"
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""Paridade do LogisticScorer (NumPy) com o predict_proba do sklearn"""
+
+import itertools
+import json
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from inference import LogisticScorer, predict_with_threshold
+
+MODELS_DIR = Path(__file__).parent.parent.parent / "datascience" / "3_development" / "models"
+
+ARTIFACTS = [
+    Path("model.joblib"),
+    MODELS_DIR / "logistic_regression_optimized.joblib",
+    MODELS_DIR / "logistic_regression_optimized_final.joblib",
+    MODELS_DIR / "flight_model.joblib",
+]
+
+
+def load_estimator(path):
+    artifact = joblib.load(path)
+    # flight_model.joblib guarda o modelo dentro de um dicionário
+    return artifact["model"] if isinstance(artifact, dict) else artifact
+
+
+def encoder_space():
+    """Todas as combinações de turno/companhia/rota/dia/mês/hora dos encoders"""
+    with open("companhia_encoder.json") as f:
+        airline_codes = sorted(set(json.load(f).values()))
+    with open("airport_pair_encoder.json") as f:
+        route_codes = sorted(set(json.load(f).values()))
+
+    distances = [0.0, 0.05, 0.26, 0.5, 1.0]
+    rows = [
+        [0 if hora < 12 else 1, companhia, rota, distancia, dia, mes, hora]
+        for companhia, rota, distancia, dia, mes, hora in itertools.product(
+            airline_codes, route_codes, distances, range(7), range(1, 13), range(24)
+        )
+    ]
+    return np.array(rows, dtype=np.float64)
+
+
+@pytest.fixture(scope="module")
+def features():
+    return encoder_space()
+
+
+@pytest.mark.parametrize("path", ARTIFACTS, ids=lambda p: p.name)
+def test_matrix_parity(path, features):
+    """Matriz inteira: diferença máxima de 1e-9"""
+    model = load_estimator(path)
+    scorer = LogisticScorer.from_model(model)
+
+    expected = model.predict_proba(features[:, :model.n_features_in_])[:, 1]
+    actual = scorer.predict_proba_positive(features[:, :model.n_features_in_])
+
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("path", ARTIFACTS, ids=lambda p: p.name)
+def test_single_row_parity(path, features):
+    """Caminho de uma linha (buffer reaproveitado) igual ao predict_proba"""
+    model = load_estimator(path)
+    scorer = LogisticScorer.from_model(model)
+    sample = features[::997, :model.n_features_in_]
+
+    expected = model.predict_proba(sample)[:, 1]
+    for row, expected_probability in zip(sample, expected):
+        atraso, probability = scorer.predict_one(row.tolist(), 0.5)
+        assert abs(probability - expected_probability) <= 1e-9
+        assert atraso == (expected_probability >= 0.5)
+
+
+def test_labels_match_threshold(features):
+    """Rótulos pelo scorer iguais aos do caminho sklearn para o mesmo threshold"""
+    model = joblib.load("model.joblib")
+    scorer = LogisticScorer.from_model(model)
+
+    for threshold in (0.05, 0.5, 0.9):
+        expected, _ = predict_with_threshold(model, features, threshold)
+        actual, _ = predict_with_threshold(scorer, features, threshold)
+        np.testing.assert_array_equal(actual, expected)
+
+
+def test_float32_scorer(features):
+    """Em float32 a diferença fica na precisão simples"""
+    model = joblib.load("model.joblib")
+    scorer = LogisticScorer.from_model(model, dtype=np.float32)
+
+    expected = model.predict_proba(features)[:, 1]
+    np.testing.assert_allclose(scorer.predict_proba_positive(features), expected, rtol=0, atol=1e-5)
+
+
+def test_extreme_logits_do_not_overflow():
+    """Logits muito grandes não geram overflow nem NaN"""
+    scorer = LogisticScorer([1.0], 0.0, [0, 1])
+    probabilities = scorer.predict_proba_positive(np.array([[-1000.0], [0.0], [1000.0]]))
+    np.testing.assert_allclose(probabilities, [0.0, 0.5, 1.0])
+    assert scorer.predict_one([-1000.0], 0.5) == (False, 0.0)
+    assert scorer.predict_one([1000.0], 0.5) == (True, 1.0)
+
+
+def test_rejects_multiclass_model():
+    """Modelos com mais de duas classes ficam no caminho sklearn"""
+    rng = np.random.default_rng(0)
+    model = LogisticRegression().fit(rng.normal(size=(30, 2)), np.arange(30) % 3)
+    with pytest.raises(ValueError):
+        LogisticScorer.from_model(model)
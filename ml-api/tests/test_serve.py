@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""Testes do launcher pré-fork (contagem de workers, heartbeats, memória e subida real)"""
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+from memory_report import format_report, process_memory
+from serve import Heartbeats, available_cpus, auto_worker_count
+
+
+def test_cgroup_v2_quota_limits_workers(tmp_path):
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert available_cpus(str(tmp_path)) == min(1.5, len(os.sched_getaffinity(0)))
+    assert auto_worker_count(str(tmp_path)) == min(2, len(os.sched_getaffinity(0)))
+
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert available_cpus(str(tmp_path)) == len(os.sched_getaffinity(0))
+
+
+def test_cgroup_v1_quota(tmp_path):
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("50000")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000")
+    assert available_cpus(str(tmp_path)) == 0.5
+    assert auto_worker_count(str(tmp_path)) == 1
+
+
+def test_heartbeats_are_shared_with_children():
+    heartbeats = Heartbeats(2)
+    heartbeats.beat(0, 1.0)
+    pid = os.fork()
+    if pid == 0:
+        heartbeats.beat(1, 42.0)
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert heartbeats.last(0) == 1.0
+    assert heartbeats.last(1) == 42.0
+
+
+def test_process_memory_report():
+    memory = process_memory()
+    if not memory:
+        pytest.skip("sem /proc/self/smaps_rollup")
+    assert memory["rss_mb"] > 0
+    assert memory["pss_mb"] <= memory["rss_mb"]
+    assert "soma" in format_report({"eu": memory})
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_prefork_workers_serve_preloaded_model(flight_payload):
+    port = free_port()
+    env = {**os.environ, "MEMORY_REPORT_INTERVAL": "0", "MODEL_WATCH_INTERVAL": "0"}
+    master = subprocess.Popen([sys.executable, "serve.py", "--workers", "2", "--host", "127.0.0.1", "--port", str(port)],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + 20
+        while True:
+            try:
+                info = json.load(urllib.request.urlopen(f"{base}/model-info", timeout=1))
+                break
+            except OSError:
+                if time.time() > deadline or master.poll() is not None:
+                    raise
+                time.sleep(0.2)
+
+        assert info["process"]["preloaded"] is True
+        assert info["process"]["pid"] != master.pid
+
+        request = urllib.request.Request(f"{base}/predict", data=json.dumps(flight_payload).encode(),
+                                         headers={"Content-Type": "application/json"})
+        assert "probabilidade" in json.load(urllib.request.urlopen(request, timeout=5))
+    finally:
+        master.send_signal(signal.SIGTERM)
+        assert master.wait(timeout=20) == 0
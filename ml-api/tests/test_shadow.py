@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""Testes do shadow scoring do modelo desafiante"""
+
+import threading
+import time
+
+import pytest
+
+import app as app_module
+from fastapi.testclient import TestClient
+from shadow import ShadowScorer
+
+
+class FakeSet:
+    def __init__(self, models):
+        self.models = models
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_shadow_records_agreement_and_delta():
+    shadow = ShadowScorer("desafiante", lambda flight, current: (True, 0.7), sample_rate=1.0)
+    shadow.start()
+    try:
+        model_set = FakeSet({"desafiante": object()})
+        shadow.offer("voo", (True, 0.5), model_set)
+        shadow.offer("voo", (False, 0.3), model_set)
+        wait_for(lambda: shadow.scored == 2)
+    finally:
+        shadow.stop()
+
+    stats = shadow.stats()
+    assert stats["scored"] == 2
+    assert stats["agreement_rate"] == 0.5
+    assert stats["mean_abs_delta"] == pytest.approx(0.3)
+    assert stats["latency_ms"]["p50"] is not None
+
+
+def test_shadow_drops_when_queue_full():
+    # Sem thread consumidora: a fila enche e o excedente é descartado sem bloquear
+    shadow = ShadowScorer("desafiante", lambda flight, current: (True, 0.5), sample_rate=1.0, queue_size=2)
+    model_set = FakeSet({"desafiante": object()})
+    for _ in range(5):
+        shadow.offer("voo", (True, 0.5), model_set)
+
+    assert shadow.sampled == 5
+    assert shadow.dropped == 3
+
+
+def test_shadow_stop_does_not_block_on_full_queue():
+    """Desafiante travado e fila cheia: stop() descarta o que está na fila e volta logo"""
+    release = threading.Event()
+
+    def slow(flight, current):
+        release.wait(5.0)
+        return True, 0.5
+
+    shadow = ShadowScorer("desafiante", slow, sample_rate=1.0, queue_size=2)
+    shadow.start()
+    model_set = FakeSet({"desafiante": object()})
+    shadow.offer("voo", (True, 0.5), model_set)
+    wait_for(lambda: shadow.stats()["queue_depth"] == 0)     # thread presa no primeiro item
+    for _ in range(3):
+        shadow.offer("voo", (True, 0.5), model_set)
+
+    start = time.perf_counter()
+    shadow.stop(timeout=0.2)
+    assert time.perf_counter() - start < 1.0
+    assert shadow.dropped == 3                                 # 1 com a fila cheia + 2 descartados no stop
+    release.set()
+
+
+def test_shadow_sample_rate_zero_skips_everything():
+    shadow = ShadowScorer("desafiante", lambda flight, current: (True, 0.5), sample_rate=0.0)
+    shadow.offer("voo", (True, 0.5), FakeSet({"desafiante": object()}))
+    assert shadow.sampled == 0
+
+
+def test_shadow_endpoint_scores_challenger(monkeypatch, flight_payload):
+    monkeypatch.setattr(app_module, "SHADOW_MODEL", "hora")
+    monkeypatch.setattr(app_module, "SHADOW_SAMPLE_RATE", 1.0)
+
+    with TestClient(app_module.app) as client:
+        response = client.post("/predict", json=flight_payload, headers={"X-Model": "padrao"})
+        assert response.status_code == 200
+        wait_for(lambda: app_module.shadow.scored == 1)
+        stats = client.get("/shadow").json()
+
+    assert stats["challenger"] == "hora"
+    assert stats["scored"] == 1
+    assert stats["errors"] == 0
+    assert stats["agreement_rate"] in (0.0, 1.0)
+
+
+def test_warmup_traffic_is_not_shadowed(monkeypatch, flight_payload):
+    """Os /predict sintéticos do aquecimento não chegam ao desafiante"""
+    from warmup import Warmup
+
+    monkeypatch.setattr(app_module, "SHADOW_MODEL", "hora")
+    monkeypatch.setattr(app_module, "SHADOW_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(app_module, "warmup", Warmup(enabled=True, min_rounds=1, max_rounds=1))
+
+    with TestClient(app_module.app) as client:
+        assert app_module.warmup.stats()["rounds"] == 1
+        assert app_module.shadow.sampled == 0
+        client.post("/predict", json=flight_payload, headers={"X-Model": "padrao"})
+        assert app_module.shadow.sampled == 1
+
+
+def test_shadow_failure_keeps_champion_prediction(monkeypatch, flight_payload):
+    """Erro ao oferecer ao shadow não troca a predição do campeão pelo fallback"""
+    monkeypatch.setattr(app_module, "SHADOW_MODEL", "hora")
+
+    with TestClient(app_module.app) as client:
+        expected = client.post("/predict", json=flight_payload, headers={"X-Model": "padrao"}).json()
+
+        def broken(*args):
+            raise RuntimeError("fila do shadow quebrada")
+
+        monkeypatch.setattr(app_module.shadow, "offer", broken)
+        response = client.post("/predict", json=flight_payload, headers={"X-Model": "padrao"}).json()
+
+    assert response == expected
+    assert response["probabilidade"] != 0.3
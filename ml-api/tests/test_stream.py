@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""Testes do endpoint NDJSON em streaming (/predict/stream)"""
+
+import asyncio
+import json
+
+import pytest
+
+from ndjson_stream import LineTooLong, chunked, ndjson_lines
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+async def _collect(aiterable):
+    return [item async for item in aiterable]
+
+
+def test_lines_split_across_chunks():
+    """Linhas quebradas entre pedaços são remontadas; linhas vazias são puladas mas contam"""
+    chunks = [b'{"a":', b'1}\n\n{"b"', b":2}\n", b"", b'{"c":3}']
+    lines = asyncio.run(_collect(ndjson_lines(_aiter(chunks))))
+    assert lines == [(1, b'{"a":1}'), (3, b'{"b":2}'), (4, b'{"c":3}')]
+
+
+def test_line_too_long():
+    """Linha sem \\n maior que o limite interrompe a leitura"""
+    with pytest.raises(LineTooLong):
+        asyncio.run(_collect(ndjson_lines(_aiter([b"x" * 100]), max_line_bytes=10)))
+
+
+def test_chunked():
+    groups = asyncio.run(_collect(chunked(_aiter(range(7)), size=3)))
+    assert groups == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def _ndjson(items) -> bytes:
+    return b"".join(json.dumps(item).encode() + b"\n" for item in items)
+
+
+def test_stream_matches_batch(client, flight_payload, monkeypatch):
+    """Uma linha de resultado por voo, na ordem de entrada, igual ao /predict/batch (em vários blocos)"""
+    import app as app_module
+    monkeypatch.setattr(app_module, "STREAM_CHUNK_SIZE", 2)
+
+    flights = [
+        flight_payload,
+        {**flight_payload, "companhia_aerea": "GOL", "data_hora_partida": "2024-07-06T08:15:00"},
+        {**flight_payload, "aeroporto_origem": "GIG", "aeroporto_destino": "EZE", "distancia_km": 2000.0},
+        {**flight_payload, "companhia_aerea": "DESCONHECIDA"},
+        {**flight_payload, "distancia_km": 9000.0},
+    ]
+    response = client.post("/predict/stream", content=_ndjson(flights),
+                           headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+    batch = client.post("/predict/batch", json=flights).json()["resultados"]
+    assert len(results) == len(flights)
+    for result, expected in zip(results, batch):
+        assert result["atraso"] == expected["atraso"]
+        assert abs(result["probabilidade"] - expected["probabilidade"]) < 1e-6
+
+
+def test_stream_invalid_line_keeps_position(client, flight_payload):
+    """Linha inválida vira uma linha de erro no mesmo lugar; o resto do stream continua"""
+    body = _ndjson([flight_payload]) + b'{"companhia_aerea": "GOL"}\nnot json\n' + _ndjson([flight_payload])
+    response = client.post("/predict/stream", content=body)
+    assert response.status_code == 200
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [result["status"] for result in results] == ["success", "error", "error", "success"]
+    assert results[1]["linha"] == 2 and results[2]["linha"] == 3
+    assert results[0] == results[3]
+
+
+def test_stream_empty_body(client):
+    response = client.post("/predict/stream", content=b"")
+    assert response.status_code == 200
+    assert response.text == ""
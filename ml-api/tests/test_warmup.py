@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""Testes do aquecimento no startup e de liveness/readiness"""
+
+import asyncio
+import json
+
+import app as app_module
+from warmup import Warmup, load_flights, synthetic_flights
+
+
+def test_stability_needs_consecutive_close_rounds():
+    warmup = Warmup(enabled=True, min_rounds=3, stable_rounds=2, tolerance=0.2, tolerance_ms=0.0)
+    warmup.p99_ms = [5.0, 2.0]
+    assert not warmup._is_stable()
+    warmup.p99_ms = [5.0, 2.0, 1.9]
+    assert not warmup._is_stable()            # só uma rodada estável
+    warmup.p99_ms = [5.0, 2.0, 1.9, 2.1]
+    assert warmup._is_stable()
+
+
+def test_recorded_flights_json_and_ndjson(tmp_path, flight_payload):
+    (tmp_path / "voos.json").write_text(json.dumps([flight_payload, flight_payload]))
+    (tmp_path / "voos.ndjson").write_text(json.dumps(flight_payload) + "\n\n" + json.dumps(flight_payload) + "\n")
+    assert load_flights(str(tmp_path / "voos.json")) == [flight_payload] * 2
+    assert load_flights(str(tmp_path / "voos.ndjson")) == [flight_payload] * 2
+
+
+def test_synthetic_flights_are_valid_requests():
+    flights = synthetic_flights({"LATAM": 0, "UNKNOWN": 9}, {"GRU-SCL": 1}, size=16)
+    assert len(flights) == 16
+    assert {flight["aeroporto_origem"] for flight in flights} == {"GRU", "XXX"}
+    for flight in flights:
+        app_module.FlightRequest(**flight)
+
+
+def test_startup_warmup_gates_readiness(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    warmup = Warmup(enabled=True, min_rounds=3, max_rounds=5, stable_rounds=2, tolerance_ms=50.0)
+    monkeypatch.setattr(app_module, "warmup", warmup)
+    assert not warmup.ready
+    requests_before = sum(app_module.metrics.requests.values())
+    admitted_before = dict(app_module.admission.accepted)
+
+    with TestClient(app_module.app) as client:
+        # Requisições de aquecimento não entram nas métricas nem no controle de admissão
+        assert sum(app_module.metrics.requests.values()) == requests_before
+        assert dict(app_module.admission.accepted) == admitted_before
+        assert client.get("/health/live").status_code == 200
+
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+        stats = response.json()["warmup"]
+        assert stats["status"] == "done" and stats["stabilized"]
+        assert stats["rounds"] == 3 and stats["errors"] == 0
+        assert client.get("/health").json()["ready"] is True
+
+
+def test_readiness_is_503_until_warm(client, monkeypatch):
+    assert client.get("/health/ready").status_code == 200      # aquecimento desligado nos testes
+
+    monkeypatch.setattr(app_module.warmup, "status", "running")
+    assert client.get("/health/ready").status_code == 503
+    assert client.get("/health/live").status_code == 200
+
+
+def test_failed_warmup_retries_then_releases_traffic(flight_payload):
+    """Aquecimento que só recebe 500 é tentado de novo e depois libera a readiness (degraded)"""
+    calls = []
+
+    async def broken_app(scope, receive, send):
+        calls.append(scope["path"])
+        await send({"type": "http.response.start", "status": 500, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    warmup = Warmup(enabled=True, min_rounds=1, max_rounds=1, retries=1, timeout=10.0)
+    asyncio.run(warmup.run(broken_app, [flight_payload], "teste"))
+
+    assert calls == ["/predict", "/predict/batch"] * 2
+    assert warmup.status == "degraded" and warmup.ready
+    assert warmup.stats()["attempts"] == 2
@@ -0,0 +1,216 @@
+"""
+Aquecimento no startup e prontidão (readiness).
+
+Antes de o processo aceitar tráfego, o lifespan repassa um conjunto de
+voos pelo pipeline completo de /predict e /predict/batch (middleware,
+decoder, admissão, features, inferência, encoder), chamando o app ASGI
+direto, sem rede. Cada rodada mede o p99 do /predict; o aquecimento
+termina quando o p99 para de mudar (WARMUP_STABLE_ROUNDS rodadas seguidas
+dentro da tolerância), ou em WARMUP_MAX_ROUNDS / WARMUP_TIMEOUT.
+
+Voos: WARMUP_FLIGHTS aponta para um arquivo gravado (lista JSON ou NDJSON
+com o mesmo corpo do /predict); sem ele, voos sintéticos gerados a partir
+dos encoders (inclui valores desconhecidos, para passar pelos fallbacks).
+
+As requisições de aquecimento não entram nas métricas, no access log nem
+no controle de admissão (latências frias não contaminam a média da classe).
+Se o aquecimento falhar, ele é tentado de novo (WARMUP_RETRIES, dentro do
+WARMUP_TIMEOUT); esgotadas as tentativas, o status fica "degraded" e o
+processo fica pronto mesmo assim, com um aviso no log.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+WARMUP_FLIGHTS = os.getenv("WARMUP_FLIGHTS")
+WARMUP_SIZE = int(os.getenv("WARMUP_SIZE", "64"))
+WARMUP_MIN_ROUNDS = int(os.getenv("WARMUP_MIN_ROUNDS", "3"))
+WARMUP_MAX_ROUNDS = int(os.getenv("WARMUP_MAX_ROUNDS", "20"))
+WARMUP_STABLE_ROUNDS = int(os.getenv("WARMUP_STABLE_ROUNDS", "2"))
+WARMUP_TOLERANCE = float(os.getenv("WARMUP_TOLERANCE", "0.25"))
+WARMUP_TOLERANCE_MS = float(os.getenv("WARMUP_TOLERANCE_MS", "0.5"))
+# Abaixo do WORKER_TIMEOUT do serve.py: o worker não manda heartbeat enquanto o lifespan não termina
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "20"))
+WARMUP_RETRIES = int(os.getenv("WARMUP_RETRIES", "2"))
+
+
+def load_flights(path: str) -> list:
+    """Voos gravados: lista JSON ou NDJSON (um corpo de /predict por linha)"""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read().strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def synthetic_flights(airline_encoder: dict, airport_pair_encoder: dict, size: int = WARMUP_SIZE,
+                      seed: int = 42) -> list:
+    """Voos variados sobre as companhias e rotas conhecidas, mais alguns desconhecidos"""
+    rng = random.Random(seed)
+    airlines = [name for name in airline_encoder if name != "UNKNOWN"] or ["LATAM"]
+    routes = [key.split("-", 1) for key in airport_pair_encoder if "-" in key] or [["GRU", "SCL"]]
+    start = datetime(2024, 1, 1)
+
+    flights = []
+    for i in range(size):
+        unknown = i % 8 == 7
+        origin, destination = ("XXX", "YYY") if unknown else rng.choice(routes)
+        departure = start + timedelta(days=rng.randrange(366), hours=rng.randrange(24), minutes=rng.randrange(0, 60, 5))
+        flights.append({
+            "companhia_aerea": "DESCONHECIDA" if unknown else rng.choice(airlines),
+            "aeroporto_origem": origin,
+            "aeroporto_destino": destination,
+            "data_hora_partida": departure.isoformat(),
+            "distancia_km": round(rng.uniform(150, 12000), 1),
+        })
+    return flights
+
+
+async def asgi_post(app, path: str, body: bytes):
+    """POST direto no app ASGI (sem socket); devolve o status da resposta"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "client": ("127.0.0.1", 0), "server": ("warmup", 0),
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "warmup": True,
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.Event().wait()     # sem desconexão durante o aquecimento
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    return status[0] if status else 500
+
+
+class Warmup:
+    """Estado do aquecimento deste processo (lido pelo /health/ready)"""
+
+    def __init__(self, enabled: bool = WARMUP_ENABLED, min_rounds: int = WARMUP_MIN_ROUNDS,
+                 max_rounds: int = WARMUP_MAX_ROUNDS, stable_rounds: int = WARMUP_STABLE_ROUNDS,
+                 tolerance: float = WARMUP_TOLERANCE, tolerance_ms: float = WARMUP_TOLERANCE_MS,
+                 timeout: float = WARMUP_TIMEOUT, retries: int = WARMUP_RETRIES):
+        self.enabled = enabled
+        self.min_rounds = min_rounds
+        self.max_rounds = max_rounds
+        self.stable_rounds = stable_rounds
+        self.tolerance = tolerance
+        self.tolerance_ms = tolerance_ms
+        self.timeout = timeout
+        self.retries = retries
+        self.attempts = 1
+        self.status = "pending" if enabled else "disabled"
+        self.source = None
+        self.flights = 0
+        self.p99_ms = []
+        self.batch_ms = []
+        self.errors = 0
+        self.stabilized = False
+        self.seconds = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.status in ("done", "disabled", "degraded")
+
+    def _is_stable(self) -> bool:
+        """p99 das últimas stable_rounds rodadas dentro da tolerância da rodada anterior"""
+        if len(self.p99_ms) < max(self.min_rounds, self.stable_rounds + 1):
+            return False
+        recent = self.p99_ms[-(self.stable_rounds + 1):]
+        return all(abs(current - previous) <= max(self.tolerance * previous, self.tolerance_ms)
+                   for previous, current in zip(recent, recent[1:]))
+
+    async def run(self, app, flights: list, source: str):
+        """Rodadas de /predict (um por voo) + um /predict/batch até o p99 estabilizar"""
+        if not self.enabled:
+            return
+        self.source, self.flights = source, len(flights)
+        bodies = [json.dumps(flight).encode() for flight in flights]
+        batch_body = json.dumps(flights).encode()
+        start = time.perf_counter()
+
+        # Falha (ex.: exceção transitória no primeiro uso) é tentada de novo dentro do mesmo WARMUP_TIMEOUT
+        for attempt in range(1, 2 + self.retries):
+            if attempt > 1:
+                logger.warning(f"⚠️ Aquecimento: tentativa {attempt} de {1 + self.retries}")
+            self.status, self.attempts = "running", attempt
+            await self._attempt(app, bodies, batch_body, start)
+            self.seconds = time.perf_counter() - start
+            if self.status != "failed" or self.seconds >= self.timeout:
+                break
+
+        if self.status == "failed":
+            # Sem aquecimento o processo fica só mais lento no começo; 503 para sempre seria pior
+            self.status = "degraded"
+            logger.warning("⚠️ Aquecimento falhou; liberando tráfego sem ele (readiness 200)")
+            return
+
+        if self.stabilized:
+            logger.info(f"🔥 Aquecimento: p99 estável em {self.p99_ms[-1]:.2f}ms após {len(self.p99_ms)} rodadas "
+                        f"de {self.flights} voos ({source}, {self.seconds:.2f}s)")
+        else:
+            logger.warning(f"⚠️ Aquecimento: p99 não estabilizou em {len(self.p99_ms)} rodadas "
+                           f"({self.p99_ms}); liberando tráfego mesmo assim")
+
+    async def _attempt(self, app, bodies: list, batch_body: bytes, start: float):
+        """Uma tentativa completa; status termina em done ou failed"""
+        self.p99_ms, self.batch_ms, self.errors, self.stabilized = [], [], 0, False
+        try:
+            while len(self.p99_ms) < self.max_rounds and time.perf_counter() - start < self.timeout:
+                latencies = []
+                for body in bodies:
+                    request_start = time.perf_counter()
+                    status = await asgi_post(app, "/predict", body)
+                    latencies.append(time.perf_counter() - request_start)
+                    self.errors += status >= 500
+                batch_start = time.perf_counter()
+                self.errors += await asgi_post(app, "/predict/batch", batch_body) >= 500
+
+                self.batch_ms.append(round((time.perf_counter() - batch_start) * 1000, 3))
+                self.p99_ms.append(round(float(np.percentile(latencies, 99)) * 1000, 3))
+                if self._is_stable():
+                    self.stabilized = True
+                    break
+        except Exception as e:
+            self.status = "failed"
+            logger.error(f"❌ Aquecimento falhou: {e}", exc_info=True)
+            return
+
+        if self.errors and self.errors >= len(self.p99_ms) * (len(bodies) + 1):
+            self.status = "failed"
+            logger.error(f"❌ Aquecimento: todas as {self.errors} requisições falharam")
+            return
+        self.status = "done"
+
+    def stats(self) -> dict:
+        return {
+            "status": self.status,
+            "ready": self.ready,
+            "attempts": self.attempts,
+            "source": self.source,
+            "flights": self.flights,
+            "rounds": len(self.p99_ms),
+            "p99_ms": self.p99_ms,
+            "batch_ms": self.batch_ms,
+            "stabilized": self.stabilized,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 3),
+        }
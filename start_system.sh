@@ -14,9 +14,16 @@ cd ml-api
 if check_port 8000; then
     echo "   ✅ API Python já está rodando"
 else
-    python -m uvicorn app_final:app --host 0.0.0.0 --port 8000 > python.log 2>&1 &
+    # app.py serve todos os layouts (models.json); "hora" = layout do antigo app_final.py
+    # serve.py: modelo carregado uma vez no master, um worker por CPU (WEB_CONCURRENCY=N para fixar)
+    DEFAULT_MODEL=hora python serve.py --host 0.0.0.0 --port 8000 > python.log 2>&1 &
     echo $! > python.pid
     echo "   ✅ API Python iniciada (PID: $(cat python.pid))"
+    # Java só depois do aquecimento (/health/ready = 200 quando o p99 estabilizou)
+    for _ in $(seq 1 60); do
+        curl -sf http://localhost:8000/health/ready > /dev/null && break
+        sleep 1
+    done
 fi
 
 # 2. Iniciar Backend Java
@@ -38,6 +45,7 @@ echo "========================"
 if check_port 8000; then
     echo "✅ API Python:  http://localhost:8000"
     echo "   Health:     http://localhost:8000/health"
+    echo "   Readiness:  http://localhost:8000/health/ready"
 else
     echo "❌ API Python:  OFFLINE"
 fi
@@ -53,7 +61,10 @@ fi
 echo -e "\n📝 ENDPOINTS DISPONÍVEIS:"
 echo "Python:"
 echo "  GET  /health         - Status da API"
-echo "  POST /predict        - Predição de atrasos"
+echo "  GET  /health/live    - Liveness (processo respondendo)"
+echo "  GET  /health/ready   - Readiness (modelo carregado e aquecido)"
+echo "  POST /predict        - Predição de atrasos (header X-Model opcional)"
+echo "  GET  /models         - Modelos servidos"
 echo ""
 echo "Java:"
 echo "  GET  /api/flights    - Listar predições"